@@ -0,0 +1,262 @@
+# YourNews API - Serviço HTTP para gerar newsletters
+# Este arquivo cria uma API (sem interface gráfica) que outros sistemas podem
+# chamar para pedir uma newsletter, acompanhar o andamento e buscar o resultado.
+# A interface do Streamlit também pode usá-la (veja NEWS_API_URL em streamlit_app.py).
+
+# FastAPI é um framework para criar APIs HTTP em Python. Saiba mais em:
+# https://fastapi.tiangolo.com/
+#
+# Para iniciar a API com 4 processos (workers):
+#   uvicorn api_app:app --host 0.0.0.0 --port 8000 --workers 4
+#
+# Cada worker executa buscas em suas próprias threads, mas o estado das buscas,
+# os caches e os locks ficam em arquivos compartilhados (.cache/yournews), então
+# qualquer worker consegue responder sobre qualquer busca.
+
+# Importação das bibliotecas necessárias
+import asyncio  # Para esperar entre as consultas do streaming sem bloquear o servidor
+import json     # Para montar os eventos do streaming (SSE)
+import os       # Para ler variáveis de ambiente
+import time     # Para saber quando enviar o sinal de "ainda conectado"
+from contextlib import asynccontextmanager  # Para preparar a API ao iniciar
+from typing import Optional
+
+from dotenv import load_dotenv  # Para carregar as variáveis do arquivo .env
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool  # Para usar o SQLite sem travar o servidor
+
+# Carregamos as variáveis de ambiente antes de importar os módulos que as leem
+load_dotenv()
+
+# Importamos a função prewarm do nosso módulo de busca
+from utils.searchnews import prewarm
+from utils.cache import get_cache  # Para os contadores do cache
+
+# Importamos o gerenciador que executa as buscas em segundo plano
+from utils.jobs import ACTIVE_STATES, CANCELLED, DONE, JobRejected, get_job_manager
+
+# Medições de desempenho: métricas do Prometheus e registros das buscas
+from utils.metrics import recent_runs, render_prometheus
+
+# ===== CONFIGURAÇÕES =====
+# Chave exigida no cabeçalho X-API-Key (vazio = API aberta)
+API_KEY = os.getenv("NEWS_API_KEY", "")
+# Intervalo, em segundos, entre as consultas ao andamento no streaming (SSE)
+API_POLL_SECONDS = float(os.getenv("NEWS_API_POLL_SECONDS", "0.5"))
+# Intervalo, em segundos, entre os sinais de "ainda conectado" no streaming
+API_KEEPALIVE_SECONDS = float(os.getenv("NEWS_API_KEEPALIVE_SECONDS", "15"))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Cria o gerenciador (que recupera as buscas órfãs) e carrega a equipe de
+    # agentes em segundo plano, para a primeira busca não esperar pelo CrewAI
+    get_job_manager()
+    prewarm()
+    yield
+
+
+app = FastAPI(title=os.getenv("APP_NAME", "YourNews App") + " API", lifespan=lifespan)
+
+
+def require_api_key(x_api_key: Optional[str] = Header(default=None)):
+    """Recusa a requisição se NEWS_API_KEY estiver definida e a chave não bater"""
+    if API_KEY and x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid or missing X-API-Key header.")
+
+
+class SearchRequest(BaseModel):
+    """Corpo do pedido de uma nova busca"""
+
+    subject: str = Field(min_length=1, max_length=200, description="Subject of the newsletter")
+    refresh: bool = Field(default=False, description="Ignore cached results")
+    exact: bool = Field(default=False, description="Do not reuse the newsletter of a similar subject")
+    user_id: Optional[str] = Field(default=None, description="Caller identifier, used in the per-user limit")
+
+
+class RetryRequest(BaseModel):
+    """Corpo do pedido para refazer uma busca só para o assunto digitado"""
+
+    user_id: Optional[str] = None
+
+
+def _user_id(request, user_id):
+    # Sem identificador, cada endereço de origem conta como um usuário
+    return user_id or (request.client.host if request.client else "api")
+
+
+def _job_or_404(job_id):
+    job = get_job_manager().status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+def _submitted(job_id):
+    """Resposta 202 com o identificador e os endereços da nova busca"""
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}",
+            "events_url": f"/jobs/{job_id}/events",
+            "result_url": f"/jobs/{job_id}/result",
+        },
+    )
+
+
+@app.post("/jobs", dependencies=[Depends(require_api_key)])
+def submit_job(body: SearchRequest, request: Request):
+    """Envia uma busca para execução em segundo plano"""
+    try:
+        job_id = get_job_manager().submit(
+            _user_id(request, body.user_id), body.subject, refresh=body.refresh, exact=body.exact
+        )
+    except JobRejected as e:
+        # Fila cheia ou limite de buscas do usuário atingido (contando todos os workers)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    return _submitted(job_id)
+
+
+@app.get("/jobs/{job_id}", dependencies=[Depends(require_api_key)])
+def job_status(job_id: str):
+    """Estado de uma busca (com a newsletter, quando pronta)"""
+    return _job_or_404(job_id)
+
+
+@app.get("/jobs/{job_id}/stages", dependencies=[Depends(require_api_key)])
+def job_stages(job_id: str):
+    """Conteúdo parcial de cada etapa da busca, na ordem em que começaram"""
+    _job_or_404(job_id)
+    return get_job_manager().stages(job_id)
+
+
+@app.get("/jobs/{job_id}/result", dependencies=[Depends(require_api_key)])
+def job_result(job_id: str):
+    """
+    Newsletter de uma busca terminada.
+
+    Responde 202 enquanto a busca está ativa e 409 se ela falhou ou foi cancelada.
+    """
+    job = _job_or_404(job_id)
+    if job["status"] in ACTIVE_STATES:
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": job["status"]})
+    if job["status"] != DONE:
+        raise HTTPException(status_code=409, detail=job["error"] or f"The search was {job['status']}.")
+    # Se a newsletter veio de um assunto parecido (cache semântico), dizemos qual
+    similar = next((stage["content"] for stage in get_job_manager().stages(job_id)
+                    if stage["stage"] == "semantic"), None)
+    return {"job_id": job_id, "subject": job["subject"], "similar_subject": similar, "newsletter": job["result"]}
+
+
+@app.delete("/jobs/{job_id}", dependencies=[Depends(require_api_key)])
+def cancel_job(job_id: str):
+    """Cancela uma busca ativa (de qualquer worker)"""
+    job = _job_or_404(job_id)
+    if not get_job_manager().cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"The search is already {job['status']}.")
+    return {"job_id": job_id, "cancelled": True}
+
+
+@app.post("/jobs/{job_id}/retry-exact", dependencies=[Depends(require_api_key)])
+def retry_exact(job_id: str, body: RetryRequest, request: Request):
+    """Refaz a busca só para o assunto digitado ("This is not what I meant")"""
+    try:
+        new_job_id = get_job_manager().retry_exact(_user_id(request, body.user_id), job_id)
+    except JobRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    if new_job_id is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return _submitted(new_job_id)
+
+
+def _sse(event, data):
+    """Formata um evento no padrão Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get("/jobs/{job_id}/events", dependencies=[Depends(require_api_key)])
+async def job_events(job_id: str, request: Request):
+    """
+    Transmite o andamento de uma busca (Server-Sent Events).
+
+    Eventos enviados:
+    - status: {"status": ...} a cada mudança de estado da busca
+    - stage: {"stage", "content", "finished"} sempre que o conteúdo de uma etapa muda
+    - end: o estado final, com "result" ou "error", e a conexão é encerrada
+    - gone: a busca deixou de existir (foi removida após o período de
+      retenção), e a conexão é encerrada
+    """
+    await run_in_threadpool(_job_or_404, job_id)
+    manager = get_job_manager()
+
+    async def stream():
+        status = None
+        sent = {}
+        last_sent = time.monotonic()
+        while not await request.is_disconnected():
+            job = await run_in_threadpool(manager.status, job_id)
+            if job is None:
+                yield _sse("gone", {"job_id": job_id, "error": "The search is no longer available."})
+                return
+            stages = await run_in_threadpool(manager.stages, job_id)
+            chunks = []
+            if job["status"] != status:
+                status = job["status"]
+                chunks.append(_sse("status", {"status": status}))
+            for stage in stages:
+                version = (stage["content"], stage["finished_at"])
+                if sent.get(stage["stage"]) != version:
+                    sent[stage["stage"]] = version
+                    chunks.append(_sse("stage", {
+                        "stage": stage["stage"],
+                        "content": stage["content"],
+                        "finished": stage["finished_at"] is not None,
+                    }))
+            if status not in ACTIVE_STATES:
+                chunks.append(_sse("end", {
+                    "status": status,
+                    "result": job["result"] if status == DONE else None,
+                    "error": job["error"] or ("The search was cancelled." if status == CANCELLED else None),
+                }))
+                yield "".join(chunks)
+                return
+            if chunks:
+                yield "".join(chunks)
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= API_KEEPALIVE_SECONDS:
+                # Comentário SSE: mantém a conexão aberta em proxies que derrubam conexões paradas
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(API_POLL_SECONDS)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/stats", dependencies=[Depends(require_api_key)])
+def cache_stats():
+    """Contadores do cache de resultados (deste worker) e entradas guardadas"""
+    return get_cache().stats()
+
+
+@app.get("/runs", dependencies=[Depends(require_api_key)])
+def runs(limit: int = 50):
+    """Registros de desempenho das buscas mais recentes (de todos os workers)"""
+    return recent_runs(max(1, min(limit, 500)))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas deste worker no formato de texto do Prometheus"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
@@ -0,0 +1,326 @@
+"""
+YourNews - Servidores Falsos para Testes de Carga
+
+Servidores HTTP locais que imitam os serviços externos usados pela equipe, para
+medir o desempenho sem gastar créditos das APIs:
+
+1. Serper: responde a /news e /search com notícias inventadas que apontam para
+   o servidor de artigos.
+2. Artigos: páginas HTML estáticas com ETag, como as de um jornal.
+3. OpenAI: responde a /v1/chat/completions (com e sem streaming) no formato que
+   o CrewAI espera ("Final Answer: ...", em JSON quando a tarefa pede saída
+   estruturada), gerando tokens em um ritmo configurável, e a /v1/embeddings.
+
+Todos aceitam latência extra e injeção de erros, para simular serviços lentos
+ou instáveis. Cada servidor roda em uma thread e escuta em uma porta livre.
+"""
+
+# Importações de bibliotecas padrão do Python
+import hashlib   # Para gerar o ETag das páginas
+import json      # Para ler e montar as respostas das APIs
+import random    # Para sortear textos, atrasos e erros
+import re        # Para encontrar as notícias pedidas no prompt
+import threading # Para rodar cada servidor em segundo plano
+import time      # Para simular latência e ritmo de geração de tokens
+import uuid      # Para os identificadores das respostas do LLM
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Palavras usadas para montar textos falsos (bastante variadas, para que o
+# agrupamento de duplicatas não junte notícias diferentes)
+_WORDS = """
+governo economia mercado juros inflação eleição congresso tecnologia inteligência
+artificial empresa startup investimento exportação agricultura clima energia solar
+petróleo saúde vacina hospital educação escola universidade pesquisa ciência espaço
+futebol campeonato seleção cultura cinema música festival transporte metrô aeroporto
+segurança polícia justiça tribunal decisão ministro presidente senado reforma imposto
+""".split()
+
+
+class FakeConfig:
+    """
+    Comportamento de um servidor falso.
+
+    Args:
+        latency (float): Atraso, em segundos, antes de cada resposta
+        error_rate (float): Fração (0 a 1) das requisições que recebem erro
+        error_status (int): Código HTTP dos erros injetados (ex.: 500 ou 429)
+        retry_after (float): Valor do cabeçalho Retry-After nos erros 429
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=500, retry_after=1.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def begin(self):
+        """Conta a requisição, aplica o atraso e diz se ela deve receber um erro"""
+        with self._lock:
+            self.requests += 1
+            failed = random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return failed
+
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Respostas HTTP/1.1 permitem que os clientes reaproveitem as conexões
+    protocol_version = "HTTP/1.1"
+    config = FakeConfig()
+
+    def log_message(self, format, *args):
+        # Não polui o terminal com uma linha por requisição
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self):
+        headers = {}
+        if self.config.error_status == 429:
+            headers["Retry-After"] = str(self.config.retry_after)
+        self._send(self.config.error_status, {"error": {"message": "injected error"}}, headers=headers)
+
+
+class _SerperHandler(_Handler):
+    """Imita a API do Serper, com notícias que apontam para o servidor de artigos"""
+    articles_url = ""
+    results = 10
+
+    def do_POST(self):
+        payload = self._read_json()
+        if self.config.begin():
+            self._send_error()
+            return
+        query = payload.get("q", "")
+        # A mesma consulta sempre gera as mesmas notícias
+        rng = random.Random(query)
+        news = []
+        for _ in range(min(int(payload.get("num", self.results)), self.results)):
+            article = rng.randrange(10_000)
+            news.append({
+                "title": f"{query.split(' site:')[0].title()}: {_sentence(rng, 6)}",
+                "link": f"{self.articles_url}/article/{article}",
+                "snippet": _sentence(rng, 20),
+                "date": "1 day ago",
+                "source": "Jornal Local",
+            })
+        if self.path.rstrip("/").endswith("/news"):
+            self._send(200, {"news": news})
+        else:
+            self._send(200, {"organic": [
+                {"title": item["title"], "link": item["link"], "snippet": item["snippet"], "position": index + 1}
+                for index, item in enumerate(news)
+            ]})
+
+
+class _ArticleHandler(_Handler):
+    """Páginas de notícias estáticas, com ETag para requisições condicionais"""
+    paragraphs = 8
+
+    def do_GET(self):
+        if self.config.begin():
+            self._send_error()
+            return
+        rng = random.Random(self.path)
+        body = "".join(f"<p>{_sentence(rng, 25)}</p>" for _ in range(self.paragraphs))
+        html = (
+            f"<html><head><title>{_sentence(rng, 6)}</title></head><body>"
+            f"<nav>Menu Política Economia Esportes</nav><article><h1>{_sentence(rng, 6)}</h1>{body}</article>"
+            f"<footer>Todos os direitos reservados</footer></body></html>"
+        ).encode("utf-8")
+        etag = '"' + hashlib.sha1(html).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", headers={"ETag": etag})
+            return
+        self._send(200, html, content_type="text/html; charset=utf-8", headers={"ETag": etag})
+
+
+class _ChatHandler(_Handler):
+    """Imita /v1/chat/completions da OpenAI, gerando texto no formato do CrewAI"""
+    completion_tokens = 400
+    tokens_per_second = 100.0
+    items = 5
+
+    def _answer(self, prompt):
+        rng = random.Random(prompt)
+        words_per_item = max(5, self.completion_tokens // self.items - 8)
+        # Quando a tarefa pede saída estruturada (output_pydantic), o prompt traz
+        # o esquema do modelo; respondemos no mesmo formato
+        if '"relevance"' in prompt:
+            # O pesquisador usa as notícias pré-carregadas (candidatos) que vieram no prompt
+            candidates = re.findall(r"^\d+\. \*\*(.+?)\*\* \(.+?\) - (\S+)$", prompt, re.M)
+            candidates = candidates[:self.items] or [
+                (_sentence(rng, 6), f"https://example.com/news/{rng.randrange(10_000)}") for _ in range(self.items)
+            ]
+            answer = json.dumps({"items": [
+                {
+                    "title": title,
+                    "url": url,
+                    "source": "Jornal Local",
+                    "published_at": "2025-07-28",
+                    "summary": _sentence(random.Random(url), words_per_item),
+                    "relevance": rng.randint(1, 10),
+                }
+                for title, url in candidates
+            ]}, ensure_ascii=False)
+        elif '"analyses"' in prompt:
+            # Uma análise para cada notícia pedida (linhas numeradas no fim do prompt)
+            news = re.findall(r"^\d+\. (.+?) \| .+? \| .+? \| .+? \| (\S+) \|", prompt.split("SOMENTE")[-1], re.M)
+            answer = json.dumps({"analyses": [
+                {"title": title, "url": url, "analysis": _sentence(rng, words_per_item), "sources": [url]}
+                for title, url in news or [("Notícia", "https://example.com/news/0")]
+            ]}, ensure_ascii=False)
+        else:
+            # Notícias numeradas em Markdown, como as escritas pelo editor
+            answer = "\n\n".join(
+                f"{number}. **{_sentence(rng, 6)}** - {_sentence(rng, words_per_item)} "
+                f"(https://example.com/news/{rng.randrange(10_000)})"
+                for number in range(1, self.items + 1)
+            )
+        return "Thought: I now know the final answer\nFinal Answer: " + answer
+
+    def _embeddings(self, payload):
+        """Vetores determinísticos: cada palavra soma 1 em uma posição escolhida pelo hash"""
+        inputs = payload.get("input", "")
+        data = []
+        for index, text in enumerate([inputs] if isinstance(inputs, str) else inputs):
+            vector = [0.0] * 64
+            for word in str(text).lower().split():
+                vector[int(hashlib.sha1(word.encode("utf-8")).hexdigest(), 16) % 64] += 1.0
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        self._send(200, {"object": "list", "data": data, "model": payload.get("model", "fake"),
+                         "usage": {"prompt_tokens": 1, "total_tokens": 1}})
+
+    def do_POST(self):
+        payload = self._read_json()
+        if self.config.begin():
+            self._send_error()
+            return
+        if self.path.rstrip("/").endswith("/embeddings"):
+            self._embeddings(payload)
+            return
+        prompt = "\n".join(str(message.get("content", "")) for message in payload.get("messages", []))
+        text = self._answer(prompt)
+        # Aproximação usada em todo o projeto: 1 token a cada 4 caracteres
+        prompt_tokens = len(prompt) // 4
+        pieces = text.split(" ")
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(pieces),
+            "total_tokens": prompt_tokens + len(pieces),
+        }
+        response_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = payload.get("model", "fake")
+        delay = 1 / self.tokens_per_second if self.tokens_per_second else 0
+
+        if not payload.get("stream"):
+            time.sleep(delay * len(pieces))
+            self._send(200, {
+                "id": response_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        # Streaming: um evento (Server-Sent Events) por token, no ritmo configurado
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def event(delta, finish_reason=None, **extra):
+            chunk = {
+                "id": response_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        for index, piece in enumerate(pieces):
+            time.sleep(delay)
+            event({"role": "assistant", "content": piece if index == 0 else " " + piece})
+        event({}, "stop", usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class FakeServer:
+    """
+    Um servidor falso rodando em segundo plano.
+
+    Args:
+        handler (type): Classe que trata as requisições
+        config (FakeConfig): Latência e erros do servidor
+        **settings: Atributos extras do handler (ex.: completion_tokens=400)
+    """
+
+    def __init__(self, handler, config=None, **settings):
+        self.config = config or FakeConfig()
+        # Cada servidor recebe sua própria subclasse, para não misturar configurações
+        handler = type(handler.__name__, (handler,), {"config": self.config, **settings})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def start_fakes(serper=None, articles=None, llm=None, completion_tokens=400, tokens_per_second=100.0):
+    """
+    Inicia os três servidores falsos.
+
+    Args:
+        serper (FakeConfig, optional): Comportamento do servidor do Serper
+        articles (FakeConfig, optional): Comportamento do servidor de artigos
+        llm (FakeConfig, optional): Comportamento do servidor da OpenAI
+        completion_tokens (int): Tamanho aproximado de cada resposta do LLM
+        tokens_per_second (float): Ritmo de geração de tokens do LLM (0 = instantâneo)
+
+    Returns:
+        dict: Servidores "serper", "articles" e "llm", já rodando
+    """
+    article_server = FakeServer(_ArticleHandler, articles).start()
+    return {
+        "articles": article_server,
+        "serper": FakeServer(_SerperHandler, serper, articles_url=article_server.url).start(),
+        "llm": FakeServer(
+            _ChatHandler, llm, completion_tokens=completion_tokens, tokens_per_second=tokens_per_second
+        ).start(),
+    }
@@ -0,0 +1,213 @@
+"""
+YourNews - Teste de Carga Offline
+
+Roda a busca completa (search_news: cache, pré-busca, agentes do CrewAI) com
+vários usuários simulados ao mesmo tempo, sem gastar créditos das APIs: o Serper,
+as páginas de notícias e o LLM são substituídos pelos servidores falsos de
+benchmarks/fakes.py, indicados à equipe por SERPER_BASE_URL e OPENAI_BASE_URL.
+
+Ao final, mostra a latência (p50/p95/p99) das buscas, a vazão (buscas por
+minuto), os erros e os tokens usados por newsletter. Os caches, traces e
+arquivos gerados ficam em um diretório temporário, apagado no final.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.load --users 4 --searches 2
+    python -m benchmarks.load --users 8 --llm-latency 0.5 --tokens-per-second 50 --llm-error-rate 0.05
+    python -m benchmarks.load --users 8 --topics 2          # assuntos repetidos: mede o cache
+"""
+
+# Importações de bibliotecas padrão do Python
+import argparse    # Para ler os parâmetros da linha de comando
+import contextlib  # Para desviar as mensagens da busca durante a saída em JSON
+import json        # Para a saída em JSON
+import os          # Para configurar o ambiente da busca
+import shutil      # Para apagar o diretório temporário
+import sys         # Para o código de saída
+import tempfile    # Diretório temporário para caches e arquivos gerados
+import threading   # Para a barreira que solta os usuários ao mesmo tempo
+import time        # Para medir as durações
+from concurrent.futures import ThreadPoolExecutor  # Um "usuário" por thread
+
+from benchmarks.fakes import FakeConfig, start_fakes
+
+# Assuntos usados pelos usuários simulados
+TOPICS = ["economia", "tecnologia", "clima", "futebol", "saúde", "educação", "energia", "cinema"]
+
+
+def _configure_environment(fakes, workdir, args):
+    """Aponta a aplicação para os servidores falsos e para o diretório temporário"""
+    os.environ.update({
+        "SERPER_API_KEY": "benchmark",
+        "SERPER_BASE_URL": fakes["serper"].url,
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"{fakes['llm'].url}/v1",
+        "OPENAI_MODEL_NAME": "gpt-4o-mini",
+        "NEWS_STREAM_TOKENS": "1" if args.stream else "0",
+        "NEWS_CACHE_DB_PATH": os.path.join(workdir, "results.sqlite3"),
+        "NEWS_LOCK_DIR": os.path.join(workdir, "locks"),
+        "NEWS_PAGE_CACHE_DIR": os.path.join(workdir, "pages"),
+        "NEWS_TRACE_PATH": os.path.join(workdir, "traces.jsonl"),
+        "NEWS_JOBS_DB_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "NEWS_ARTICLE_DB_PATH": os.path.join(workdir, "articles.sqlite3"),
+        "NEWS_TOPIC_STATE_DB_PATH": os.path.join(workdir, "topics.sqlite3"),
+        "NEWS_RATE_LIMIT_DB_PATH": os.path.join(workdir, "ratelimit.sqlite3"),
+        "NEWS_SEMANTIC_DB_PATH": os.path.join(workdir, "topics_semantic.sqlite3"),
+        "NEWS_ARTIFACT_DIR": os.path.join(workdir, "artifacts"),
+        "NEWS_ARTIFACT_PERSIST": "0",
+        "NEWS_BATCH_DIR": os.path.join(workdir, "batches"),
+        # Nada deve sair da máquina durante o teste
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+        "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+    })
+
+
+def _subjects(args):
+    """Assuntos de cada usuário: todos diferentes, ou repetidos entre --topics assuntos"""
+    total = args.users * args.searches
+    if args.topics:
+        return [TOPICS[index % args.topics % len(TOPICS)] for index in range(total)]
+    return [f"{TOPICS[index % len(TOPICS)]} {index}" for index in range(total)]
+
+
+def run(args):
+    """
+    Executa o teste de carga.
+
+    Returns:
+        dict: Relatório com latências, vazão, erros, tokens e requisições aos servidores falsos
+    """
+    fakes = start_fakes(
+        serper=FakeConfig(args.serper_latency, args.serper_error_rate, args.serper_error_status),
+        articles=FakeConfig(args.article_latency, args.article_error_rate),
+        llm=FakeConfig(args.llm_latency, args.llm_error_rate, args.llm_error_status),
+        completion_tokens=args.completion_tokens,
+        tokens_per_second=args.tokens_per_second,
+    )
+    workdir = tempfile.mkdtemp(prefix="yournews-load-")
+    _configure_environment(fakes, workdir, args)
+    # Tudo o que ainda usar um caminho relativo (ex.: .cache/yournews) fica no
+    # diretório temporário, e não no projeto
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    try:
+        # Importados só agora, para que leiam as configurações acima
+        from utils.metrics import percentiles, recent_runs
+        from utils.searchnews import search_news
+        from utils.wnews.crew import crew_template
+
+        warm_start = time.perf_counter()
+        crew_template()
+        warmup = time.perf_counter() - warm_start
+
+        subjects = _subjects(args)
+        latencies, errors = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(args.users)
+
+        def user(number):
+            # Todos os usuários começam juntos, como em um pico de acessos
+            barrier.wait()
+            for subject in subjects[number::args.users]:
+                started = time.perf_counter()
+                result = search_news(subject, refresh=args.refresh)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if result.startswith("CrewAI error"):
+                        errors.append(result)
+                    else:
+                        latencies.append(elapsed)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            list(pool.map(user, range(args.users)))
+        wall = time.perf_counter() - started
+
+        # Tokens por newsletter, tirados dos traces das buscas que rodaram a equipe
+        runs = [run for run in recent_runs(len(subjects) * 2) if run.get("tokens")]
+        tokens = [run["tokens"]["prompt"] + run["tokens"]["completion"] for run in runs]
+        cost = [run["tokens"]["cost_usd"] for run in runs]
+    finally:
+        os.chdir(previous_dir)
+        for server in fakes.values():
+            server.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "users": args.users,
+        "searches": len(subjects),
+        "ok": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0][:200] if errors else None,
+        "crew_warmup_s": round(warmup, 3),
+        "wall_s": round(wall, 3),
+        "throughput_per_min": round(len(latencies) / wall * 60, 2) if wall else 0.0,
+        "latency_s": {f"p{point}": round(value, 3) for point, value in percentiles(latencies).items()},
+        "crew_runs": len(runs),
+        "tokens_per_newsletter": round(sum(tokens) / len(tokens)) if tokens else 0,
+        "cost_per_newsletter_usd": round(sum(cost) / len(cost), 6) if cost else 0.0,
+        "fake_requests": {name: server.config.requests for name, server in fakes.items()},
+        "injected_errors": {name: server.config.errors for name, server in fakes.items()},
+        "workdir": workdir if args.keep else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga offline do YourNews")
+    parser.add_argument("--users", type=int, default=4, help="usuários simulados ao mesmo tempo")
+    parser.add_argument("--searches", type=int, default=2, help="buscas feitas por cada usuário, uma após a outra")
+    parser.add_argument("--topics", type=int, default=0,
+                        help="quantidade de assuntos diferentes (0 = todas as buscas com assuntos diferentes)")
+    parser.add_argument("--refresh", action="store_true", help="ignora o cache de resultados")
+    parser.add_argument("--no-stream", dest="stream", action="store_false", help="desativa o streaming do editor")
+    parser.add_argument("--serper-latency", type=float, default=0.2, help="atraso do Serper, em segundos")
+    parser.add_argument("--serper-error-rate", type=float, default=0.0)
+    parser.add_argument("--serper-error-status", type=int, default=500, help="código HTTP dos erros do Serper (ex.: 429)")
+    parser.add_argument("--article-latency", type=float, default=0.1, help="atraso das páginas, em segundos")
+    parser.add_argument("--article-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="atraso até o primeiro token, em segundos")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-error-status", type=int, default=500, help="código HTTP dos erros do LLM (ex.: 429)")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="ritmo de geração do LLM (0 = instantâneo)")
+    parser.add_argument("--completion-tokens", type=int, default=400, help="tamanho de cada resposta do LLM")
+    parser.add_argument("--max-p95", type=float, default=0.0, help="falha se o p95 passar deste valor, em segundos")
+    parser.add_argument("--keep", action="store_true", help="mantém o diretório temporário (traces, caches)")
+    parser.add_argument("--json", action="store_true",
+                        help="imprime o relatório em JSON (as mensagens da busca vão para o stderr)")
+    args = parser.parse_args()
+
+    if args.json:
+        # Com --json, o relatório é a única coisa no stdout, para poder ser lido por outro programa
+        with contextlib.redirect_stdout(sys.stderr):
+            report = run(args)
+    else:
+        report = run(args)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        latency = report["latency_s"]
+        print(f"Searches:             {report['ok']} ok / {report['errors']} errors "
+              f"({report['users']} users, {report['crew_runs']} crew runs)")
+        print(f"Crew warm-up:         {report['crew_warmup_s']:8.2f} s")
+        if latency:
+            print(f"Latency p50/p95/p99:  {latency['p50']:8.2f} / {latency['p95']:.2f} / {latency['p99']:.2f} s")
+        print(f"Throughput:           {report['throughput_per_min']:8.2f} searches/min")
+        print(f"Tokens per newsletter:{report['tokens_per_newsletter']:8d} (US$ {report['cost_per_newsletter_usd']:.4f})")
+        print(f"Fake server requests: {report['fake_requests']} (injected errors: {report['injected_errors']})")
+        if report["first_error"]:
+            print(f"First error:          {report['first_error']}")
+
+    failures = []
+    if not report["ok"]:
+        failures.append("no search finished successfully")
+    if args.max_p95 and report["latency_s"].get("p95", 0) > args.max_p95:
+        failures.append(f"p95 latency {report['latency_s']['p95']:.2f} s is above {args.max_p95:.2f} s")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr if args.json else sys.stdout)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
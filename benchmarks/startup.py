@@ -0,0 +1,105 @@
+"""
+YourNews - Benchmark de Inicialização
+
+Mede o custo de abrir a aplicação e de preparar a equipe para cada busca:
+
+1. Tempo de importação dos módulos usados pela interface (utils.searchnews,
+   utils.jobs, utils.cache), que NÃO devem carregar o CrewAI.
+2. Com --crew: tempo de importação do CrewAI, de construção da equipe modelo e
+   o custo por busca de Wnews().crew() comparado a uma cópia da equipe modelo.
+
+Cada medição roda em um interpretador Python novo, para que nada já esteja em
+memória. O script termina com código 1 se algum limite for ultrapassado, e pode
+ser usado para detectar regressões.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --crew --max-ui-import-ms 300
+"""
+
+# Importações de bibliotecas padrão do Python
+import argparse    # Para ler os parâmetros da linha de comando
+import json        # Para receber as medições do processo filho
+import os          # Para montar o ambiente do processo filho
+import subprocess  # Para rodar cada medição em um interpretador novo
+import sys         # Para saber qual interpretador usar
+
+# Código executado no processo filho para medir a importação da interface
+_UI_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import utils.searchnews, utils.jobs, utils.cache
+elapsed = time.perf_counter() - start
+print(json.dumps({"ui_import_ms": elapsed * 1000, "crewai_loaded": "crewai" in sys.modules}))
+"""
+
+# Código executado no processo filho para medir a preparação da equipe
+_CREW_PROBE = """
+import json, time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+from utils.wnews.crew import Wnews, crew_template
+imported = time.perf_counter()
+template = crew_template()
+built = time.perf_counter()
+runs = 5
+fresh_start = time.perf_counter()
+for _ in range(runs):
+    Wnews().crew()
+fresh = (time.perf_counter() - fresh_start) / runs
+copy_start = time.perf_counter()
+for _ in range(runs):
+    template.copy()
+copied = (time.perf_counter() - copy_start) / runs
+print(json.dumps({
+    "crew_import_ms": (imported - start) * 1000,
+    "template_build_ms": (built - imported) * 1000,
+    "fresh_crew_ms": fresh * 1000,
+    "template_copy_ms": copied * 1000,
+}))
+"""
+
+
+def _probe(code):
+    """Roda um trecho de código em um interpretador novo e retorna o JSON impresso"""
+    env = dict(os.environ)
+    # O CrewAI exige uma chave para construir os agentes, mas nada é chamado aqui
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do YourNews")
+    parser.add_argument("--crew", action="store_true", help="também mede a preparação da equipe (carrega o CrewAI)")
+    parser.add_argument("--max-ui-import-ms", type=float, default=500.0,
+                        help="tempo máximo de importação dos módulos da interface")
+    args = parser.parse_args()
+
+    failures = []
+
+    ui = _probe(_UI_PROBE)
+    print(f"UI modules import:    {ui['ui_import_ms']:8.1f} ms")
+    if ui["crewai_loaded"]:
+        failures.append("importing the UI modules loaded crewai (it must be imported lazily)")
+    if ui["ui_import_ms"] > args.max_ui_import_ms:
+        failures.append(f"UI import took {ui['ui_import_ms']:.0f} ms (limit {args.max_ui_import_ms:.0f} ms)")
+
+    if args.crew:
+        crew = _probe(_CREW_PROBE)
+        print(f"crewai + crew import: {crew['crew_import_ms']:8.1f} ms")
+        print(f"template build:       {crew['template_build_ms']:8.1f} ms")
+        print(f"Wnews().crew():       {crew['fresh_crew_ms']:8.1f} ms per search")
+        print(f"template.copy():      {crew['template_copy_ms']:8.1f} ms per search")
+        if crew["template_copy_ms"] > crew["fresh_crew_ms"]:
+            failures.append("copying the crew template is slower than building a new crew")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
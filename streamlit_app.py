@@ -8,12 +8,24 @@
 
 # Importação das bibliotecas necessárias
 import os  # Biblioteca padrão para interagir com o sistema operacional
+import time  # Para calcular há quanto tempo a busca está rodando
+import uuid  # Para gerar um identificador único para cada usuário
 import streamlit as st  # Framework Streamlit para criar a interface web
 from dotenv import load_dotenv  # Biblioteca para carregar variáveis de ambiente de um arquivo .env
 
-# Importamos a função search_news do nosso módulo personalizado
-# Esta função será responsável por buscar as notícias na internet
-from utils.searchnews import search_news
+# Importamos a função prewarm do nosso módulo de busca
+# As buscas em si são feitas pelo gerenciador de tarefas (utils.jobs), que chama search_news
+from utils.searchnews import prewarm
+from utils.cache import get_cache  # Para exibir os contadores do cache
+
+# Importamos o gerenciador que executa as buscas em segundo plano
+from utils.jobs import ACTIVE_STATES, CANCELLED, DONE, QUEUED, JobRejected, get_job_manager
+
+# Cliente da API de newsletters (api_app.py), usado quando NEWS_API_URL está definida
+from utils.api_client import get_api_client
+
+# Medições de desempenho: endpoint do Prometheus e painel do administrador
+from utils.metrics import percentiles, recent_runs, start_metrics_server
 
 # Carregamos as variáveis de ambiente do arquivo .env
 # Isso é útil para armazenar informações sensíveis como chaves de API
@@ -23,6 +35,20 @@ load_dotenv()
 # Se ela não existir, usamos "YourNews App" como valor padrão
 app_name = os.getenv("APP_NAME", "YourNews App")
 
+# Intervalo, em segundos, entre as consultas ao andamento de uma busca
+POLL_SECONDS = float(os.getenv("NEWS_POLL_SECONDS", "2"))
+
+# Mostra o painel com as medições das últimas buscas (1 = sim)
+ADMIN_PANEL = os.getenv("NEWS_ADMIN_PANEL", "0") == "1"
+
+# Com NEWS_API_URL definida, esta página é só uma interface: as buscas rodam na API
+api = get_api_client()
+
+# Inicia o endpoint /metrics do Prometheus, se NEWS_METRICS_PORT estiver definida
+# (com a API, as métricas das buscas ficam no /metrics dela)
+if api is None:
+    start_metrics_server()
+
 # Configuramos a página da aplicação Streamlit
 # Esta deve ser a primeira função Streamlit a ser chamada no script
 st.set_page_config(
@@ -51,6 +77,67 @@ st.title("Your News")
 # A proporção [1, 2] significa que a coluna da direita será duas vezes mais larga que a da esquerda
 left_col, right_col = st.columns([1, 2])
 
+# Cada sessão recebe um identificador de usuário, usado para limitar quantas
+# buscas simultâneas uma mesma pessoa pode fazer. Ele e o identificador da busca
+# ficam também na URL (query params), assim recarregar a página não perde a busca.
+if "user_id" not in st.session_state:
+    st.session_state.user_id = st.query_params.get("user") or uuid.uuid4().hex
+    st.query_params["user"] = st.session_state.user_id
+if "job_id" not in st.session_state:
+    st.session_state.job_id = st.query_params.get("job")
+
+# O gerenciador executa as buscas em segundo plano, sem bloquear a página
+# (o cliente da API tem os mesmos métodos, então o resto da página não muda)
+jobs = api or get_job_manager()
+
+
+# Nomes das etapas da equipe, na ordem em que são executadas
+STAGE_LABELS = {
+    "research": "🔎 Researching news",
+    "curation": "📈 Curating and analysing",
+    "editing": "📝 Writing the newsletter",
+}
+
+
+# Um "fragmento" é um trecho da página que o Streamlit reexecuta sozinho a cada
+# POLL_SECONDS segundos, sem recarregar o resto. Usamos isso para acompanhar
+# o andamento da busca enquanto ela roda em segundo plano.
+@st.fragment(run_every=POLL_SECONDS)
+def show_job_progress(job_id):
+    job = jobs.status(job_id)
+    if job is None or job["status"] not in ACTIVE_STATES:
+        # A busca terminou: reexecutamos a página inteira para mostrar o resultado
+        st.rerun()
+    if job["status"] == QUEUED:
+        st.info(f"Your search about **{job['subject']}** is waiting in line...")
+        return
+    
+    now = time.time()
+    stages = {stage["stage"]: stage for stage in jobs.stages(job_id)}
+    
+    # Indicador da etapa atual, com o tempo total e o tempo na etapa
+    current = next((name for name in reversed(list(STAGE_LABELS)) if name in stages), None)
+    if current is None:
+        st.info(f"Searching for news about **{job['subject']}**... ({int(now - job['started_at'])}s)")
+        return
+    position = list(STAGE_LABELS).index(current) + 1
+    st.progress(
+        (position - 1) / len(STAGE_LABELS),
+        text=f"Step {position}/{len(STAGE_LABELS)}: {STAGE_LABELS[current]} · "
+             f"{int(now - stages[current]['started_at'])}s in this step · "
+             f"{int(now - job['started_at'])}s total",
+    )
+    
+    # Mostramos o que cada etapa já produziu: primeiro os resultados da pesquisa,
+    # depois as análises e, por fim, a newsletter enquanto é escrita
+    for name in ("research", "curation"):
+        if name in stages and stages[name]["content"]:
+            with st.expander(STAGE_LABELS[name], expanded=(name == current)):
+                st.markdown(stages[name]["content"])
+    if "editing" in stages and stages["editing"]["content"]:
+        st.markdown(stages["editing"]["content"])
+
+
 # Começamos a definir o conteúdo da coluna da esquerda
 with left_col:
     # Criamos um campo de entrada de texto para o usuário digitar o assunto da busca
@@ -62,23 +149,42 @@ with left_col:
     # Quando clicado, search_button será True, caso contrário será False
     search_button = st.button("Search for News")
     
-    # Usamos o session_state do Streamlit para armazenar os resultados da busca
-    # O session_state permite manter dados entre as execuções do script
-    # (O Streamlit reexecuta todo o script a cada interação do usuário)
-    if "news_results" not in st.session_state:
-        st.session_state.news_results = ""  # Inicializa com uma string vazia se não existir
+    # Caixa de seleção para ignorar o cache e forçar uma nova busca
+    # Útil quando o usuário quer notícias mais recentes que as já armazenadas
+    refresh = st.checkbox("Ignore cached results (refresh)", value=False)
     
     # Verificamos se o botão foi clicado E se há um assunto digitado
     if search_button and subject:
-        # Mostramos um indicador de carregamento (spinner) enquanto a busca é realizada
-        with st.spinner(f"Searching for news about {subject}..."):
-            # Chamamos a função search_news e armazenamos o resultado no session_state
-            st.session_state.news_results = search_news(subject)
+        try:
+            # Enviamos a busca para execução em segundo plano e guardamos o
+            # identificador da tarefa no session_state e na URL
+            st.session_state.job_id = jobs.submit(st.session_state.user_id, subject, refresh=refresh)
+            st.query_params["job"] = st.session_state.job_id
+        except JobRejected as e:
+            # Fila cheia ou limite de buscas do usuário atingido
+            st.warning(str(e))
+    
+    # Consultamos o estado da busca atual (se houver)
+    job = jobs.status(st.session_state.job_id) if st.session_state.job_id else None
+    
+    # Enquanto a busca está ativa, oferecemos a opção de cancelá-la
+    if job and job["status"] in ACTIVE_STATES:
+        if st.button("Cancel search"):
+            if jobs.cancel(job["id"]):
+                st.rerun()
+            st.warning("This search has already finished.")
+    
+    # Mostramos os contadores do cache em letras pequenas
+    cache_stats = api.cache_stats() if api else get_cache().stats()
+    st.caption(
+        f"Cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits / "
+        f"{cache_stats['misses']} misses · {cache_stats['disk_entries']} stored"
+    )
 
 # Agora definimos o conteúdo da coluna da direita
 with right_col:
-    # Verificamos se já temos resultados de busca armazenados
-    if not st.session_state.news_results:
+    # Verificamos se já temos uma busca para mostrar
+    if job is None:
         # Se não há resultados, mostramos instruções para o usuário
         # A função st.info cria uma caixa de informação com fundo azul
         st.info("### Instructions\n\nEnter a subject in the text box on the left and click 'Search for News' to see the latest news about your topic.\n\nThe results will appear here.")
@@ -92,12 +198,68 @@ with right_col:
         st.markdown("### Results will appear here")
         st.markdown("---")  # Linha horizontal
         st.markdown("*Waiting for your search query...*")  # Texto em itálico
-    else:
+    elif job["status"] in ACTIVE_STATES:
+        # A busca ainda está rodando: acompanhamos o andamento
+        show_job_progress(job["id"])
+    elif job["status"] == DONE:
+        # Se a newsletter veio de um assunto parecido (cache semântico), avisamos
+        # e oferecemos uma busca só para o assunto digitado
+        similar = next((stage["content"] for stage in jobs.stages(job["id"]) if stage["stage"] == "semantic"), None)
+        if similar:
+            st.info(f"Showing the recent newsletter for **{similar}**, a subject similar to **{job['subject']}**.")
+            if st.button("This is not what I meant"):
+                try:
+                    st.session_state.job_id = jobs.retry_exact(st.session_state.user_id, job["id"])
+                    st.query_params["job"] = st.session_state.job_id
+                    st.rerun()
+                except JobRejected as e:
+                    st.warning(str(e))
+        
         # Se há resultados, exibimos o conteúdo formatado como markdown
         # Os resultados já estão formatados como markdown pela função search_news
-        st.markdown(st.session_state.news_results)
+        st.markdown(job["result"])
+    elif job["status"] == CANCELLED:
+        st.info(f"The search about **{job['subject']}** was cancelled.")
+    else:
+        st.error(f"The search about **{job['subject']}** failed: {job['error']}")
+
+# Painel do administrador: onde o tempo e o dinheiro de cada busca foram gastos
+if ADMIN_PANEL:
+    with st.expander("📊 Performance of recent searches"):
+        runs = api.recent_runs(50) if api else recent_runs(50)
+        if not runs:
+            st.caption("No searches recorded yet.")
+        else:
+            # Percentis de duração de cada etapa e da busca inteira
+            durations = {name: [run["stages"][name] for run in runs if name in run.get("stages", {})]
+                         for name in STAGE_LABELS}
+            durations["total"] = [run["duration_s"] for run in runs if run.get("cache") != "hit"]
+            st.table([
+                {"stage": name, "runs": len(values),
+                 **{f"p{point}": f"{value:.1f}s" for point, value in percentiles(values).items()}}
+                for name, values in durations.items() if values
+            ])
+            # Uma linha por busca, da mais recente para a mais antiga
+            st.dataframe([
+                {
+                    "time": time.strftime("%H:%M:%S", time.localtime(run["started_at"])),
+                    "subject": run["subject"],
+                    "outcome": run["outcome"],
+                    "cache": run.get("cache"),
+                    "duration (s)": run["duration_s"],
+                    "tokens": run.get("tokens", {}).get("prompt", 0) + run.get("tokens", {}).get("completion", 0),
+                    "cost (US$)": run.get("tokens", {}).get("cost_usd", 0),
+                }
+                for run in runs
+            ], use_container_width=True)
 
 # Adicionamos um rodapé à página, fora das colunas
 # Isso aparecerá na parte inferior da página
 st.markdown("---")  # Linha horizontal para separar o conteúdo do rodapé
 st.markdown(" 2025 YourNews App | Created with Streamlit")  # Texto de copyright
+
+# Depois que a página já foi exibida, carregamos a equipe de agentes em segundo plano
+# Assim a página abre rápido e a primeira busca não espera o carregamento do CrewAI
+if api is None and "prewarmed" not in st.session_state:
+    st.session_state.prewarmed = True
+    prewarm()
@@ -0,0 +1,53 @@
+"""
+Testes do acervo local de artigos (utils/wnews/article_store.py).
+
+Para rodar: python -m pytest -q tests
+"""
+
+import time
+from datetime import datetime
+
+from utils.wnews.article_store import ArticleStore, published_timestamp
+
+
+def _article(number, **fields):
+    return {"url": f"https://example.com/news/{number}", "title": f"Economia brasileira {number}",
+            "snippet": "Inflação e juros no Brasil", **fields}
+
+
+def test_published_timestamp_reads_relative_and_absolute_dates():
+    now = 1_800_000_000.0
+    assert published_timestamp("3 days ago", now) == now - 3 * 86400
+    assert published_timestamp("há 2 horas", now) == now - 2 * 3600
+    assert published_timestamp("2026-01-05", now) == datetime(2026, 1, 5).timestamp()
+    assert published_timestamp("Jan 5, 2026", now) == datetime(2026, 1, 5).timestamp()
+    assert published_timestamp("5 de fev. de 2026", now) == datetime(2026, 2, 5).timestamp()
+    assert published_timestamp("", now) is None
+    assert published_timestamp("ontem", now) is None
+
+
+def test_re_adding_an_article_keeps_its_first_indexing_time(tmp_path, monkeypatch):
+    store = ArticleStore(str(tmp_path / "articles.sqlite3"), retention_days=14)
+    first = time.time() - 20 * 86400
+    monkeypatch.setattr(time, "time", lambda: first)
+    store.add([_article(1)])
+    monkeypatch.undo()
+
+    # Lido de novo hoje: continua com a data da primeira indexação e sai na retenção
+    store.add([_article(1, content="Texto completo")])
+    assert store.search("economia", max_age_seconds=7 * 86400) == []
+    assert store.compact() == 1
+    assert store.stats()["articles"] == 0
+
+
+def test_search_skips_articles_published_before_the_window(tmp_path):
+    store = ArticleStore(str(tmp_path / "articles.sqlite3"))
+    store.add([
+        _article(1, date="2 days ago"),
+        _article(2, date="30 days ago"),
+        _article(3),  # sem data: vale a data da indexação
+    ])
+    found = store.search("economia", max_age_seconds=7 * 86400)
+    assert sorted(article["url"] for article in found) == [
+        "https://example.com/news/1", "https://example.com/news/3",
+    ]
@@ -0,0 +1,75 @@
+"""
+Testes do armazenamento dos resultados de cada etapa (utils/artifacts.py).
+
+Para rodar: python -m pytest -q tests
+"""
+
+import os
+import time
+
+from utils.artifacts import ArtifactStore
+
+
+def _blobs(directory):
+    return sorted(
+        name for _, _, names in os.walk(os.path.join(directory, "blobs")) for name in names
+    )
+
+
+def test_memory_store_keeps_only_the_recent_runs(tmp_path):
+    store = ArtifactStore(str(tmp_path), persist=False, memory_runs=2)
+    store.begin("run-1", {"subject": "AI"})
+    store.put("run-1", "research", "news")
+    store.put("run-2", "research", "other news")
+    store.put("run-3", "research", "more news")
+
+    assert store.load("run-1") is None
+    assert store.get("run-3", "research") == "more news"
+    # Nada é gravado em disco
+    assert not os.path.exists(tmp_path / "runs")
+
+
+def test_persisted_run_is_loaded_by_another_process(tmp_path):
+    store = ArtifactStore(str(tmp_path), persist=True)
+    store.begin("run-1", {"subject": "AI"})
+    store.put("run-1", "research", "news")
+    store.put("run-1", "analysis", "analysis")
+    assert store.flush(5)
+
+    # Outra instância, sem a camada de memória, lê do disco
+    run = ArtifactStore(str(tmp_path), persist=True).load("run-1")
+    assert run["meta"]["subject"] == "AI"
+    assert run["artifacts"] == {"research": "news", "analysis": "analysis"}
+
+
+def test_same_content_is_written_once(tmp_path):
+    store = ArtifactStore(str(tmp_path), persist=True)
+    store.put("run-1", "research", "same news")
+    store.put("run-2", "research", "same news")
+    store.put("run-2", "analysis", "analysis")
+    assert store.flush(5)
+
+    assert len(_blobs(str(tmp_path))) == 2
+    assert ArtifactStore(str(tmp_path), persist=True).get("run-1", "research") == "same news"
+
+
+def test_purge_removes_old_runs_and_their_unused_content(tmp_path):
+    store = ArtifactStore(str(tmp_path), persist=True, retention_days=1)
+    store.put("old", "research", "old news")
+    store.put("old", "analysis", "shared analysis")
+    store.put("new", "analysis", "shared analysis")
+    assert store.flush(5)
+
+    # A execução antiga e os seus conteúdos foram gravados há dois dias
+    two_days_ago = time.time() - 2 * 86400
+    for path in [tmp_path / "runs" / "old.json"] + [
+        os.path.join(root, name) for root, _, names in os.walk(tmp_path / "blobs") for name in names
+    ]:
+        os.utime(path, (two_days_ago, two_days_ago))
+
+    assert store.purge() == 1
+    reader = ArtifactStore(str(tmp_path), persist=True)
+    assert reader.load("old") is None
+    # O conteúdo usado pela execução que ficou não é apagado
+    assert reader.get("new", "analysis") == "shared analysis"
+    assert len(_blobs(str(tmp_path))) == 1
@@ -0,0 +1,40 @@
+"""
+Testes do manifesto das execuções em lote (utils/batch.py).
+
+Para rodar: python -m pytest -q tests
+"""
+
+from utils.batch import DONE, FAILED, PENDING, BatchRun, read_topics
+
+
+def test_read_topics_skips_comments_blank_lines_and_repeated_topics(tmp_path):
+    path = tmp_path / "topics.txt"
+    path.write_text("# Assuntos\nInteligência Artificial\n\nspace\ninteligencia  artificial\n", encoding="utf-8")
+    assert read_topics(str(path)) == ["Inteligência Artificial", "space"]
+
+
+def test_new_run_has_every_topic_pending(tmp_path):
+    run = BatchRun.create(["Inteligência Artificial", "space"], {"refresh": False}, str(tmp_path))
+
+    assert run.pending() == [0, 1]
+    assert [entry["file"] for entry in run.manifest["topics"]] == ["001-inteligencia-artificial.md", "002-space.md"]
+    assert all(entry["status"] == PENDING for entry in run.manifest["topics"])
+    # Duas execuções no mesmo segundo não usam o mesmo diretório
+    assert BatchRun.create(["space"], {}, str(tmp_path)).directory != run.directory
+
+
+def test_resumed_run_only_has_the_topics_that_did_not_finish(tmp_path):
+    run = BatchRun.create(["AI", "space", "music"], {"refresh": True, "max_age": 0}, str(tmp_path))
+    run.record(0, {"status": DONE, "error": None, "duration_s": 1.5})
+    run.record(2, {"status": FAILED, "error": "Missing API keys: OPENAI_API_KEY"})
+
+    # O processo foi interrompido: a execução é aberta de novo a partir do diretório
+    resumed = BatchRun.load(run.directory)
+    assert resumed.manifest["options"] == {"refresh": True, "max_age": 0}
+    assert resumed.pending() == [1, 2]
+    assert resumed.manifest["topics"][0]["duration_s"] == 1.5
+    assert resumed.manifest["topics"][2]["error"] == "Missing API keys: OPENAI_API_KEY"
+
+    resumed.record(1, {"status": DONE, "error": None})
+    resumed.record(2, {"status": DONE, "error": None})
+    assert BatchRun.load(run.directory).pending() == []
@@ -0,0 +1,96 @@
+"""
+Testes do cache de resultados (utils/cache.py).
+
+Para rodar: python -m pytest -q tests
+"""
+
+import pytest
+
+import utils.cache as cache_module
+from utils.cache import ResultCache, make_key
+
+
+class _Clock:
+    """Relógio controlado pelo teste, no lugar de time.time"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+def test_make_key_ignores_accents_case_and_spaces():
+    assert make_key("Inteligência  Artificial") == make_key("inteligencia artificial")
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60)
+    cache.set("ai", "newsletter")
+
+    clock.now += 59
+    assert cache.get("ai") == "newsletter"
+    # Só aceita resultados criados depois de newer_than
+    assert cache.get("ai", newer_than=clock.now - 30) is None
+
+    clock.now += 2
+    assert cache.get("ai") is None
+    # Um novo processo (sem a camada de memória) também não vê a entrada vencida
+    assert ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60).get("ai") is None
+
+
+def test_disk_hit_is_promoted_to_memory(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    ResultCache(path, ttl_seconds=60).set("ai", "newsletter")
+
+    cache = ResultCache(path, ttl_seconds=60)
+    assert cache.get("ai") == "newsletter"
+    assert cache.get("ai") == "newsletter"
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_memory_layer_keeps_the_most_recently_used_entries(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, memory_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert list(cache._memory) == ["a", "c"]
+    # A entrada descartada da memória continua no disco
+    assert cache.get("b") == "2"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_eviction_removes_the_least_recently_used_entries(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=3600, disk_max_bytes=25)
+    for key in ("a", "b"):
+        cache.set(key, "x" * 10)
+        clock.now += 1
+    # Leitura de "a" no disco: "b" passa a ser a menos usada
+    cache._memory.clear()
+    assert cache.get("a") == "x" * 10
+    clock.now += 1
+
+    cache.set("c", "x" * 10)
+
+    remaining = [row[0] for row in cache._connection().execute("SELECT key FROM results ORDER BY key")]
+    assert remaining == ["a", "c"]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["disk_bytes"] <= 25
+
+
+def test_invalidate_removes_both_layers(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60)
+    cache.set("ai", "newsletter")
+    cache.invalidate("ai")
+    assert cache.get("ai") is None
+    assert cache.stats()["disk_entries"] == 0
@@ -0,0 +1,72 @@
+"""
+Testes do agrupamento de notícias quase duplicadas (utils/wnews/dedup.py).
+
+Para rodar: python -m pytest -q tests
+"""
+
+from utils.wnews.dedup import cluster, deduplicate_items, deduplicate_text, tokenize
+from utils.wnews.models import NewsItem
+
+# A mesma notícia de agência, republicada com pequenas mudanças
+_AGENCY = "Central bank raises interest rate to 11 percent to fight persistent inflation in services"
+_REPUBLISHED = "Central bank raises interest rate to 11 percent to fight persistent inflation in services and food"
+_EXTENDED = _REPUBLISHED + " prices, economists say"
+_OTHER = "National football team wins the continental championship final after penalties"
+
+
+def test_tokenize_ignores_accents_case_links_and_stopwords():
+    assert tokenize("A Inflação https://example.com caiu") == ["inflacao", "caiu", "inflacao_caiu"]
+
+
+def test_cluster_groups_near_duplicates_in_order():
+    assert cluster([_AGENCY, _OTHER, _REPUBLISHED]) == [[0, 2], [1]]
+
+
+def test_cluster_joins_chains_of_similar_texts():
+    # a ~ b e b ~ c, mas a e c não são parecidos o bastante: os três ficam juntos
+    first = "alpha beta gamma delta epsilon zeta"
+    second = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda"
+    third = "eta theta iota kappa lambda"
+    assert cluster([first, third], threshold=0.5) == [[0], [1]]
+    assert cluster([first, second, third], threshold=0.5) == [[0, 1, 2]]
+
+
+def test_cluster_of_texts_without_words():
+    assert cluster(["", "..."]) == [[0], [1]]
+    assert cluster([]) == []
+
+
+def _item(title, url, relevance, also_at=()):
+    return NewsItem(title=title, url=url, summary=title, relevance=relevance, also_at=list(also_at))
+
+
+def test_deduplicate_items_keeps_the_most_complete_version():
+    items = [
+        _item(_AGENCY, "https://a.example/1", 9, also_at=["https://mirror.example/1"]),
+        _item(_OTHER, "https://b.example/2", 5),
+        _item(_EXTENDED, "https://c.example/3", 6),
+    ]
+    kept, removed = deduplicate_items(items)
+
+    assert removed == 1
+    assert [item.url for item in kept] == ["https://c.example/3", "https://b.example/2"]
+    # O representante fica com a maior relevância e os links de todo o grupo
+    assert kept[0].relevance == 9
+    assert kept[0].also_at == ["https://a.example/1", "https://mirror.example/1"]
+    # As notícias originais não são alteradas
+    assert items[2].also_at == []
+
+
+def test_deduplicate_text_adds_the_links_of_the_removed_copies():
+    text = (
+        "Latest news:\n\n"
+        f"1. {_AGENCY} https://a.example/1\n"
+        f"2. {_OTHER} https://b.example/2\n"
+        f"3. {_EXTENDED} https://c.example/3"
+    )
+    deduplicated, removed = deduplicate_text(text)
+
+    assert removed == 1
+    assert deduplicated.startswith("Latest news:")
+    assert "Também publicado em: https://a.example/1" in deduplicated
+    assert _AGENCY + " https" not in deduplicated
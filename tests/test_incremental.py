@@ -0,0 +1,70 @@
+"""
+Testes da atualização incremental (utils/wnews/incremental.py).
+
+Para rodar: python -m pytest -q tests
+"""
+
+import time
+
+from utils.wnews.incremental import TopicStateStore, pair_analyses
+from utils.wnews.models import NewsAnalysis, NewsItem
+
+
+def _item(number):
+    return NewsItem(title=f"News {number}", url=f"https://www.example.com/news/{number}/?utm_source=x",
+                    source="Example", summary=f"Summary {number}")
+
+
+def _analysis(number, url=True):
+    return NewsAnalysis(title=f"News {number}", url=f"https://example.com/news/{number}" if url else "",
+                        analysis=f"Analysis {number}")
+
+
+def test_pair_analyses_uses_the_position_when_every_item_has_an_analysis():
+    items = [_item(1), _item(2)]
+    paired = pair_analyses(items, [_analysis(1, url=False), _analysis(2, url=False)])
+    assert [analysis.analysis for _, analysis in paired.values()] == ["Analysis 1", "Analysis 2"]
+
+
+def test_pair_analyses_leaves_out_the_items_of_an_unstructured_batch():
+    # Lote 1 (notícias 1 e 2) fora do formato: uma única análise no lugar da primeira
+    items = [_item(1), _item(2), _item(3), _item(4)]
+    analyses = [
+        NewsAnalysis(title="Free text", analysis="Unstructured answer"),
+        _analysis(3),
+        _analysis(4, url=False),
+    ]
+    paired = pair_analyses(items, analyses)
+
+    assert sorted(paired) == ["https://example.com/news/3", "https://example.com/news/4"]
+    assert paired["https://example.com/news/3"][1].analysis == "Analysis 3"
+    # Sem link, a análise é associada pelo título
+    assert paired["https://example.com/news/4"][1].analysis == "Analysis 4"
+
+
+def test_topic_state_round_trip(tmp_path):
+    store = TopicStateStore(str(tmp_path / "topics.sqlite3"))
+    now = time.time()
+    entries = {
+        url_key: {"first_seen": now - number, "item": item, "analysis": analysis}
+        for number, (url_key, (item, analysis)) in enumerate(
+            pair_analyses([_item(1), _item(2)], [_analysis(1), _analysis(2)]).items()
+        )
+    }
+    store.save("Inteligência  Artificial", entries, "# Newsletter", seen={"https://old.example": now - 30 * 86400})
+
+    state = store.load("inteligencia artificial")
+    assert state.newsletter == "# Newsletter"
+    # Candidatos vistos antes da janela são descartados
+    assert state.seen == {}
+    assert state.is_unchanged("https://example.com/news/1", _item(1))
+    changed = _item(1).model_copy(update={"summary": "New summary"})
+    assert not state.is_unchanged("https://example.com/news/1", changed)
+    # As mais recentes primeiro
+    assert [entry["item"].title for _, entry in state.retained()] == ["News 1", "News 2"]
+    assert [entry["item"].title for _, entry in state.retained(exclude={"https://example.com/news/1"})] == ["News 2"]
+    assert "News 2 (https://www.example.com/news/2/?utm_source=x)" in state.known_news()
+
+
+def test_unknown_topic_has_no_state(tmp_path):
+    assert TopicStateStore(str(tmp_path / "topics.sqlite3")).load("space") is None
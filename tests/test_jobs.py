@@ -0,0 +1,108 @@
+"""
+Testes do gerenciador de tarefas (utils/jobs.py).
+
+Para rodar: python -m pytest -q tests
+"""
+
+import threading
+import time
+
+import pytest
+
+import utils.semantic_cache as semantic_cache
+from utils.jobs import DONE, JobManager, JobRejected, JobStore
+from utils.semantic_cache import SemanticTopicCache
+
+
+def _wait(manager, job_id, timeout=5):
+    """Espera a tarefa terminar e retorna o estado final"""
+    ends_at = time.monotonic() + timeout
+    while time.monotonic() < ends_at:
+        job = manager.status(job_id)
+        if job["status"] == DONE:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish: {manager.status(job_id)}")
+
+
+@pytest.fixture
+def semantic(tmp_path, monkeypatch):
+    # Cache semântico em um banco temporário, com vetores locais (sem OpenAI)
+    cache = SemanticTopicCache(db_path=str(tmp_path / "semantic.sqlite3"), embeddings="local")
+    monkeypatch.setattr(semantic_cache, "_cache", cache)
+    return cache
+
+
+def test_semantic_hit_is_recorded_and_can_be_retried_exactly(tmp_path, semantic):
+    calls = []
+
+    def runner(subject, refresh=False, exact=False, progress=None):
+        # Como _search_similar: só o evento "done", sem "start" antes
+        calls.append({"subject": subject, "exact": exact})
+        if not exact:
+            progress("done", "semantic", "artificial intelligence")
+            return "newsletter about artificial intelligence"
+        return f"newsletter about {subject}"
+
+    manager = JobManager(runner, store=JobStore(str(tmp_path / "jobs.sqlite3")))
+    job_id = manager.submit("user", "AI")
+    _wait(manager, job_id)
+
+    stages = manager.stages(job_id)
+    assert [stage["stage"] for stage in stages] == ["semantic"]
+    assert stages[0]["content"] == "artificial intelligence"
+    assert stages[0]["finished_at"] is not None
+
+    retry_id = manager.retry_exact("user", job_id)
+    assert retry_id not in (None, job_id)
+    assert _wait(manager, retry_id)["result"] == "newsletter about AI"
+    assert calls[-1] == {"subject": "AI", "exact": True}
+
+    # O assunto reaproveitado não volta a ser oferecido para "AI"
+    rejected = semantic._connection().execute(
+        "SELECT rejected FROM rejections WHERE subject = ?", ("ai",)
+    ).fetchall()
+    assert [row[0] for row in rejected] == ["artificial intelligence"]
+
+
+def test_save_stage_keeps_the_start_time_of_a_started_stage(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    store.start_stage("job", "research")
+    started_at = store.stages("job")[0]["started_at"]
+
+    store.save_stage("job", "research", "partial")
+    store.save_stage("job", "research", "final", finished=True)
+    store.save_stage("job", "research", "late update")
+
+    stage = store.stages("job")[0]
+    assert stage["started_at"] == started_at
+    assert stage["content"] == "late update"
+    assert stage["finished_at"] is not None
+
+
+def test_limits_count_the_jobs_of_every_manager_sharing_the_store(tmp_path):
+    release = threading.Event()
+
+    def runner(subject, refresh=False, exact=False, progress=None):
+        release.wait(5)
+        return subject
+
+    # Dois gerenciadores no mesmo arquivo, como dois workers da API
+    path = str(tmp_path / "jobs.sqlite3")
+    first = JobManager(runner, store=JobStore(path), max_queue=3, max_per_user=1)
+    second = JobManager(runner, store=JobStore(path), max_queue=3, max_per_user=1)
+    try:
+        jobs = [first.submit("alice", "AI")]
+        with pytest.raises(JobRejected):
+            second.submit("alice", "space")
+
+        jobs += [second.submit("bob", "space"), first.submit("carol", "music")]
+        with pytest.raises(JobRejected):
+            second.submit("dave", "sports")
+    finally:
+        release.set()
+    for job_id in jobs:
+        _wait(first, job_id)
+
+    # Com as buscas terminadas, as vagas voltam
+    _wait(second, second.submit("alice", "space"))
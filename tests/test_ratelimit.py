@@ -0,0 +1,102 @@
+"""
+Testes do controle de ritmo das chamadas aos provedores (utils/ratelimit.py).
+
+Para rodar: python -m pytest -q tests
+"""
+
+import pytest
+
+from utils.ratelimit import BucketStore, ProviderLimiter, parse_rates
+
+
+class _Response:
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.headers = headers
+
+
+class _ProviderError(Exception):
+    """Erro com resposta HTTP, como os de httpx e openai"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Response(status_code, headers or {})
+
+
+def test_bucket_allows_the_burst_then_asks_to_wait(tmp_path):
+    store = BucketStore(str(tmp_path / "ratelimit.sqlite3"))
+    assert store.take("openai:key", rate=2, burst=2) == 0
+    assert store.take("openai:key", rate=2, burst=2) == 0
+    # Sem fichas: a próxima chega em cerca de meio segundo
+    assert store.take("openai:key", rate=2, burst=2) == pytest.approx(0.5, abs=0.05)
+    # Cada chave tem o seu balde
+    assert store.take("openai:other", rate=2, burst=2) == 0
+
+
+def test_bucket_is_shared_by_every_process(tmp_path):
+    # Duas instâncias no mesmo arquivo, como dois processos
+    path = str(tmp_path / "ratelimit.sqlite3")
+    first, second = BucketStore(path), BucketStore(path)
+    assert first.take("serper:key", rate=1, burst=1) == 0
+    assert second.take("serper:key", rate=1, burst=1) > 0
+
+
+def test_blocked_bucket_waits_for_retry_after(tmp_path):
+    store = BucketStore(str(tmp_path / "ratelimit.sqlite3"))
+    store.block("openai:key", 30)
+    assert store.take("openai:key", rate=100, burst=100) == pytest.approx(30, abs=1)
+    # Um bloqueio menor não encurta o que já existe
+    store.block("openai:key", 5)
+    assert store.take("openai:key", rate=100, burst=100) > 20
+
+
+def test_scope_bucket_only_slows_down_its_own_calls(tmp_path):
+    store = BucketStore(str(tmp_path / "ratelimit.sqlite3"))
+    batch = ProviderLimiter("openai", "key", rate=10, concurrency=4, store=store, scope="batch", scope_rate=1)
+    user = ProviderLimiter("openai", "key", rate=10, concurrency=4, store=store)
+
+    # O balde do lote vem antes do balde geral, que continua valendo para todos
+    assert [bucket[0] for bucket in batch.buckets] == [f"batch:{batch.key}", batch.key]
+    assert user.buckets == [(user.key, 10, 10.0)]
+
+    scope_bucket = batch.buckets[0]
+    assert batch._wait_time(*scope_bucket) == 0
+    assert batch._wait_time(*scope_bucket) > 0
+    # As chamadas dos usuários não esperam pelo ritmo do lote
+    assert user._wait_time(*user.buckets[0]) == 0
+
+
+def test_throttled_call_blocks_the_key_and_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.ratelimit.time.sleep", lambda seconds: None)
+    store = BucketStore(str(tmp_path / "ratelimit.sqlite3"))
+    limiter = ProviderLimiter("openai", "key", rate=0, concurrency=4, store=store)
+    answers = [_ProviderError(429, {"retry-after": "20"}), "ok"]
+
+    def request():
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    assert limiter.call(request) == "ok"
+    # O 429 vale para a chave inteira, em todos os processos
+    assert store.take(limiter.key, rate=100, burst=100) == pytest.approx(20, abs=1)
+    # E reduz as chamadas simultâneas deste processo
+    assert limiter.concurrency.limit < 4
+
+
+def test_errors_that_are_not_overloads_are_not_retried(tmp_path):
+    limiter = ProviderLimiter("openai", "key", rate=0, concurrency=4, store=BucketStore(str(tmp_path / "r.sqlite3")))
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise _ProviderError(401)
+
+    with pytest.raises(_ProviderError):
+        limiter.call(request)
+    assert len(calls) == 1
+
+
+def test_parse_rates():
+    assert parse_rates("openai=1, serper=0.5,") == {"openai": 1.0, "serper": 0.5}
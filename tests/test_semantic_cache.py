@@ -0,0 +1,43 @@
+"""
+Testes do cache semântico de assuntos (utils/semantic_cache.py).
+
+Para rodar: python -m pytest -q tests
+"""
+
+import numpy as np
+import pytest
+
+from utils.semantic_cache import SemanticTopicCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    # Vetores locais (sem OpenAI)
+    return SemanticTopicCache(db_path=str(tmp_path / "semantic.sqlite3"), embeddings="local")
+
+
+def _similarity(cache, first, second):
+    return float(np.dot(cache.embed(first)[1], cache.embed(second)[1]))
+
+
+def test_spelling_variations_reuse_the_subject(cache):
+    cache.remember("inteligência artificial")
+    match = cache.lookup("inteligencia artifical")
+    assert match is not None and match.subject == "inteligencia artificial"
+
+
+def test_subjects_with_different_years_are_not_the_same(cache):
+    # Os vetores são parecidos o bastante: só o ano os separa
+    assert _similarity(cache, "Copa do Mundo 2026", "Copa do Mundo 2022") >= cache.threshold
+    cache.remember("Copa do Mundo 2022")
+    assert cache.lookup("Copa do Mundo 2026") is None
+    assert cache.lookup("Copa do  Mundo 2022 ") is None  # o mesmo assunto fica com o cache normal
+
+    cache.remember("Copa do Mundo 2026")
+    assert cache.lookup("copa do mundo de 2026").subject == "copa do mundo 2026"
+
+
+def test_rejected_subjects_are_not_offered_again(cache):
+    cache.remember("inteligência artificial")
+    cache.reject("inteligencia artifical", "inteligência artificial")
+    assert cache.lookup("inteligencia artifical") is None
@@ -0,0 +1,175 @@
+"""
+Testes da execução única por chave (utils/singleflight.py).
+
+Para rodar: python -m pytest -q tests
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.singleflight import Abandoned, RemoteFlightError, SingleFlight
+
+
+def _wait_for(condition, timeout=5):
+    """Espera a condição ficar verdadeira (ou falha o teste)"""
+    ends_at = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= ends_at:
+            raise AssertionError("Condition not reached")
+        time.sleep(0.01)
+
+
+def _run_callers(flight, key, fn, callers):
+    """Chama flight.do em várias threads e retorna o resultado (ou erro) de cada uma"""
+    outcomes = [None] * callers
+
+    def call(index):
+        try:
+            outcomes[index] = flight.do(key, fn)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_concurrent_callers_share_one_execution(tmp_path):
+    flight = SingleFlight(str(tmp_path / "locks"))
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["newsletter"]
+
+    threads, outcomes = _run_callers(flight, "ai", fn, 4)
+    started.wait(5)
+    # Dá tempo para as outras threads chegarem à espera
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    # Todos recebem o mesmo objeto
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    assert flight._calls == {}
+
+
+def test_error_is_fanned_out_to_every_waiting_caller(tmp_path):
+    flight = SingleFlight(str(tmp_path / "locks"))
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        raise ValueError("provider down")
+
+    threads, outcomes = _run_callers(flight, "ai", fn, 4)
+    started.wait(5)
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+
+    # O erro não fica guardado: a próxima chamada executa de novo
+    assert flight.do("ai", lambda: "newsletter") == "newsletter"
+
+
+def test_error_reaches_callers_waiting_in_another_process(tmp_path):
+    # Duas instâncias no mesmo diretório de locks, como dois processos
+    leader, other = SingleFlight(str(tmp_path / "locks")), SingleFlight(str(tmp_path / "locks"))
+    started, release = threading.Event(), threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(5)
+        raise ValueError("provider down")
+
+    threads, outcomes = _run_callers(leader, "ai", fn, 1)
+    started.wait(5)
+    other_calls = []
+    other_threads, other_outcomes = _run_callers(other, "ai", lambda: other_calls.append(1), 1)
+    # O outro "processo" fica esperando o lock do arquivo
+    _wait_for(lambda: "ai" in other._calls)
+    time.sleep(0.2)
+    release.set()
+    for thread in threads + other_threads:
+        thread.join(5)
+
+    assert isinstance(outcomes[0], ValueError)
+    assert isinstance(other_outcomes[0], RemoteFlightError)
+    assert "provider down" in str(other_outcomes[0])
+    assert other_calls == []
+
+
+def test_recheck_result_is_used_after_waiting_for_another_process(tmp_path):
+    leader, other = SingleFlight(str(tmp_path / "locks")), SingleFlight(str(tmp_path / "locks"))
+    started, release = threading.Event(), threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(5)
+        return "fresh"
+
+    threads, _ = _run_callers(leader, "ai", fn, 1)
+    started.wait(5)
+    waited = []
+
+    def recheck(since):
+        waited.append(since)
+        return "from cache"
+
+    result = []
+    thread = threading.Thread(target=lambda: result.append(other.do("ai", lambda: "again", recheck=recheck)))
+    thread.start()
+    _wait_for(lambda: "ai" in other._calls)
+    time.sleep(0.2)
+    release.set()
+    for waiting in threads + [thread]:
+        waiting.join(5)
+
+    assert result == ["from cache"]
+    assert len(waited) == 1
+
+
+def test_abandoned_leader_hands_over_to_a_waiting_caller(tmp_path):
+    flight = SingleFlight(str(tmp_path / "locks"))
+    started, release = threading.Event(), threading.Event()
+
+    def cancelled():
+        started.set()
+        release.wait(5)
+        raise Abandoned()
+
+    leader = []
+
+    def lead():
+        with pytest.raises(Abandoned):
+            flight.do("ai", cancelled)
+        leader.append("abandoned")
+
+    lead_thread = threading.Thread(target=lead)
+    lead_thread.start()
+    started.wait(5)
+    threads, outcomes = _run_callers(flight, "ai", lambda: "newsletter", 2)
+    time.sleep(0.2)
+    release.set()
+    for thread in [lead_thread] + threads:
+        thread.join(5)
+
+    # Quem esperava não recebe a desistência: um deles executa a busca
+    assert leader == ["abandoned"]
+    assert outcomes == ["newsletter", "newsletter"]
@@ -0,0 +1,120 @@
+"""
+YourNews - Cliente da API de Newsletters
+
+Quando NEWS_API_URL está definida, a interface do Streamlit não executa as
+buscas: ela as envia para a API (api_app.py) e apenas acompanha o andamento.
+Assim a interface e a geração das newsletters podem ter quantidades diferentes
+de processos e máquinas.
+
+O ApiJobClient tem os mesmos métodos do JobManager (utils/jobs.py) que a
+interface usa, então a página funciona igual nos dois modos.
+"""
+
+# Importações de bibliotecas padrão do Python
+import os         # Para ler variáveis de ambiente
+import threading  # Para criar o cliente uma única vez por processo
+
+# Cliente HTTP
+import httpx
+
+# Mesma exceção do gerenciador local, para a interface tratar os dois do mesmo jeito
+from utils.jobs import JobRejected
+
+# ===== CONFIGURAÇÕES =====
+# Endereço da API (vazio = a interface executa as buscas no próprio processo)
+API_URL = os.getenv("NEWS_API_URL", "")
+# Chave enviada no cabeçalho X-API-Key (a mesma NEWS_API_KEY da API)
+API_KEY = os.getenv("NEWS_API_KEY", "")
+# Tempo máximo de cada requisição à API, em segundos
+API_TIMEOUT = float(os.getenv("NEWS_API_TIMEOUT", "10"))
+
+
+class ApiJobClient:
+    """Envia e acompanha buscas pela API, com a mesma interface do JobManager"""
+
+    def __init__(self, base_url=API_URL, api_key=API_KEY, timeout=API_TIMEOUT):
+        headers = {"X-API-Key": api_key} if api_key else {}
+        self._client = httpx.Client(base_url=base_url.rstrip("/"), headers=headers, timeout=timeout)
+
+    def _submit(self, method, path, body):
+        try:
+            response = self._client.request(method, path, json=body)
+        except httpx.HTTPError:
+            raise JobRejected("The news service is unavailable right now. Please try again in a few minutes.")
+        if response.status_code == 429:
+            raise JobRejected(response.json().get("detail", "The server is busy right now."))
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()["job_id"]
+
+    def submit(self, user_id, subject, refresh=False, exact=False):
+        """
+        Envia uma busca para a API.
+
+        Returns:
+            str: Identificador da tarefa criada
+
+        Raises:
+            JobRejected: Se a API recusar a busca ou estiver fora do ar
+        """
+        return self._submit("POST", "/jobs", {
+            "user_id": user_id, "subject": subject, "refresh": refresh, "exact": exact,
+        })
+
+    def status(self, job_id):
+        """Estado de uma tarefa (ou None se ela não existir)"""
+        response = self._client.get(f"/jobs/{job_id}")
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def stages(self, job_id):
+        """Conteúdo parcial de cada etapa de uma tarefa"""
+        response = self._client.get(f"/jobs/{job_id}/stages")
+        if response.status_code == 404:
+            return []
+        response.raise_for_status()
+        return response.json()
+
+    def cancel(self, job_id):
+        """Cancela uma tarefa; retorna True se ela estava ativa"""
+        return self._client.delete(f"/jobs/{job_id}").status_code == 200
+
+    def retry_exact(self, user_id, job_id):
+        """Refaz a busca só para o assunto digitado; retorna o novo identificador"""
+        return self._submit("POST", f"/jobs/{job_id}/retry-exact", {"user_id": user_id})
+
+    def cache_stats(self):
+        """Contadores do cache de resultados, vindos da API"""
+        response = self._client.get("/stats")
+        response.raise_for_status()
+        return response.json()
+
+    def recent_runs(self, limit=50):
+        """Registros de desempenho das buscas mais recentes, vindos da API"""
+        response = self._client.get("/runs", params={"limit": limit})
+        response.raise_for_status()
+        return response.json()
+
+
+# Instância única, criada na primeira utilização
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_api_client():
+    """
+    Retorna o cliente da API compartilhado por todas as sessões do processo.
+
+    Returns:
+        ApiJobClient | None: Cliente da API, ou None se NEWS_API_URL não estiver definida
+    """
+    global _client
+    if not API_URL:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = ApiJobClient()
+        return _client
@@ -0,0 +1,277 @@
+"""
+YourNews - Artefatos de Cada Execução
+
+Antes, as três tarefas gravavam os resultados em arquivos com nomes fixos
+(news_research.txt, news_analysis.txt e r2talk_newsletter.md) no diretório
+atual. Duas buscas ao mesmo tempo sobrescreviam os arquivos uma da outra, e a
+gravação acontecia no meio da busca.
+
+Aqui o resultado de cada etapa (o "artefato") fica guardado por execução, sob
+o identificador da execução (o mesmo run_id do trace de desempenho):
+
+1. Em memória, sempre: as últimas NEWS_ARTIFACT_MEMORY_RUNS execuções.
+2. Em disco, se NEWS_ARTIFACT_PERSIST=1: uma thread em segundo plano grava os
+   artefatos, então a busca não espera pelo disco. Cada conteúdo é gravado uma
+   única vez, com o nome igual ao seu hash (SHA-256): execuções que produzem o
+   mesmo texto (por exemplo, um replay que reaproveita a pesquisa) compartilham
+   o arquivo. As execuções mais antigas que NEWS_ARTIFACT_RETENTION_DAYS são
+   apagadas, junto com os conteúdos que nenhuma outra execução usa.
+
+Os artefatos guardados permitem refazer só uma parte de uma execução (veja
+replay() em utils/wnews/crew.py).
+"""
+
+# Importações de bibliotecas padrão do Python
+import atexit     # Para terminar as gravações pendentes quando o processo acaba
+import hashlib    # Para o endereço (hash) de cada conteúdo
+import json       # Para gravar a lista de artefatos de cada execução
+import os         # Para ler variáveis de ambiente e manipular arquivos
+import queue      # Fila de gravações da thread em segundo plano
+import threading  # Para a thread de gravação e para proteger a memória
+import time       # Para a retenção e para esperar as gravações
+from collections import OrderedDict  # Para manter só as execuções mais recentes (LRU)
+
+# Medições de desempenho
+from utils.metrics import count
+
+# ===== CONFIGURAÇÕES =====
+# Grava os artefatos em disco (1) ou só os mantém em memória (0)
+ARTIFACT_PERSIST = os.getenv("NEWS_ARTIFACT_PERSIST", "0") == "1"
+# Diretório dos artefatos gravados em disco
+ARTIFACT_DIR = os.getenv("NEWS_ARTIFACT_DIR", os.path.join(".cache", "yournews", "artifacts"))
+# Quantidade de execuções mantidas em memória
+ARTIFACT_MEMORY_RUNS = int(os.getenv("NEWS_ARTIFACT_MEMORY_RUNS", "32"))
+# Por quantos dias as execuções gravadas em disco são mantidas
+ARTIFACT_RETENTION_DAYS = float(os.getenv("NEWS_ARTIFACT_RETENTION_DAYS", "7"))
+
+# Intervalo entre as limpezas do disco, em segundos
+_PURGE_SECONDS = 3600
+# Conteúdos modificados há menos que isso não são apagados na limpeza, mesmo sem
+# execução que os use: outro processo pode estar gravando a lista que os usa
+_PURGE_GRACE_SECONDS = 3600
+
+
+def _digest(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _write(path, data):
+    """Grava o arquivo por inteiro ou não grava (nunca deixa um arquivo pela metade)"""
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        handle.write(data)
+    os.replace(temporary, path)
+
+
+class ArtifactStore:
+    """Guarda os resultados de cada etapa, por execução, em memória e (opcionalmente) em disco"""
+
+    def __init__(self, directory=ARTIFACT_DIR, persist=ARTIFACT_PERSIST,
+                 memory_runs=ARTIFACT_MEMORY_RUNS, retention_days=ARTIFACT_RETENTION_DAYS):
+        self.directory = directory
+        self.persist = persist
+        self.memory_runs = memory_runs
+        self.retention_seconds = retention_days * 86400
+        # Execuções recentes: run_id -> {"meta": {...}, "artifacts": {nome: conteúdo}}
+        self._runs = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        if self.persist:
+            os.makedirs(os.path.join(self.directory, "runs"), exist_ok=True)
+            os.makedirs(os.path.join(self.directory, "blobs"), exist_ok=True)
+            self._writer = threading.Thread(target=self._write_loop, name="artifact-writer", daemon=True)
+            self._writer.start()
+            # Gravações ainda na fila quando o processo termina não são perdidas
+            atexit.register(self.flush, 10)
+
+    def _run(self, run_id):
+        """Entrada da execução na memória (criada se necessário); chamar com o lock"""
+        run = self._runs.get(run_id)
+        if run is None:
+            run = self._runs[run_id] = {"meta": {}, "artifacts": {}}
+            while len(self._runs) > self.memory_runs:
+                self._runs.popitem(last=False)
+        self._runs.move_to_end(run_id)
+        return run
+
+    def _snapshot(self, run_id, run):
+        return {
+            "run_id": run_id,
+            "meta": dict(run["meta"]),
+            "artifacts": {name: _digest(content) for name, content in run["artifacts"].items()},
+        }
+
+    def begin(self, run_id, meta):
+        """
+        Registra as informações de uma execução (assunto, entradas da equipe...).
+
+        Args:
+            run_id (str): Identificador da execução
+            meta (dict): Informações da execução (precisam ser convertíveis em JSON)
+        """
+        with self._lock:
+            run = self._run(run_id)
+            run["meta"] = {"created_at": time.time(), **meta}
+            snapshot = self._snapshot(run_id, run)
+        if self.persist:
+            self._queue.put((snapshot, None))
+
+    def put(self, run_id, name, content):
+        """
+        Guarda um artefato da execução. A gravação em disco (se ativada) acontece
+        em segundo plano; a busca não espera por ela.
+
+        Args:
+            run_id (str): Identificador da execução
+            name (str): Nome do artefato (ex.: o nome da etapa)
+            content (str): Conteúdo do artefato
+        """
+        with self._lock:
+            run = self._run(run_id)
+            run["artifacts"][name] = content
+            snapshot = self._snapshot(run_id, run)
+        if self.persist:
+            self._queue.put((snapshot, content))
+
+    def load(self, run_id):
+        """
+        Retorna uma execução guardada (da memória ou do disco).
+
+        Args:
+            run_id (str): Identificador da execução
+
+        Returns:
+            dict | None: {"run_id", "meta", "artifacts": {nome: conteúdo}} ou None se não existir
+        """
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                return {"run_id": run_id, "meta": dict(run["meta"]), "artifacts": dict(run["artifacts"])}
+        if not self.persist:
+            return None
+        try:
+            with open(self._run_path(run_id), encoding="utf-8") as handle:
+                manifest = json.load(handle)
+            artifacts = {}
+            for name, digest in manifest["artifacts"].items():
+                with open(self._blob_path(digest), encoding="utf-8") as handle:
+                    artifacts[name] = handle.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        return {"run_id": run_id, "meta": manifest["meta"], "artifacts": artifacts}
+
+    def get(self, run_id, name):
+        """Retorna um artefato de uma execução (ou None se não existir)"""
+        run = self.load(run_id)
+        return run["artifacts"].get(name) if run else None
+
+    def flush(self, timeout=None):
+        """
+        Espera as gravações em segundo plano terminarem.
+
+        Args:
+            timeout (float, optional): Tempo máximo de espera, em segundos
+
+        Returns:
+            bool: True se não há mais gravações pendentes
+        """
+        ends_at = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if ends_at is not None and time.monotonic() >= ends_at:
+                return False
+            time.sleep(0.02)
+        return True
+
+    # ===== DISCO =====
+
+    def _run_path(self, run_id):
+        return os.path.join(self.directory, "runs", f"{run_id}.json")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def _write_loop(self):
+        """Thread em segundo plano: grava os artefatos e limpa o disco de tempos em tempos"""
+        last_purge = 0.0
+        while True:
+            snapshot, content = self._queue.get()
+            try:
+                if content is not None:
+                    self._write_blob(content)
+                _write(self._run_path(snapshot["run_id"]), json.dumps(snapshot, ensure_ascii=False))
+            except OSError as e:
+                print(f"Info: Could not persist artifact: {e}")
+            finally:
+                self._queue.task_done()
+            if time.monotonic() - last_purge >= _PURGE_SECONDS:
+                last_purge = time.monotonic()
+                try:
+                    self.purge()
+                except OSError as e:
+                    print(f"Info: Could not purge artifacts: {e}")
+
+    def _write_blob(self, content):
+        path = self._blob_path(_digest(content))
+        if os.path.exists(path):
+            # O mesmo conteúdo já foi gravado: só marcamos que ele voltou a ser usado
+            os.utime(path)
+            count("yournews_artifact_writes_total", {"result": "deduplicated"})
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write(path, content)
+        count("yournews_artifact_writes_total", {"result": "written"})
+
+    def purge(self):
+        """
+        Apaga as execuções mais antigas que o período de retenção e os
+        conteúdos que nenhuma execução restante usa.
+
+        Returns:
+            int: Quantidade de execuções apagadas
+        """
+        if not self.persist:
+            return 0
+        now = time.time()
+        runs_dir = os.path.join(self.directory, "runs")
+        removed = 0
+        referenced = set()
+        for entry in os.scandir(runs_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            if entry.stat().st_mtime < now - self.retention_seconds:
+                os.remove(entry.path)
+                removed += 1
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as handle:
+                    referenced.update(json.load(handle)["artifacts"].values())
+            except (OSError, ValueError, KeyError):
+                continue
+        blobs_dir = os.path.join(self.directory, "blobs")
+        for prefix in os.scandir(blobs_dir):
+            if not prefix.is_dir():
+                continue
+            for blob in os.scandir(prefix.path):
+                if blob.name not in referenced and blob.stat().st_mtime < now - _PURGE_GRACE_SECONDS:
+                    os.remove(blob.path)
+        return removed
+
+
+# Instância única, criada na primeira utilização
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """
+    Retorna o armazenamento de artefatos compartilhado por todas as buscas do processo.
+
+    Returns:
+        ArtifactStore: Armazenamento configurado pelas variáveis de ambiente
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore()
+        return _store
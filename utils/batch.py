@@ -0,0 +1,411 @@
+"""
+YourNews - Geração de Newsletters em Lote
+
+Gera as newsletters de vários assuntos de uma vez, sem a interface:
+
+    python -m utils.batch topics.txt                 # um assunto por linha
+    python -m utils.batch --resume .cache/yournews/batches/20260101-063000
+    python -m utils.batch --prewarm --at 06:30,11:30  # pré-aquecimento diário
+
+Os assuntos são divididos entre vários processos (NEWS_BATCH_PROCESSES), que
+respeitam o mesmo limite de requisições das buscas dos usuários (veja
+utils/ratelimit.py). Cada execução grava uma newsletter por assunto e um
+manifest.json em um diretório próprio. O manifesto é atualizado a cada assunto
+terminado, então uma execução interrompida pode continuar de onde parou
+(--resume).
+
+No modo de pré-aquecimento (--prewarm), os assuntos são os mais procurados
+pelos usuários nos últimos dias (lidos dos traces de desempenho). As newsletters
+geradas vão para o cache de resultados, e quem pesquisar esses assuntos no
+horário de pico recebe a resposta na hora.
+"""
+
+# Importações de bibliotecas padrão do Python
+import argparse         # Para ler os argumentos da linha de comando
+import json             # Para gravar o manifesto da execução
+import multiprocessing  # Para criar os processos de trabalho
+import os               # Para ler variáveis de ambiente e manipular arquivos
+import re               # Para criar nomes de arquivo a partir dos assuntos
+import sys              # Para o código de saída do comando
+import time             # Para medir a duração e esperar o horário agendado
+from collections import Counter  # Para contar os assuntos mais procurados
+from concurrent.futures import ProcessPoolExecutor, as_completed  # Conjunto de processos
+from contextlib import contextmanager  # Para as variáveis de ambiente dos processos
+from datetime import datetime, timedelta  # Para os horários agendados
+
+# Biblioteca para carregar variáveis de ambiente de um arquivo .env
+from dotenv import load_dotenv
+
+# Normalização do assunto (a mesma usada nas chaves do cache)
+from utils.cache import normalize_subject
+
+# Registros de desempenho das buscas, usados para achar os assuntos populares
+from utils.metrics import recent_runs
+
+# ===== CONFIGURAÇÕES =====
+# Diretório onde cada execução cria o seu diretório de resultados
+BATCH_DIR = os.getenv("NEWS_BATCH_DIR", os.path.join(".cache", "yournews", "batches"))
+# Quantidade de processos gerando newsletters ao mesmo tempo
+BATCH_PROCESSES = int(os.getenv("NEWS_BATCH_PROCESSES", "2"))
+# Quantidade de assuntos populares pré-aquecidos
+PREWARM_TOPICS = int(os.getenv("NEWS_PREWARM_TOPICS", "20"))
+# Período, em dias, usado para achar os assuntos populares
+PREWARM_DAYS = float(os.getenv("NEWS_PREWARM_DAYS", "7"))
+# No pré-aquecimento, newsletters no cache mais novas que isso (em segundos) não são refeitas
+PREWARM_MAX_AGE_SECONDS = int(os.getenv("NEWS_PREWARM_MAX_AGE_SECONDS", "7200"))
+# Quantidade máxima de traces lidos para achar os assuntos populares
+PREWARM_SCAN_RUNS = int(os.getenv("NEWS_PREWARM_SCAN_RUNS", "2000"))
+
+# Possíveis estados de um assunto no manifesto
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def read_topics(path):
+    """
+    Lê os assuntos de um arquivo de texto (um por linha).
+
+    Linhas vazias e linhas começando com "#" são ignoradas, assim como assuntos
+    repetidos (comparados como no cache: sem acentos nem maiúsculas).
+
+    Args:
+        path (str): Caminho do arquivo
+
+    Returns:
+        list[str]: Assuntos, na ordem do arquivo
+    """
+    with open(path, encoding="utf-8") as handle:
+        lines = [line.strip() for line in handle]
+    return _unique([line for line in lines if line and not line.startswith("#")])
+
+
+def _unique(topics):
+    seen = set()
+    unique = []
+    for topic in topics:
+        key = normalize_subject(topic)
+        if key not in seen:
+            seen.add(key)
+            unique.append(topic)
+    return unique
+
+
+def popular_topics(limit=PREWARM_TOPICS, days=PREWARM_DAYS, scan=PREWARM_SCAN_RUNS):
+    """
+    Encontra os assuntos mais procurados pelos usuários nos últimos dias.
+
+    As buscas feitas em lote (origem "batch") não contam, senão um assunto
+    pré-aquecido continuaria popular para sempre.
+
+    Args:
+        limit (int): Quantidade máxima de assuntos
+        days (float): Período considerado, em dias
+        scan (int): Quantidade máxima de traces lidos
+
+    Returns:
+        list[str]: Assuntos, do mais procurado para o menos procurado
+    """
+    since = time.time() - days * 86400
+    counts = Counter()
+    spellings = {}
+    for run in recent_runs(scan):
+        if run.get("started_at", 0) < since or run.get("origin", "user") == "batch":
+            continue
+        if run.get("outcome") == "error":
+            continue
+        key = normalize_subject(run["subject"])
+        counts[key] += 1
+        spellings.setdefault(key, Counter())[run["subject"]] += 1
+    # Para cada assunto, usamos a forma mais digitada pelos usuários
+    return [spellings[key].most_common(1)[0][0] for key, _ in counts.most_common(limit)]
+
+
+def _slug(topic):
+    """Nome de arquivo seguro a partir do assunto"""
+    return re.sub(r"[^a-z0-9]+", "-", normalize_subject(topic)).strip("-")[:60] or "topic"
+
+
+def _write(path, content):
+    """Grava o arquivo por inteiro ou não grava (nunca deixa um arquivo pela metade)"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        handle.write(content)
+    os.replace(temporary, path)
+
+
+class BatchRun:
+    """Diretório e manifesto de uma execução em lote (o checkpoint para continuar)"""
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+
+    @classmethod
+    def create(cls, topics, options, output_dir=BATCH_DIR):
+        """
+        Cria o diretório de uma nova execução.
+
+        Args:
+            topics (list[str]): Assuntos a gerar
+            options (dict): Opções da execução, guardadas para o --resume
+            output_dir (str): Diretório onde o diretório da execução é criado
+
+        Returns:
+            BatchRun: A nova execução, com todos os assuntos pendentes
+        """
+        run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        directory = os.path.join(output_dir, run_id)
+        suffix = 1
+        while os.path.exists(directory):
+            suffix += 1
+            directory = os.path.join(output_dir, f"{run_id}-{suffix}")
+        os.makedirs(directory)
+        run = cls(directory, {
+            "run_id": os.path.basename(directory),
+            "created_at": time.time(),
+            "options": options,
+            "topics": [
+                {"topic": topic, "file": f"{index + 1:03d}-{_slug(topic)}.md", "status": PENDING}
+                for index, topic in enumerate(topics)
+            ],
+        })
+        run.save()
+        return run
+
+    @classmethod
+    def load(cls, directory):
+        """Abre uma execução existente para continuá-la"""
+        with open(os.path.join(directory, cls.MANIFEST), encoding="utf-8") as handle:
+            return cls(directory, json.load(handle))
+
+    def save(self):
+        _write(os.path.join(self.directory, self.MANIFEST), json.dumps(self.manifest, ensure_ascii=False, indent=2))
+
+    def pending(self):
+        """Índices dos assuntos que ainda não foram gerados (inclusive os que falharam)"""
+        return [index for index, entry in enumerate(self.manifest["topics"]) if entry["status"] != DONE]
+
+    def record(self, index, result):
+        """Registra o resultado de um assunto e grava o manifesto"""
+        self.manifest["topics"][index].update(result)
+        self.save()
+
+
+@contextmanager
+def _environment(values):
+    """
+    Define variáveis de ambiente enquanto os processos de trabalho são criados.
+
+    Cada processo novo começa com uma cópia das variáveis deste processo, e os
+    módulos da busca leem as configurações ao serem importados.
+    """
+    previous = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _generate(topic, path, refresh, max_age, deadline):
+    """
+    Gera a newsletter de um assunto dentro de um processo de trabalho.
+
+    Args:
+        topic (str): Assunto
+        path (str): Arquivo onde gravar a newsletter
+        refresh (bool): Se True, sempre gera uma newsletter nova
+        max_age (int): Se maior que zero, reaproveita a newsletter do cache mais nova
+            que isso (em segundos) e, se não houver, gera uma nova
+        deadline (float): Prazo da busca, em segundos (0 = sem prazo)
+
+    Returns:
+        dict: Estado, duração e erro (se houver), para o manifesto
+    """
+    # Importados aqui: só os processos de trabalho carregam a busca (e o CrewAI)
+    from utils.cache import get_cache, make_key
+    from utils.searchnews import search_news
+
+    started = time.perf_counter()
+    newsletter = None
+    if max_age > 0 and not refresh:
+        newsletter = get_cache().get(make_key(topic), newer_than=time.time() - max_age)
+    if newsletter is None:
+        # Sem as chaves, search_news devolve uma newsletter de demonstração, que
+        # não deve ser gravada como se fosse o resultado do assunto
+        missing_keys = [name for name in ("SERPER_API_KEY", "OPENAI_API_KEY") if not os.environ.get(name)]
+        if missing_keys:
+            return {"status": FAILED, "error": f"Missing API keys: {', '.join(missing_keys)}",
+                    "duration_s": round(time.perf_counter() - started, 3)}
+        # exact=True: cada assunto tem a sua newsletter, e não a de um assunto parecido.
+        # Com max_age, a newsletter do cache já foi recusada acima, mas a edição
+        # anterior do assunto continua valendo (atualização incremental)
+        newsletter = search_news(topic, refresh=refresh, exact=True, deadline=deadline,
+                                 bypass_cache=max_age > 0)
+    if newsletter.startswith("CrewAI error"):
+        return {"status": FAILED, "error": newsletter, "duration_s": round(time.perf_counter() - started, 3)}
+    _write(path, newsletter)
+    return {"status": DONE, "error": None, "duration_s": round(time.perf_counter() - started, 3)}
+
+
+def run_batch(run, processes=BATCH_PROCESSES, refresh=False, max_age=0, deadline=0, overrides=None):
+    """
+    Gera as newsletters pendentes de uma execução em vários processos.
+
+    Args:
+        run (BatchRun): Execução (nova ou continuada)
+        processes (int): Quantidade de processos gerando ao mesmo tempo
+        refresh (bool): Se True, ignora o cache de resultados
+        max_age (int): Idade máxima, em segundos, de uma newsletter do cache reaproveitada
+        deadline (float): Prazo de cada busca, em segundos (0 = sem prazo)
+        overrides (dict, optional): Variáveis de ambiente dos processos de trabalho
+
+    Returns:
+        int: Quantidade de assuntos que falharam
+    """
+    pending = run.pending()
+    topics = run.manifest["topics"]
+    if not pending:
+        print(f"Info: Nothing to do in {run.directory}.")
+        return 0
+    print(f"Info: Generating {len(pending)} newsletters with {processes} processes in {run.directory}.")
+
+    # "spawn": cada processo começa do zero, sem copiar as threads deste processo
+    context = multiprocessing.get_context("spawn")
+    failed = 0
+    pool = ProcessPoolExecutor(max_workers=max(1, min(processes, len(pending))), mp_context=context)
+    try:
+        # Os processos são criados no primeiro submit. As buscas em lote não
+        # contam como procura dos usuários (veja popular_topics)
+        with _environment({**(overrides or {}), "NEWS_TRACE_ORIGIN": "batch"}):
+            futures = {
+                pool.submit(_generate, topics[index]["topic"], os.path.join(run.directory, topics[index]["file"]),
+                            refresh, max_age, deadline): index
+                for index in pending
+            }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"status": FAILED, "error": str(e)}
+            run.record(index, result)
+            failed += result["status"] == FAILED
+            print(f"Info: [{result['status']}] {topics[index]['topic']}"
+                  + (f" ({result['duration_s']:.1f}s)" if "duration_s" in result else "")
+                  + (f": {result['error']}" if result["error"] else ""))
+    except KeyboardInterrupt:
+        # Os assuntos já terminados estão no manifesto; os demais ficam pendentes
+        pool.shutdown(wait=False, cancel_futures=True)
+        print(f"Info: Interrupted. Continue with: python -m utils.batch --resume {run.directory}")
+        raise
+    pool.shutdown()
+    return failed
+
+
+def _next_time(times, now=None):
+    """
+    Próximo horário agendado.
+
+    Args:
+        times (list[str]): Horários no formato "HH:MM"
+        now (datetime, optional): Momento atual
+
+    Returns:
+        datetime: O próximo dos horários, hoje ou amanhã
+    """
+    now = now or datetime.now()
+    candidates = []
+    for text in times:
+        hour, minute = (int(part) for part in text.split(":"))
+        moment = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        candidates.append(moment if moment > now else moment + timedelta(days=1))
+    return min(candidates)
+
+
+def _run_once(args, overrides):
+    """Executa (ou continua) uma execução em lote; retorna a quantidade de falhas"""
+    if args.resume:
+        run = BatchRun.load(args.resume)
+        options = run.manifest["options"]
+    else:
+        topics = read_topics(args.topics_file) if args.topics_file else []
+        if args.prewarm:
+            topics = _unique(topics + popular_topics(args.top, args.days))
+        if not topics:
+            print("Info: No topics to generate.")
+            return 0
+        options = {
+            "refresh": args.refresh,
+            "max_age": args.max_age if args.max_age is not None else (PREWARM_MAX_AGE_SECONDS if args.prewarm else 0),
+            "deadline": args.deadline,
+            "prewarm": args.prewarm,
+        }
+        run = BatchRun.create(topics, options, args.output_dir)
+    return run_batch(run, args.processes, options["refresh"], options["max_age"], options["deadline"], overrides)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate newsletters for many topics at once.")
+    parser.add_argument("topics_file", nargs="?", help="file with one topic per line")
+    parser.add_argument("--resume", metavar="RUN_DIR", help="continue an interrupted run")
+    parser.add_argument("--prewarm", action="store_true",
+                        help="also generate the most searched topics of the last days (fills the result cache)")
+    parser.add_argument("--top", type=int, default=PREWARM_TOPICS, help="popular topics to pre-warm")
+    parser.add_argument("--days", type=float, default=PREWARM_DAYS, help="period used to rank popular topics")
+    parser.add_argument("--max-age", type=int, default=None,
+                        help="reuse cached newsletters newer than this many seconds "
+                             f"(default: {PREWARM_MAX_AGE_SECONDS} with --prewarm, otherwise any valid entry)")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached results")
+    parser.add_argument("--processes", type=int, default=BATCH_PROCESSES, help="topics generated at the same time")
+    parser.add_argument("--openai-rate", type=float,
+                        help="OpenAI requests per second for this batch (on top of the shared limit)")
+    parser.add_argument("--serper-rate", type=float,
+                        help="Serper requests per second for this batch (on top of the shared limit)")
+    parser.add_argument("--deadline", type=float, default=0,
+                        help="deadline of each search in seconds (default: none, nobody is waiting)")
+    parser.add_argument("--output-dir", default=BATCH_DIR, help="where the run directory is created")
+    parser.add_argument("--at", metavar="HH:MM[,HH:MM]",
+                        help="keep running and start a new run every day at these times")
+    args = parser.parse_args(argv)
+    if not (args.topics_file or args.prewarm or args.resume):
+        parser.error("give a topics file, --prewarm or --resume")
+
+    load_dotenv()
+    # As chamadas do lote respeitam o limite compartilhado com as buscas dos
+    # usuários e, com --openai-rate/--serper-rate, também um balde só delas
+    # (mudar NEWS_OPENAI_RATE mudaria o ritmo do balde compartilhado)
+    overrides = {}
+    rates = {"openai": args.openai_rate, "serper": args.serper_rate}
+    if any(rates.values()):
+        overrides["NEWS_RATE_LIMIT_SCOPE"] = "batch"
+        overrides["NEWS_RATE_LIMIT_SCOPE_RATES"] = ",".join(
+            f"{provider}={rate}" for provider, rate in rates.items() if rate
+        )
+
+    if not args.at:
+        return 1 if _run_once(args, overrides) else 0
+
+    # Modo agendado: uma nova execução por horário, todos os dias
+    times = [text.strip() for text in args.at.split(",") if text.strip()]
+    while True:
+        moment = _next_time(times)
+        print(f"Info: Next run at {moment:%Y-%m-%d %H:%M}.")
+        time.sleep(max(0.0, (moment - datetime.now()).total_seconds()))
+        try:
+            _run_once(args, overrides)
+        except Exception as e:
+            # Uma execução com problema não impede as próximas
+            print(f"Info: Scheduled run failed: {e}")
+        args.resume = None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
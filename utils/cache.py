@@ -0,0 +1,274 @@
+"""
+YourNews - Cache de Resultados
+
+Este módulo implementa um cache de duas camadas para os resultados de
+search_news, evitando rodar a equipe de agentes inteira (minutos de LLM e
+dezenas de chamadas de busca) quando alguém já pediu o mesmo assunto há pouco.
+
+As camadas são:
+1. Memória (LRU): um dicionário ordenado dentro do processo, com resposta imediata.
+2. Disco (SQLite): compartilhado por todos os processos do Streamlit e que
+   sobrevive a reinicializações do servidor.
+
+A chave do cache combina o assunto normalizado com a janela de datas atual,
+de modo que o mesmo assunto volta a ser pesquisado quando a janela muda.
+"""
+
+# Importações de bibliotecas padrão do Python
+import os            # Para ler variáveis de ambiente e criar diretórios
+import sqlite3       # Banco de dados em arquivo, usado na camada de disco
+import threading     # Para proteger estruturas compartilhadas entre threads
+import time          # Para controlar a validade (TTL) das entradas
+import unicodedata   # Para remover acentos ao normalizar o assunto
+from collections import OrderedDict  # Dicionário que lembra a ordem de uso (LRU)
+from datetime import date            # Para calcular a janela de datas
+
+# ===== CONFIGURAÇÕES =====
+# Todas as configurações podem ser alteradas pelo arquivo .env
+
+# Tempo de validade de um resultado, em segundos (padrão: 6 horas)
+CACHE_TTL_SECONDS = int(os.getenv("NEWS_CACHE_TTL_SECONDS", "21600"))
+# Quantidade máxima de resultados mantidos na memória de cada processo
+CACHE_MEMORY_ENTRIES = int(os.getenv("NEWS_CACHE_MEMORY_ENTRIES", "128"))
+# Tamanho máximo do cache em disco, em megabytes
+CACHE_DISK_MAX_MB = int(os.getenv("NEWS_CACHE_DISK_MAX_MB", "256"))
+# Tamanho da janela de datas, em dias (1 = o mesmo assunto é refeito a cada dia)
+CACHE_WINDOW_DAYS = int(os.getenv("NEWS_CACHE_WINDOW_DAYS", "1"))
+# Caminho do arquivo SQLite compartilhado
+CACHE_DB_PATH = os.getenv("NEWS_CACHE_DB_PATH", os.path.join(".cache", "yournews", "results.sqlite3"))
+
+
+def normalize_subject(subject):
+    """
+    Normaliza o assunto digitado pelo usuário para uso como chave.
+
+    Remove espaços extras, acentos e diferenças de maiúsculas/minúsculas,
+    assim "Inteligência  Artificial" e "inteligencia artificial" viram a mesma chave.
+
+    Args:
+        subject (str): Assunto digitado pelo usuário
+
+    Returns:
+        str: Assunto normalizado
+    """
+    text = unicodedata.normalize("NFKD", subject or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.casefold().split())
+
+
+def date_window(today=None, window_days=None):
+    """
+    Calcula o identificador da janela de datas atual.
+
+    Args:
+        today (date, optional): Data de referência (padrão: hoje)
+        window_days (int, optional): Tamanho da janela em dias
+
+    Returns:
+        str: Data de início da janela no formato AAAA-MM-DD
+    """
+    today = today or date.today()
+    window_days = max(1, window_days or CACHE_WINDOW_DAYS)
+    start = today.toordinal() - (today.toordinal() % window_days)
+    return date.fromordinal(start).isoformat()
+
+
+def make_key(subject, today=None):
+    """
+    Monta a chave do cache a partir do assunto e da janela de datas.
+
+    Args:
+        subject (str): Assunto da busca
+        today (date, optional): Data de referência (padrão: hoje)
+
+    Returns:
+        str: Chave no formato "assunto normalizado|início da janela"
+    """
+    return f"{normalize_subject(subject)}|{date_window(today)}"
+
+
+class ResultCache:
+    """Cache de resultados com uma camada LRU em memória e outra em SQLite"""
+
+    def __init__(self, db_path=CACHE_DB_PATH, ttl_seconds=CACHE_TTL_SECONDS,
+                 memory_entries=CACHE_MEMORY_ENTRIES, disk_max_bytes=CACHE_DISK_MAX_MB * 1024 * 1024):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+
+        # Camada de memória: chave -> (valor, momento em que foi criado)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # Conexões SQLite não podem ser compartilhadas entre threads,
+        # então cada thread abre a sua
+        self._local = threading.local()
+
+        # Contadores de acertos e falhas deste processo
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+
+    def _connection(self):
+        """Retorna a conexão SQLite da thread atual, criando-a se necessário"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            # O modo WAL permite leituras simultâneas de vários processos
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _remember(self, key, value, created_at):
+        """Guarda um valor na camada de memória, descartando o menos usado se necessário"""
+        with self._lock:
+            self._memory[key] = (value, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key, newer_than=None):
+        """
+        Busca um resultado no cache, primeiro na memória e depois no disco.
+
+        Args:
+            key (str): Chave gerada por make_key
+            newer_than (float, optional): Aceita apenas resultados criados depois
+                deste momento (timestamp), ignorando os mais antigos
+
+        Returns:
+            str | None: O resultado armazenado ou None se não houver resultado válido
+        """
+        now = time.time()
+        # O resultado precisa estar dentro do TTL e, se pedido, ser mais novo que newer_than
+        oldest = max(now - self.ttl_seconds, newer_than or 0)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > oldest:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[0]
+            if entry:
+                # Entrada vencida (ou mais antiga que o pedido): removemos da memória
+                del self._memory[key]
+
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM results WHERE key = ? AND created_at > ?",
+                (key, oldest),
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+
+        if not row:
+            self._count("misses")
+            return None
+
+        # Promove o resultado do disco para a memória
+        self._remember(key, row[0], row[1])
+        self._count("disk_hits")
+        return row[0]
+
+    def set(self, key, value):
+        """
+        Armazena um resultado nas duas camadas e aplica a política de descarte.
+
+        Args:
+            key (str): Chave gerada por make_key
+            value (str): Resultado em Markdown a ser armazenado
+        """
+        now = time.time()
+        self._remember(key, value, now)
+
+        size = len(value.encode("utf-8"))
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+        self._count("stores")
+        self._evict()
+
+    def invalidate(self, key):
+        """Remove uma chave das duas camadas do cache"""
+        with self._lock:
+            self._memory.pop(key, None)
+        with self._connection() as conn:
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def _evict(self):
+        """Remove entradas vencidas e, se o disco passar do limite, as menos usadas"""
+        with self._connection() as conn:
+            removed = conn.execute(
+                "DELETE FROM results WHERE created_at <= ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.disk_max_bytes:
+                # Percorre as entradas da menos usada para a mais usada
+                # até que o total fique abaixo do limite
+                excess = total - self.disk_max_bytes
+                victims = []
+                for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed_at"):
+                    victims.append((key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM results WHERE key = ?", victims)
+                removed += len(victims)
+        if removed:
+            self._count("evictions", removed)
+
+    def stats(self):
+        """
+        Retorna os contadores de acertos e falhas deste processo.
+
+        Returns:
+            dict: Contadores, total de entradas e tamanho ocupado no disco
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        with self._connection() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        stats["disk_entries"] = entries
+        stats["disk_bytes"] = size
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+# Instância única do cache, criada na primeira utilização
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Retorna a instância compartilhada do cache de resultados.
+
+    Returns:
+        ResultCache: O cache usado por search_news
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
@@ -0,0 +1,163 @@
+"""
+YourNews - Prazo das Buscas (orçamento de tempo por etapa)
+
+Uma execução da equipe não tinha limite de tempo: o pesquisador podia continuar
+chamando ferramentas indefinidamente, e o usuário só via a tela de espera.
+
+Aqui cada busca recebe um prazo total (NEWS_DEADLINE_SECONDS), dividido entre
+as etapas (pesquisa, curadoria e edição) na proporção de NEWS_STAGE_BUDGETS. O
+tempo que uma etapa não usa passa para as seguintes. Quando o orçamento de uma
+etapa acaba, ela segue com o que já tem:
+
+- Pesquisa: usa as notícias da pré-busca.
+- Curadoria: as notícias ainda sem análise seguem como vieram da pesquisa.
+- Edição: o usuário recebe uma newsletter parcial, montada com as análises
+  prontas e marcada como tal, em vez de um erro.
+
+O prazo de cada busca fica disponível para a thread que a executa (e para as
+threads auxiliares que chamarem attach_deadline), como o registro de desempenho.
+"""
+
+# Importações de bibliotecas padrão do Python
+import os         # Para ler variáveis de ambiente
+import threading  # Para guardar o prazo da busca de cada thread
+import time       # Para medir o tempo restante
+from contextlib import contextmanager  # Para usar o prazo em outras threads
+
+# Medições de desempenho
+from utils.metrics import count
+
+# ===== CONFIGURAÇÕES =====
+# Prazo total de uma busca, em segundos (0 = sem prazo)
+DEADLINE_SECONDS = float(os.getenv("NEWS_DEADLINE_SECONDS", "0"))
+# Divisão do prazo entre as etapas (proporções, não precisam somar 1)
+STAGE_BUDGETS = os.getenv("NEWS_STAGE_BUDGETS", "research=0.4,curation=0.3,editing=0.3")
+
+
+def parse_budgets(text):
+    """
+    Lê a divisão do prazo entre as etapas.
+
+    Args:
+        text (str): Texto no formato "research=0.4,curation=0.3,editing=0.3"
+
+    Returns:
+        dict: Etapa -> proporção do prazo, na ordem das etapas
+    """
+    budgets = {}
+    for part in text.split(","):
+        name, _, share = part.partition("=")
+        if name.strip():
+            budgets[name.strip()] = float(share or 0)
+    return budgets
+
+
+class BudgetExceeded(Exception):
+    """O orçamento de tempo da etapa acabou"""
+
+    def __init__(self, stage):
+        super().__init__(f"time budget of stage '{stage}' exceeded")
+        self.stage = stage
+
+
+def is_budget_exceeded(error):
+    """Diz se o erro (ou algum erro que o causou) é um BudgetExceeded"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, BudgetExceeded):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class Deadline:
+    """
+    Prazo de uma busca, dividido entre as etapas.
+
+    Args:
+        seconds (float): Prazo total, a partir de agora
+        budgets (dict, optional): Etapa -> proporção do prazo (padrão: NEWS_STAGE_BUDGETS)
+
+    Attributes:
+        exceeded (list[str]): Etapas que terminaram por falta de tempo
+        fallbacks (dict): Etapa -> função chamada como fallback(task, context) quando o
+            orçamento da etapa acaba (definidas pela equipe a cada execução)
+    """
+
+    def __init__(self, seconds, budgets=None):
+        self.seconds = seconds
+        self.budgets = budgets or parse_budgets(STAGE_BUDGETS)
+        self.ends_at = time.monotonic() + seconds
+        self.exceeded = []
+        self.fallbacks = {}
+        self.stage = None
+        self.stage_ends_at = self.ends_at
+        self._lock = threading.Lock()
+
+    def start(self, stage):
+        """
+        Começa uma etapa: o orçamento dela é a sua parte do tempo que ainda resta.
+
+        Args:
+            stage (str): Nome da etapa
+        """
+        names = list(self.budgets)
+        pending = names[names.index(stage):] if stage in names else [stage]
+        total = sum(self.budgets.get(name, 0) for name in pending)
+        share = self.budgets.get(stage, 0) / total if total else 1.0
+        now = time.monotonic()
+        with self._lock:
+            self.stage = stage
+            self.stage_ends_at = now + max(0.0, self.ends_at - now) * share
+
+    def remaining(self):
+        """Segundos que ainda restam para a etapa atual (0 se acabou)"""
+        return max(0.0, self.stage_ends_at - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.stage_ends_at
+
+    def check(self):
+        """
+        Interrompe a etapa atual se o orçamento dela acabou.
+
+        Raises:
+            BudgetExceeded: Se o orçamento da etapa atual acabou
+        """
+        if self.expired():
+            raise BudgetExceeded(self.stage)
+
+    def mark_exceeded(self, stage):
+        """Registra que a etapa terminou por falta de tempo, com o que já tinha"""
+        with self._lock:
+            if stage in self.exceeded:
+                return
+            self.exceeded.append(stage)
+        count("yournews_stage_budget_exceeded_total", {"stage": stage})
+        print(f"Info: Time budget of stage '{stage}' exceeded; continuing with partial results.")
+
+
+# O prazo da busca atual de cada thread
+_current = threading.local()
+
+
+def current_deadline():
+    """Retorna o prazo da busca em andamento nesta thread (ou None)"""
+    return getattr(_current, "deadline", None)
+
+
+@contextmanager
+def attach_deadline(deadline):
+    """
+    Usa o prazo de uma busca na thread atual (a da busca ou uma auxiliar).
+
+    Args:
+        deadline (Deadline | None): Prazo retornado por current_deadline() ou criado para a busca
+    """
+    previous = getattr(_current, "deadline", None)
+    _current.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _current.deadline = previous
@@ -0,0 +1,487 @@
+"""
+YourNews - Execução de Buscas em Segundo Plano
+
+Gerar uma newsletter leva minutos. Em vez de bloquear a página do Streamlit
+durante todo esse tempo, as buscas são enviadas para um conjunto limitado de
+threads de trabalho (worker pool). A página recebe um identificador de tarefa
+(job ID) e apenas consulta o andamento de tempos em tempos.
+
+O estado de cada tarefa é gravado em um arquivo SQLite, então o resultado
+continua disponível mesmo depois que a página é recarregada, e qualquer
+processo (outra sessão do Streamlit ou outro worker da API em api_app.py)
+consegue consultar e cancelar as tarefas dos demais.
+"""
+
+# Importações de bibliotecas padrão do Python
+import os            # Para ler variáveis de ambiente e descobrir o PID do processo
+import sqlite3       # Banco de dados em arquivo para guardar o estado das tarefas
+import threading     # Para proteger estruturas compartilhadas entre threads
+import time          # Para registrar os horários de cada etapa da tarefa
+import uuid          # Para gerar identificadores únicos de tarefa
+from functools import partial  # Para configurar search_news como executor das tarefas
+from concurrent.futures import ThreadPoolExecutor  # Conjunto limitado de threads
+
+# search_news não carrega o CrewAI ao ser importada, então este módulo continua leve
+from utils.searchnews import search_news
+
+# Desistência de quem executava uma busca compartilhada com outros chamadores
+from utils.singleflight import Abandoned
+
+# Cache semântico, para a opção "não era isso que eu queria"
+from utils.semantic_cache import get_semantic_cache
+
+# ===== CONFIGURAÇÕES =====
+# Quantidade de buscas executadas ao mesmo tempo neste processo
+JOBS_MAX_WORKERS = int(os.getenv("NEWS_JOBS_MAX_WORKERS", "4"))
+# Quantidade máxima de buscas aguardando ou em execução (somando todos os processos)
+JOBS_MAX_QUEUE = int(os.getenv("NEWS_JOBS_MAX_QUEUE", "16"))
+# Quantidade máxima de buscas simultâneas de um mesmo usuário (somando todos os processos)
+JOBS_MAX_PER_USER = int(os.getenv("NEWS_JOBS_MAX_PER_USER", "2"))
+# Por quanto tempo as tarefas terminadas ficam guardadas, em segundos (padrão: 1 dia)
+JOBS_RETENTION_SECONDS = int(os.getenv("NEWS_JOBS_RETENTION_SECONDS", "86400"))
+# Caminho do arquivo SQLite com o estado das tarefas
+JOBS_DB_PATH = os.getenv("NEWS_JOBS_DB_PATH", os.path.join(".cache", "yournews", "jobs.sqlite3"))
+
+# Possíveis estados de uma tarefa
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class JobRejected(Exception):
+    """A tarefa não pôde ser aceita (fila cheia ou limite do usuário atingido)"""
+
+
+class JobCancelled(Abandoned):
+    """A tarefa foi cancelada pelo usuário durante a execução
+
+    É um Abandoned: outras buscas iguais que esperavam por esta não são
+    canceladas junto, uma delas passa a executar a busca.
+    """
+
+
+def _pid_alive(pid):
+    """Verifica se um processo com este PID ainda está rodando"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Sem permissão para sinalizar: o processo existe
+        return True
+    return True
+
+
+class JobStore:
+    """Guarda o estado das tarefas em SQLite, compartilhado entre processos"""
+
+    def __init__(self, db_path=JOBS_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " user_id TEXT NOT NULL,"
+                " subject TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " owner_pid INTEGER NOT NULL,"
+                " cancel_requested INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL)"
+            )
+            # Os limites de submit() contam as tarefas ativas a cada nova busca
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, user_id)")
+            # Bancos criados por versões anteriores não têm o pedido de cancelamento
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "cancel_requested" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+            # Resultado parcial de cada etapa da equipe, mostrado enquanto a busca roda
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_stages ("
+                " job_id TEXT NOT NULL,"
+                " stage TEXT NOT NULL,"
+                " content TEXT NOT NULL DEFAULT '',"
+                " started_at REAL NOT NULL,"
+                " finished_at REAL,"
+                " PRIMARY KEY (job_id, stage))"
+            )
+
+    def _connection(self):
+        """Retorna a conexão SQLite da thread atual, criando-a se necessário"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, job_id, user_id, subject, max_active=None, max_per_user=None):
+        """
+        Registra uma nova tarefa, se os limites de tarefas ativas permitirem.
+
+        Os limites contam as tarefas ativas de todos os processos que usam o
+        mesmo arquivo (todos os workers da API e as sessões do Streamlit), então
+        rodar mais workers não multiplica os limites.
+
+        Args:
+            job_id (str): Identificador da tarefa
+            user_id (str): Identificador do usuário
+            subject (str): Assunto da busca
+            max_active (int, optional): Tarefas ativas, no máximo
+            max_per_user (int, optional): Tarefas ativas do mesmo usuário, no máximo
+
+        Raises:
+            JobRejected: Se algum dos limites já foi atingido
+        """
+        # Tarefas de processos que morreram não contam nos limites
+        self.recover_orphans()
+        conn = self._connection()
+        with conn:
+            # Trava a escrita já na contagem: dois processos não aceitam juntos a última vaga
+            conn.execute("BEGIN IMMEDIATE")
+            active, user_jobs = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(user_id = ?), 0) FROM jobs WHERE status IN (?, ?)",
+                (user_id, *ACTIVE_STATES),
+            ).fetchone()
+            if max_active is not None and active >= max_active:
+                raise JobRejected("The server is busy right now. Please try again in a few minutes.")
+            if max_per_user is not None and user_jobs >= max_per_user:
+                raise JobRejected(
+                    f"You already have {user_jobs} searches running. Wait for one to finish or cancel it."
+                )
+            conn.execute(
+                "INSERT INTO jobs (id, user_id, subject, status, owner_pid, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, user_id, subject, QUEUED, os.getpid(), time.time()),
+            )
+
+    def update(self, job_id, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connection() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        """
+        Retorna o estado de uma tarefa.
+
+        Args:
+            job_id (str): Identificador da tarefa
+
+        Returns:
+            dict | None: Campos da tarefa ou None se ela não existir
+        """
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def request_cancel(self, job_id):
+        """
+        Pede o cancelamento de uma tarefa ativa, que pode estar em outro processo.
+
+        Args:
+            job_id (str): Identificador da tarefa
+
+        Returns:
+            bool: True se a tarefa estava ativa e o pedido foi registrado
+        """
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN (?, ?)",
+                (job_id, *ACTIVE_STATES),
+            )
+        return cursor.rowcount > 0
+
+    def cancel_requested(self, job_id):
+        """Diz se alguém pediu o cancelamento da tarefa (em qualquer processo)"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def start_stage(self, job_id, stage):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_stages (job_id, stage, started_at) VALUES (?, ?, ?)",
+                (job_id, stage, time.time()),
+            )
+
+    def save_stage(self, job_id, stage, content, finished=False):
+        # Uma etapa pode terminar sem ter começado (ex.: "semantic", que só
+        # informa o assunto reaproveitado): nesse caso a linha é criada aqui
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO job_stages (job_id, stage, content, started_at, finished_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (job_id, stage) DO UPDATE SET content = excluded.content,"
+                " finished_at = COALESCE(excluded.finished_at, job_stages.finished_at)",
+                (job_id, stage, content, now, now if finished else None),
+            )
+
+    def stages(self, job_id):
+        """
+        Retorna o andamento de cada etapa de uma tarefa, na ordem em que começaram.
+
+        Args:
+            job_id (str): Identificador da tarefa
+
+        Returns:
+            list[dict]: Etapas com conteúdo parcial e horários de início e fim
+        """
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM job_stages WHERE job_id = ? ORDER BY started_at", (job_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def recover_orphans(self):
+        """Marca como falhas as tarefas ativas cujo processo dono já terminou"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT owner_pid FROM jobs WHERE status IN (?, ?)", ACTIVE_STATES
+            ).fetchall()
+            for (pid,) in rows:
+                if pid != os.getpid() and not _pid_alive(pid):
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE owner_pid = ? AND status IN (?, ?)",
+                        (FAILED, "The server restarted before this search finished.", time.time(), pid, *ACTIVE_STATES),
+                    )
+
+    def purge(self, retention_seconds=JOBS_RETENTION_SECONDS):
+        """Remove as tarefas terminadas há mais tempo que o período de retenção"""
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status NOT IN (?, ?) AND finished_at < ?",
+                (*ACTIVE_STATES, time.time() - retention_seconds),
+            )
+            conn.execute("DELETE FROM job_stages WHERE job_id NOT IN (SELECT id FROM jobs)")
+
+
+class JobProgress:
+    """Recebe o andamento da equipe e grava o conteúdo de cada etapa no JobStore"""
+
+    # Intervalo mínimo entre gravações de conteúdo parcial, em segundos
+    # (os tokens chegam muitas vezes por segundo e não precisam ir um a um para o disco)
+    FLUSH_SECONDS = 0.5
+
+    def __init__(self, store, job_id, cancel_event):
+        self.store = store
+        self.job_id = job_id
+        self.cancel_event = cancel_event
+        self._content = {}
+        self._last_flush = 0.0
+
+    def cancelled(self):
+        """Diz se a tarefa foi cancelada neste processo ou por outro (via JobStore)"""
+        return self.cancel_event.is_set() or self.store.cancel_requested(self.job_id)
+
+    def __call__(self, event, stage, content=""):
+        """
+        Trata um evento de andamento da equipe.
+
+        Args:
+            event (str): "start", "update" (conteúdo adicional), "token" (pedaço
+                de texto gerado pelo LLM) ou "done" (conteúdo final da etapa)
+            stage (str): Nome da etapa
+            content (str): Conteúdo associado ao evento
+
+        Raises:
+            JobCancelled: Se o usuário cancelou a tarefa, interrompendo a equipe
+        """
+        # Os tokens chegam de dentro do LLM, onde não é seguro interromper;
+        # os demais eventos são os pontos de verificação do cancelamento
+        if event != "token" and self.cancelled():
+            raise JobCancelled()
+
+        if event == "start":
+            self._content[stage] = ""
+            self.store.start_stage(self.job_id, stage)
+        elif event == "done":
+            self._content[stage] = content
+            self.store.save_stage(self.job_id, stage, content, finished=True)
+        else:
+            separator = "\n\n" if event == "update" and self._content.get(stage) else ""
+            self._content[stage] = self._content.get(stage, "") + separator + content
+            now = time.monotonic()
+            if event == "update" or now - self._last_flush >= self.FLUSH_SECONDS:
+                self._last_flush = now
+                self.store.save_stage(self.job_id, stage, self._content[stage])
+
+
+class JobManager:
+    """Aceita buscas, executa-as em segundo plano e permite cancelá-las"""
+
+    def __init__(self, runner, store=None, max_workers=JOBS_MAX_WORKERS,
+                 max_queue=JOBS_MAX_QUEUE, max_per_user=JOBS_MAX_PER_USER):
+        """
+        Args:
+            runner (callable): Função que gera o resultado, chamada como
+                runner(subject, refresh=..., exact=..., progress=...)
+            store (JobStore, optional): Onde guardar o estado das tarefas
+            max_workers (int): Buscas executadas ao mesmo tempo
+            max_queue (int): Buscas aguardando ou em execução, no máximo (em todos os processos)
+            max_per_user (int): Buscas ativas de um mesmo usuário, no máximo (em todos os processos)
+        """
+        self.runner = runner
+        self.store = store or JobStore()
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-job")
+        self._lock = threading.Lock()
+        # Tarefas ativas deste processo: job_id -> (user_id, future, evento de cancelamento)
+        self._active = {}
+
+        self.store.recover_orphans()
+        self.store.purge()
+
+    def submit(self, user_id, subject, refresh=False, exact=False):
+        """
+        Envia uma busca para execução em segundo plano.
+
+        Args:
+            user_id (str): Identificador do usuário (usado no limite por usuário)
+            subject (str): Assunto da busca
+            refresh (bool): Se True, ignora o cache de resultados
+            exact (bool): Se True, não reaproveita a newsletter de um assunto parecido
+
+        Returns:
+            str: Identificador da tarefa criada
+
+        Raises:
+            JobRejected: Se a fila estiver cheia ou o usuário já tiver buscas demais
+        """
+        job_id = uuid.uuid4().hex
+        cancel_event = threading.Event()
+
+        with self._lock:
+            # Os limites são verificados no JobStore, que enxerga todos os processos
+            self.store.create(job_id, user_id, subject,
+                              max_active=self.max_queue, max_per_user=self.max_per_user)
+            future = self._executor.submit(self._run, job_id, subject, refresh, exact, cancel_event)
+            self._active[job_id] = (user_id, future, cancel_event)
+
+        return job_id
+
+    def _run(self, job_id, subject, refresh, exact, cancel_event):
+        """Executa uma tarefa dentro de uma thread de trabalho"""
+        progress = JobProgress(self.store, job_id, cancel_event)
+        try:
+            if progress.cancelled():
+                raise JobCancelled()
+            self.store.update(job_id, status=RUNNING, started_at=time.time())
+            result = self.runner(subject, refresh=refresh, exact=exact, progress=progress)
+            if progress.cancelled():
+                raise JobCancelled()
+            self.store.update(job_id, status=DONE, result=result, finished_at=time.time())
+        except JobCancelled:
+            self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                self._active.pop(job_id, None)
+
+    def status(self, job_id):
+        """
+        Consulta o estado de uma tarefa (inclusive de tarefas de outros processos).
+
+        Args:
+            job_id (str): Identificador da tarefa
+
+        Returns:
+            dict | None: Campos da tarefa ou None se ela não existir
+        """
+        return self.store.get(job_id)
+
+    def stages(self, job_id):
+        """
+        Consulta o conteúdo parcial de cada etapa de uma tarefa.
+
+        Args:
+            job_id (str): Identificador da tarefa
+
+        Returns:
+            list[dict]: Etapas na ordem em que começaram
+        """
+        return self.store.stages(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancela uma tarefa, deste ou de outro processo.
+
+        Tarefas deste processo que ainda não começaram são removidas da fila na
+        hora. As demais são interrompidas no próximo passo de um agente e o
+        resultado é descartado.
+
+        Args:
+            job_id (str): Identificador da tarefa
+
+        Returns:
+            bool: True se a tarefa estava ativa e foi (ou será) cancelada
+        """
+        with self._lock:
+            entry = self._active.get(job_id)
+        if entry is None:
+            # A tarefa é de outro processo: ele verá o pedido no próximo passo
+            return self.store.request_cancel(job_id)
+        _, future, cancel_event = entry
+        cancel_event.set()
+        if future.cancel():
+            # A tarefa ainda estava na fila, então _run nunca será chamado
+            with self._lock:
+                self._active.pop(job_id, None)
+            self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+        return True
+
+    def retry_exact(self, user_id, job_id):
+        """
+        Refaz uma busca que reaproveitou a newsletter de um assunto parecido,
+        agora só para o assunto digitado (o usuário disse que não era isso).
+
+        Args:
+            user_id (str): Identificador do usuário
+            job_id (str): Tarefa que mostrou a newsletter do assunto parecido
+
+        Returns:
+            str | None: Identificador da nova tarefa (None se a tarefa não existir)
+
+        Raises:
+            JobRejected: Se a fila estiver cheia ou o usuário já tiver buscas demais
+        """
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        similar = next((stage["content"] for stage in self.store.stages(job_id) if stage["stage"] == "semantic"), None)
+        if similar:
+            get_semantic_cache().reject(job["subject"], similar)
+        return self.submit(user_id, job["subject"], exact=True)
+
+
+
+# Instância única, criada na primeira utilização
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """
+    Retorna o gerenciador de tarefas compartilhado por todas as sessões do processo.
+
+    Returns:
+        JobManager: Gerenciador que executa search_news em segundo plano
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            # As falhas da equipe chegam como exceções e a tarefa fica como FAILED
+            # (e não como uma newsletter com o texto do erro)
+            _manager = JobManager(partial(search_news, raise_errors=True))
+        return _manager
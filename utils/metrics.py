@@ -0,0 +1,354 @@
+"""
+YourNews - Medições de Desempenho
+
+Este módulo registra onde o tempo de cada busca é gasto:
+- Duração de cada etapa (pesquisa, curadoria, edição) e de cada passo dos agentes.
+- Latência e tamanho das respostas de cada chamada de ferramenta (Serper, leitura de artigos).
+- Latência das chamadas ao LLM e tokens/custo de cada busca.
+- Acertos e falhas dos caches.
+
+As medições saem de duas formas:
+1. Um arquivo JSONL com um registro (trace) por busca, em NEWS_TRACE_PATH.
+2. Um endpoint HTTP no formato de texto do Prometheus, na porta NEWS_METRICS_PORT.
+
+Este módulo não importa o CrewAI: os eventos dos agentes são repassados para
+cá pelo módulo utils.wnews.crew.
+"""
+
+# Importações de bibliotecas padrão do Python
+import json          # Para gravar os traces em JSONL
+import math          # Para o cálculo dos percentis
+import os            # Para ler variáveis de ambiente e criar diretórios
+import threading     # Para proteger os contadores e servir o endpoint HTTP
+import time          # Para medir durações
+import uuid          # Para identificar cada busca
+from contextlib import contextmanager                        # Para criar o gerenciador run_trace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Endpoint do Prometheus
+
+# ===== CONFIGURAÇÕES =====
+# Arquivo onde cada busca é registrada (uma linha JSON por busca)
+TRACE_PATH = os.getenv("NEWS_TRACE_PATH", os.path.join(".cache", "yournews", "traces.jsonl"))
+# Origem das buscas deste processo, gravada em cada trace ("user" ou "batch"),
+# para que as buscas automáticas não contem como procura dos usuários
+TRACE_ORIGIN = os.getenv("NEWS_TRACE_ORIGIN", "user")
+# Porta do endpoint de métricas do Prometheus (vazio = desativado)
+METRICS_PORT = os.getenv("NEWS_METRICS_PORT", "")
+# Preço dos tokens do LLM, em dólares por 1.000 tokens (padrão: gpt-4o-mini)
+PRICE_PROMPT_PER_1K = float(os.getenv("NEWS_PRICE_PROMPT_PER_1K", "0.00015"))
+PRICE_COMPLETION_PER_1K = float(os.getenv("NEWS_PRICE_COMPLETION_PER_1K", "0.0006"))
+
+# Limites (em segundos) das faixas dos histogramas de duração
+_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, float("inf"))
+
+
+class _Registry:
+    """Contadores e histogramas acumulados deste processo, no modelo do Prometheus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, labels=None, amount=1):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            buckets, total, count = self._histograms.get(key, ([0] * len(_BUCKETS), 0.0, 0))
+            for index, limit in enumerate(_BUCKETS):
+                if value <= limit:
+                    buckets[index] += 1
+            self._histograms[key] = (buckets, total + value, count + 1)
+
+    def render(self):
+        """Gera o texto no formato de exposição do Prometheus"""
+        def fmt(labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            escaped = ",".join(f'{key}="{str(value).replace(chr(34), chr(39))}"' for key, value in pairs)
+            return "{" + escaped + "}"
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            lines.append(f"{name}{fmt(labels)} {value}")
+        for (name, labels), (buckets, total, count) in histograms:
+            if name not in declared:
+                lines.append(f"# TYPE {name} histogram")
+                declared.add(name)
+            for limit, bucket in zip(_BUCKETS, buckets):
+                edge = "+Inf" if limit == float("inf") else repr(float(limit))
+                lines.append(f"{name}_bucket{fmt(labels, (('le', edge),))} {bucket}")
+            lines.append(f"{name}_sum{fmt(labels)} {total}")
+            lines.append(f"{name}_count{fmt(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = _Registry()
+
+
+class RunTrace:
+    """Registro de tudo o que aconteceu em uma busca"""
+
+    def __init__(self, subject):
+        self.run_id = uuid.uuid4().hex
+        self.subject = subject
+        self.started_at = time.time()
+        self.outcome = None
+        self.cache = None
+        self.stages = {}
+        self.spans = []
+        self.tokens = {}
+        self._t0 = time.perf_counter()
+        self._stage_started = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, kind, name, duration, **attrs):
+        with self._lock:
+            self.spans.append({"kind": kind, "name": name, "ms": round(duration * 1000, 1), **attrs})
+
+    def observe_progress(self, event, stage, content=""):
+        """Mede a duração de cada etapa a partir dos eventos de andamento da equipe"""
+        if event == "start":
+            self._stage_started[stage] = time.perf_counter()
+        elif event == "done" and stage in self._stage_started:
+            duration = time.perf_counter() - self._stage_started[stage]
+            self.stages[stage] = round(duration, 3)
+            registry.observe("yournews_stage_duration_seconds", duration, {"stage": stage})
+
+    def set_token_usage(self, usage):
+        """
+        Registra os tokens usados pelo LLM e calcula o custo.
+
+        Args:
+            usage: Objeto UsageMetrics do CrewAI (prompt_tokens, completion_tokens...)
+        """
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        cost = prompt / 1000 * PRICE_PROMPT_PER_1K + completion / 1000 * PRICE_COMPLETION_PER_1K
+        self.tokens = {
+            "prompt": prompt,
+            "completion": completion,
+            "requests": getattr(usage, "successful_requests", 0) or 0,
+            "cost_usd": round(cost, 6),
+        }
+        registry.inc("yournews_llm_tokens_total", {"type": "prompt"}, prompt)
+        registry.inc("yournews_llm_tokens_total", {"type": "completion"}, completion)
+        registry.inc("yournews_llm_cost_usd_total", amount=cost)
+
+    def finish(self, outcome):
+        """Fecha o registro, atualiza os contadores e grava a linha no arquivo JSONL"""
+        self.outcome = outcome
+        duration = time.perf_counter() - self._t0
+        registry.inc("yournews_runs_total", {"outcome": outcome})
+        registry.observe("yournews_run_duration_seconds", duration, {"outcome": outcome})
+        record = {
+            "run_id": self.run_id,
+            "subject": self.subject,
+            "origin": TRACE_ORIGIN,
+            "started_at": self.started_at,
+            "duration_s": round(duration, 3),
+            "outcome": outcome,
+            "cache": self.cache,
+            "stages": self.stages,
+            "tokens": self.tokens,
+            "spans": self.spans,
+        }
+        try:
+            directory = os.path.dirname(TRACE_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Uma linha por busca; gravações pequenas em modo "append" não se misturam
+            with open(TRACE_PATH, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Info: Could not write trace: {e}")
+        return record
+
+
+# A busca atual de cada thread (cada busca roda inteira em uma thread)
+_current = threading.local()
+
+
+@contextmanager
+def run_trace(subject):
+    """
+    Abre o registro de uma busca para a thread atual.
+
+    Args:
+        subject (str): Assunto da busca
+
+    Yields:
+        RunTrace: O registro, que pode ser complementado durante a busca
+    """
+    trace = RunTrace(subject)
+    previous = getattr(_current, "trace", None)
+    _current.trace = trace
+    try:
+        yield trace
+    except BaseException:
+        trace.finish("error")
+        raise
+    else:
+        trace.finish(trace.outcome or "ok")
+    finally:
+        _current.trace = previous
+
+
+@contextmanager
+def attach_trace(trace):
+    """
+    Usa o registro de uma busca em outra thread (ex.: chamadas paralelas da mesma busca).
+
+    Args:
+        trace (RunTrace): Registro retornado por current_trace() na thread da busca
+    """
+    previous = getattr(_current, "trace", None)
+    _current.trace = trace
+    try:
+        yield trace
+    finally:
+        _current.trace = previous
+
+
+def current_trace():
+    """Retorna o registro da busca em andamento nesta thread (ou None)"""
+    return getattr(_current, "trace", None)
+
+
+def record_span(kind, name, duration, **attrs):
+    """
+    Registra a duração de uma operação (chamada de ferramenta, LLM, HTTP...).
+
+    Args:
+        kind (str): Tipo da operação (ex.: "tool", "llm", "http", "agent_step")
+        name (str): Nome da operação (ex.: "serper", "scrape", nome da etapa)
+        duration (float): Duração em segundos
+        **attrs: Informações extras (ex.: bytes=1234, cache="fresh")
+    """
+    registry.observe(f"yournews_{kind}_duration_seconds", duration, {"name": name})
+    if "bytes" in attrs:
+        registry.inc(f"yournews_{kind}_response_bytes_total", {"name": name}, attrs["bytes"])
+    trace = current_trace()
+    if trace is not None:
+        trace.add_span(kind, name, duration, **attrs)
+
+
+def count(name, labels=None, amount=1):
+    """
+    Incrementa um contador (ex.: acertos de cache).
+
+    Args:
+        name (str): Nome da métrica, com o prefixo yournews_
+        labels (dict, optional): Rótulos da métrica
+        amount (float): Valor a somar
+    """
+    registry.inc(name, labels, amount)
+
+
+def render_prometheus():
+    """Retorna as métricas deste processo no formato de texto do Prometheus"""
+    return registry.render()
+
+
+def recent_runs(limit=50):
+    """
+    Lê os registros das buscas mais recentes do arquivo JSONL.
+
+    Args:
+        limit (int): Quantidade máxima de registros
+
+    Returns:
+        list[dict]: Registros, do mais recente para o mais antigo
+    """
+    try:
+        with open(TRACE_PATH, "rb") as handle:
+            # Lemos só o final do arquivo, que pode ficar grande
+            handle.seek(0, os.SEEK_END)
+            handle.seek(max(0, handle.tell() - limit * 16384))
+            lines = handle.read().decode("utf-8", errors="ignore").splitlines()
+    except OSError:
+        return []
+    runs = []
+    for line in reversed(lines):
+        try:
+            runs.append(json.loads(line))
+        except ValueError:
+            continue
+        if len(runs) >= limit:
+            break
+    return runs
+
+
+def percentiles(values, points=(50, 95, 99)):
+    """
+    Calcula percentis de uma lista de valores (método do vizinho mais próximo).
+
+    Args:
+        values (list[float]): Valores medidos
+        points (tuple[int]): Percentis desejados
+
+    Returns:
+        dict: Percentil -> valor (vazio se não houver valores)
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    return {point: ordered[max(0, math.ceil(point / 100 * len(ordered)) - 1)] for point in points}
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Não polui o terminal com uma linha por coleta do Prometheus
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None):
+    """
+    Inicia o endpoint /metrics em segundo plano (apenas uma vez por processo).
+
+    Args:
+        port (int, optional): Porta HTTP (padrão: NEWS_METRICS_PORT)
+
+    Returns:
+        bool: True se o endpoint está rodando
+    """
+    global _server
+    port = port or METRICS_PORT
+    if not port:
+        return False
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            except OSError as e:
+                # Outro processo já ocupa a porta
+                print(f"Info: Metrics endpoint not started: {e}")
+                return False
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return True
@@ -0,0 +1,407 @@
+"""
+YourNews - Limite de Requisições às APIs (Serper e OpenAI)
+
+Com vários processos do Streamlit rodando ao mesmo tempo, as APIs do Serper e da
+OpenAI começam a responder 429 (muitas requisições). Antes, uma única chamada
+recusada derrubava a busca inteira.
+
+Este módulo controla as chamadas de cada provedor (e de cada chave de API) em
+duas camadas:
+
+1. Balde de fichas (token bucket) compartilhado entre processos: cada chamada
+   gasta uma ficha, e as fichas voltam no ritmo configurado (requisições por
+   segundo). O balde fica em um arquivo SQLite, então todos os processos
+   respeitam o mesmo limite. Quando um provedor responde 429 com Retry-After,
+   o balde inteiro fica bloqueado por esse tempo, para todos os processos.
+   Um grupo de chamadas (NEWS_RATE_LIMIT_SCOPE, ex.: a geração em lote) pode
+   ter ainda um balde próprio, mais lento, antes do balde compartilhado.
+2. Concorrência adaptativa (AIMD) dentro do processo: o número de chamadas ao
+   mesmo tempo cresce devagar enquanto tudo dá certo (aumento aditivo) e cai
+   pela metade a cada 429 ou erro 5xx (redução multiplicativa). Assim o
+   processo encontra sozinho o teto do provedor, sem cair em uma cascata de erros.
+
+Chamadas recusadas (429, 5xx, tempo esgotado) são repetidas algumas vezes,
+esperando o Retry-After ou um intervalo crescente.
+"""
+
+# Importações de bibliotecas padrão do Python
+import asyncio    # Para a versão assíncrona (usada pela pré-busca)
+import hashlib    # Para não guardar a chave de API em texto puro
+import os         # Para ler variáveis de ambiente e criar diretórios
+import random     # Para espalhar as novas tentativas no tempo
+import sqlite3    # Banco de dados em arquivo com os baldes compartilhados
+import threading  # Para proteger os contadores de cada processo
+import time       # Para o ritmo das fichas e as esperas
+from email.utils import parsedate_to_datetime  # Retry-After também pode vir como data
+
+# Medições de desempenho
+from utils.metrics import count, record_span
+
+# ===== CONFIGURAÇÕES =====
+# Requisições por segundo permitidas para cada provedor (somando todos os processos)
+SERPER_RATE = float(os.getenv("NEWS_SERPER_RATE", "5"))
+OPENAI_RATE = float(os.getenv("NEWS_OPENAI_RATE", "8"))
+# Chamadas ao mesmo tempo, no máximo, em cada processo
+SERPER_CONCURRENCY = int(os.getenv("NEWS_SERPER_CONCURRENCY", "8"))
+OPENAI_CONCURRENCY = int(os.getenv("NEWS_OPENAI_CONCURRENCY", "16"))
+# Quantas vezes uma chamada recusada (429, 5xx) é tentada de novo
+RATE_LIMIT_RETRIES = int(os.getenv("NEWS_RATE_LIMIT_RETRIES", "4"))
+# Espera inicial, em segundos, quando o provedor não informa o Retry-After (dobra a cada tentativa)
+RATE_LIMIT_BACKOFF = float(os.getenv("NEWS_RATE_LIMIT_BACKOFF", "1"))
+# Nome de um grupo de chamadas com ritmo próprio, além do limite geral (ex.: "batch",
+# definido pela geração em lote); vazio = só o limite geral
+RATE_LIMIT_SCOPE = os.getenv("NEWS_RATE_LIMIT_SCOPE", "")
+# Requisições por segundo do grupo, por provedor (ex.: "openai=1,serper=0.5")
+RATE_LIMIT_SCOPE_RATES = os.getenv("NEWS_RATE_LIMIT_SCOPE_RATES", "")
+# Arquivo com os baldes compartilhados entre processos
+RATE_LIMIT_DB_PATH = os.getenv("NEWS_RATE_LIMIT_DB_PATH", os.path.join(".cache", "yournews", "ratelimit.sqlite3"))
+
+# Provedor -> (variável com a chave de API, requisições por segundo, concorrência máxima)
+PROVIDERS = {
+    "serper": ("SERPER_API_KEY", SERPER_RATE, SERPER_CONCURRENCY),
+    "openai": ("OPENAI_API_KEY", OPENAI_RATE, OPENAI_CONCURRENCY),
+}
+
+# Códigos HTTP que indicam sobrecarga passageira (vale a pena tentar de novo)
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+def parse_rates(text):
+    """
+    Lê o ritmo de cada provedor.
+
+    Args:
+        text (str): Texto no formato "openai=1,serper=0.5"
+
+    Returns:
+        dict: Provedor -> requisições por segundo
+    """
+    rates = {}
+    for part in text.split(","):
+        name, _, rate = part.partition("=")
+        if name.strip():
+            rates[name.strip()] = float(rate or 0)
+    return rates
+
+
+def _chain(error):
+    """O erro e os erros que o causaram (o CrewAI às vezes embrulha o erro original em outro)"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def retry_after(error):
+    """
+    Lê o cabeçalho Retry-After da resposta de um erro, se houver.
+
+    Args:
+        error (Exception): Erro de requests, httpx, openai ou litellm
+
+    Returns:
+        float | None: Segundos de espera pedidos pelo provedor
+    """
+    for cause in _chain(error):
+        headers = getattr(getattr(cause, "response", None), "headers", None) or {}
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if not value:
+            continue
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def status_of(error):
+    """Código HTTP de um erro de requests, httpx, openai ou litellm (None se não houver)"""
+    for cause in _chain(error):
+        status = getattr(cause, "status_code", None)
+        if status is None:
+            status = getattr(getattr(cause, "response", None), "status_code", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def is_retryable(error):
+    """Diz se o erro é uma sobrecarga passageira: 429, 5xx, tempo esgotado ou conexão recusada"""
+    status = status_of(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    # Erros de rede das bibliotecas HTTP (httpx, requests) que não trazem resposta
+    return any(
+        isinstance(cause, (ConnectionError, TimeoutError))
+        or "Timeout" in type(cause).__name__ or "Connect" in type(cause).__name__
+        for cause in _chain(error)
+    )
+
+
+class BucketStore:
+    """Baldes de fichas compartilhados entre processos, em SQLite"""
+
+    def __init__(self, db_path=RATE_LIMIT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " key TEXT PRIMARY KEY,"
+                " tokens REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " blocked_until REAL NOT NULL DEFAULT 0)"
+            )
+
+    def _connection(self):
+        """Retorna a conexão SQLite da thread atual, criando-a se necessário"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: as transações são abertas à mão (BEGIN IMMEDIATE)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, rate, burst):
+        """
+        Tenta gastar uma ficha do balde.
+
+        Args:
+            key (str): Balde (provedor + chave de API)
+            rate (float): Fichas devolvidas por segundo
+            burst (float): Capacidade do balde
+
+        Returns:
+            float: 0 se a ficha foi gasta, ou quantos segundos esperar antes de tentar de novo
+        """
+        conn = self._connection()
+        # BEGIN IMMEDIATE trava a escrita: dois processos não gastam a mesma ficha
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated_at, blocked_until FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated_at, blocked_until = row or (burst, now, 0.0)
+            tokens = min(burst, tokens + max(0.0, now - updated_at) * rate)
+            if now < blocked_until:
+                wait = blocked_until - now
+            elif tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, tokens, now, blocked_until),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def block(self, key, seconds):
+        """Bloqueia o balde por alguns segundos (Retry-After), para todos os processos"""
+        until = time.time() + seconds
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO buckets (key, tokens, updated_at, blocked_until) VALUES (?, 0, ?, ?)"
+            " ON CONFLICT(key) DO UPDATE SET blocked_until = MAX(blocked_until, excluded.blocked_until)",
+            (key, time.time(), until),
+        )
+
+
+class AdaptiveLimit:
+    """
+    Limite de chamadas ao mesmo tempo que se ajusta sozinho (AIMD).
+
+    Cada chamada bem-sucedida aumenta o limite em 1/limite (cerca de +1 a cada
+    "rodada" de chamadas); cada 429 ou 5xx corta o limite pela metade.
+    """
+
+    def __init__(self, maximum):
+        self.maximum = max(1, maximum)
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def try_enter(self):
+        with self._condition:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def enter(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def leave(self, overloaded=False):
+        with self._condition:
+            self.in_flight -= 1
+            if overloaded:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class ProviderLimiter:
+    """
+    Controle das chamadas a um provedor com uma chave de API.
+
+    Args:
+        provider (str): Nome do provedor (ex.: "serper", "openai")
+        api_key (str): Chave de API; cada chave tem o seu próprio balde
+        rate (float): Requisições por segundo, somando todos os processos
+        concurrency (int): Chamadas ao mesmo tempo, no máximo, neste processo
+        store (BucketStore, optional): Baldes compartilhados
+        scope (str, optional): Grupo de chamadas com ritmo próprio (ex.: "batch")
+        scope_rate (float): Requisições por segundo do grupo (0 = sem ritmo próprio)
+    """
+
+    def __init__(self, provider, api_key, rate, concurrency, store=None, scope=None, scope_rate=0):
+        self.provider = provider
+        self.key = f"{provider}:{hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]}"
+        self.rate = rate
+        # Cada balde guarda até um segundo de requisições, para absorver pequenos picos.
+        # O balde do grupo vem primeiro: as chamadas do grupo esperam o ritmo delas
+        # sem segurar fichas do balde geral, que continua valendo para todos
+        self.buckets = [(self.key, rate, max(1.0, rate))]
+        if scope and scope_rate > 0:
+            self.buckets.insert(0, (f"{scope}:{self.key}", scope_rate, max(1.0, scope_rate)))
+        self.concurrency = AdaptiveLimit(concurrency)
+        self.store = store or get_bucket_store()
+
+    def _wait_time(self, key, rate, burst):
+        """Segundos até a próxima ficha do balde (0 se a ficha já foi gasta)"""
+        if rate <= 0:
+            return 0.0
+        return self.store.take(key, rate, burst)
+
+    def _backoff(self, error, attempt):
+        """Registra a recusa e diz quanto esperar antes da próxima tentativa"""
+        overloaded = status_of(error) == 429
+        count("yournews_rate_limit_total", {"provider": self.provider, "result": "throttled" if overloaded else "error"})
+        delay = retry_after(error)
+        if delay is None:
+            delay = RATE_LIMIT_BACKOFF * 2 ** attempt * (0.5 + random.random())
+        if overloaded:
+            # O 429 vale para a chave inteira: todos os processos esperam juntos
+            self.store.block(self.key, delay)
+        return delay
+
+    def call(self, function, *args, **kwargs):
+        """
+        Chama a função respeitando o limite do provedor e repetindo as recusas.
+
+        Args:
+            function (callable): Função que faz a requisição
+            *args, **kwargs: Argumentos da função
+
+        Returns:
+            Any: O que a função retornar
+
+        Raises:
+            Exception: O último erro, se todas as tentativas falharem ou se o erro
+                não for passageiro
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            started = time.perf_counter()
+            self.concurrency.enter()
+            overloaded = False
+            try:
+                for bucket in self.buckets:
+                    wait = self._wait_time(*bucket)
+                    while wait > 0:
+                        time.sleep(wait)
+                        wait = self._wait_time(*bucket)
+                record_span("rate_limit", self.provider, time.perf_counter() - started)
+                return function(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == RATE_LIMIT_RETRIES:
+                    raise
+                overloaded = True
+                delay = self._backoff(e, attempt)
+            finally:
+                self.concurrency.leave(overloaded)
+            count("yournews_rate_limit_retries_total", {"provider": self.provider})
+            time.sleep(delay)
+
+    async def acall(self, function, *args, **kwargs):
+        """Versão assíncrona de call, para funções async (ex.: httpx.AsyncClient)"""
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            started = time.perf_counter()
+            # Espera sem travar o loop de eventos
+            while not self.concurrency.try_enter():
+                await asyncio.sleep(0.05)
+            overloaded = False
+            try:
+                for bucket in self.buckets:
+                    wait = self._wait_time(*bucket)
+                    while wait > 0:
+                        await asyncio.sleep(wait)
+                        wait = self._wait_time(*bucket)
+                record_span("rate_limit", self.provider, time.perf_counter() - started)
+                return await function(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == RATE_LIMIT_RETRIES:
+                    raise
+                overloaded = True
+                delay = self._backoff(e, attempt)
+            finally:
+                self.concurrency.leave(overloaded)
+            count("yournews_rate_limit_retries_total", {"provider": self.provider})
+            await asyncio.sleep(delay)
+
+
+_store = None
+_limiters = {}
+_lock = threading.Lock()
+
+
+def get_bucket_store():
+    """Retorna os baldes compartilhados por todo o processo"""
+    global _store
+    with _lock:
+        if _store is None:
+            _store = BucketStore()
+        return _store
+
+
+def get_limiter(provider, api_key=None):
+    """
+    Retorna o controle de chamadas de um provedor, um por chave de API.
+
+    Args:
+        provider (str): "serper" ou "openai"
+        api_key (str, optional): Chave de API (padrão: a variável de ambiente do provedor)
+
+    Returns:
+        ProviderLimiter: Controle compartilhado por todas as threads do processo
+    """
+    env_key, rate, concurrency = PROVIDERS[provider]
+    if api_key is None:
+        api_key = os.getenv(env_key, "")
+    with _lock:
+        limiter = _limiters.get((provider, api_key))
+    if limiter is None:
+        limiter = ProviderLimiter(provider, api_key, rate, concurrency, store=get_bucket_store(),
+                                  scope=RATE_LIMIT_SCOPE,
+                                  scope_rate=parse_rates(RATE_LIMIT_SCOPE_RATES).get(provider, 0))
+        with _lock:
+            limiter = _limiters.setdefault((provider, api_key), limiter)
+    return limiter
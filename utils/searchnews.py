@@ -11,18 +11,37 @@ que implementa uma equipe de agentes especializados em busca e curadoria de not
 
 # Importações de bibliotecas padrão do Python
 import os          # Para acessar variáveis de ambiente e manipular arquivos
-import tempfile    # Para criar arquivos temporários
+import sqlite3     # Para tratar falhas do cache semântico
+import threading   # Para pré-carregar a equipe de agentes em segundo plano
 import dotenv     # Para carregar variáveis de ambiente de um arquivo .env
 
 # Carrega as variáveis de ambiente do arquivo .env
 # Isso é importante para não expor chaves de API diretamente no código
 dotenv.load_dotenv()
 
-# Importa a classe Wnews do módulo crew
-# Esta classe implementa a equipe de agentes usando o framework CrewAI
-from utils.wnews.crew import Wnews
+# A equipe de agentes (utils.wnews.crew) NÃO é importada aqui: o CrewAI carrega
+# muitas bibliotecas (langchain, chromadb, litellm...) e leva vários segundos.
+# Ela é importada só quando necessária, ou antecipadamente por prewarm().
 
-def search_news(subject):
+# Importa o cache de resultados, que evita rodar a equipe de novo
+# para assuntos pesquisados recentemente
+from utils.cache import get_cache, make_key
+
+# Importa o cache semântico, que reaproveita a newsletter de assuntos parecidos
+# ("IA" e "inteligência artificial")
+from utils.semantic_cache import SEMANTIC_CACHE, get_semantic_cache
+
+# Importa o prazo das buscas, dividido entre as etapas da equipe
+from utils.deadline import DEADLINE_SECONDS, Deadline
+
+# Importa o coordenador que junta buscas simultâneas pelo mesmo assunto
+from utils.singleflight import Abandoned, get_singleflight
+
+# Importa as medições de desempenho (tempo de cada etapa, tokens, acertos de cache)
+from utils.metrics import count, run_trace
+
+def search_news(subject, refresh=False, progress=None, exact=False, deadline=None, raise_errors=False,
+                bypass_cache=False):
     """
     Busca notícias sobre um assunto específico usando o framework CrewAI.
     
@@ -31,8 +50,25 @@ def search_news(subject):
     utiliza a equipe de agentes definida na classe Wnews para buscar, analisar
     e formatar notícias sobre o assunto solicitado.
     
+    Antes de acionar os agentes, o resultado é procurado no cache (memória e
+    disco). Apenas resultados gerados com sucesso pela equipe são armazenados.
+    
     Args:
         subject (str): O assunto sobre o qual buscar notícias
+        refresh (bool): Se True, ignora o cache e gera uma nova newsletter
+        progress (callable, optional): Função que recebe o andamento de cada etapa
+            da equipe, chamada como progress(evento, etapa, conteúdo)
+        exact (bool): Se True, não reaproveita a newsletter de um assunto parecido
+            (usado quando o usuário diz que o resultado não era o que queria)
+        deadline (float, optional): Prazo da busca, em segundos (padrão:
+            NEWS_DEADLINE_SECONDS; 0 = sem prazo). Quando o tempo acaba, a busca
+            termina com o que tiver (no pior caso, uma newsletter parcial)
+        raise_errors (bool): Se True, as falhas da equipe são levantadas como
+            exceções em vez de retornadas como texto "CrewAI error: ..." (usado
+            pelo gerenciador de tarefas, que registra a busca como falha)
+        bypass_cache (bool): Se True, não reaproveita o cache de resultados, mas,
+            ao contrário de refresh, continua usando a edição anterior do assunto
+            (atualização incremental); usado pelo pré-aquecimento em lote
         
     Returns:
         str: String formatada em Markdown contendo as notícias encontradas
@@ -66,26 +102,160 @@ def search_news(subject):
         # que retorna dados simulados em vez de fazer buscas reais
         return _mock_search_news(subject, missing_keys)
     
+    # O prazo começa a contar agora, inclusive o tempo de espera por outra busca igual
+    seconds = DEADLINE_SECONDS if deadline is None else deadline
+    deadline = Deadline(seconds) if seconds > 0 else None
+    
+    # Cada busca ganha um registro de desempenho (trace), gravado ao final
+    with run_trace(subject) as trace:
+        return _search_with_cache(subject, refresh, progress, trace, exact, deadline, raise_errors, bypass_cache)
+
+
+def _search_with_cache(subject, refresh, progress, trace, exact=False, deadline=None, raise_errors=False,
+                       bypass_cache=False):
+    """
+    Procura o resultado no cache e, se necessário, executa a equipe de agentes.
+    
+    Args:
+        subject (str): O assunto sobre o qual buscar notícias
+        refresh (bool): Se True, ignora o cache e gera uma nova newsletter
+        progress (callable, optional): Função que recebe o andamento de cada etapa
+        trace (RunTrace): Registro de desempenho desta busca
+        exact (bool): Se True, não reaproveita a newsletter de um assunto parecido
+        deadline (Deadline, optional): Prazo da busca
+        raise_errors (bool): Se True, levanta as falhas em vez de retorná-las como texto
+        bypass_cache (bool): Se True, ignora só o cache de resultados (veja search_news)
+        
+    Returns:
+        str: String formatada em Markdown contendo as notícias encontradas
+    """
+    # Procura o resultado no cache antes de acionar os agentes
+    # A chave combina o assunto normalizado com a janela de datas atual
+    cache = get_cache()
+    cache_key = make_key(subject)
+    skip_cache = refresh or bypass_cache
+    if not skip_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print(f"Info: Cache hit for '{subject}'.")
+            trace.cache = "hit"
+            count("yournews_result_cache_total", {"result": "hit"})
+            return cached
+    trace.cache = "bypass" if skip_cache else "miss"
+    count("yournews_result_cache_total", {"result": trace.cache})
+    
+    # Procura um assunto recente parecido ("IA" e "inteligência artificial")
+    # e reaproveita a newsletter dele
+    if SEMANTIC_CACHE and not skip_cache and not exact:
+        similar = _search_similar(subject, cache, progress)
+        if similar is not None:
+            trace.cache = "semantic"
+            return similar
+    
     # Se todas as chaves estiverem disponíveis, usa a implementação do CrewAI
     try:
-        # Cria um arquivo temporário para armazenar a saída
-        # Isso é útil para casos em que o resultado é muito grande
-        with tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.md') as temp_file:
-            output_path = temp_file.name
+        def _progress(event, stage, content=""):
+            # Repassa o andamento para o registro de desempenho e para quem chamou
+            trace.observe_progress(event, stage, content)
+            if progress is not None:
+                progress(event, stage, content)
             
-        # Executa a equipe de agentes do CrewAI
-        # 1. Cria uma instância da classe Wnews (a equipe de agentes)
-        # 2. Acessa o objeto crew (a equipe configurada)
-        # 3. Inicia o processo com kickoff() passando o tópico como entrada
-        result = Wnews().crew().kickoff(inputs={'topic': subject})
+        def _generate():
+            # Executa a equipe de agentes do CrewAI
+            # kickoff_crew usa uma cópia da equipe pré-construída (veja crew.py),
+            # passando o tópico como entrada e informando quem recebe o andamento
+            from utils.wnews.crew import kickoff_crew
+            result = kickoff_crew({'topic': subject}, progress=_progress, deadline=deadline, refresh=refresh)
+            trace.set_token_usage(result.token_usage)
+            
+            # Converte a saída da equipe em texto Markdown
+            newsletter = str(result)
+            if deadline is not None and deadline.exceeded:
+                # Resultado feito sem tempo: é entregue, mas não vai para o cache
+                trace.outcome = "partial"
+                return newsletter
+            
+            # Guarda no cache
+            cache.set(cache_key, newsletter)
+            if SEMANTIC_CACHE:
+                # O assunto passa a valer também para os assuntos parecidos
+                try:
+                    get_semantic_cache().remember(subject)
+                except sqlite3.Error as e:
+                    print(f"Info: Could not remember subject in the semantic cache: {e}")
+            return newsletter
+        
+        def _recheck(waited_since):
+            # Se outro processo gerou o mesmo assunto enquanto esperávamos,
+            # o resultado dele já está no cache. Sem o cache (refresh ou
+            # bypass_cache) aceitamos apenas o resultado gerado durante a espera.
+            return cache.get(cache_key, newer_than=waited_since if skip_cache else None)
+        
+        # Apenas uma busca por assunto roda de cada vez: chamadores simultâneos
+        # esperam e recebem o mesmo resultado (ou o mesmo erro)
+        newsletter = get_singleflight().do(cache_key, _generate, recheck=_recheck)
+        if not trace.tokens and trace.outcome != "unchanged":
+            # A equipe não rodou nesta thread: o resultado veio de outra busca igual
+            # ("unchanged" = rodou, mas não havia notícia nova; veja kickoff_crew)
+            trace.cache = "coalesced"
         
         # Retorna o resultado formatado em Markdown
-        return result
+        return newsletter
     except Exception as e:
         # Em caso de erro, retorna uma mensagem informativa
+        trace.outcome = "cancelled" if isinstance(e, Abandoned) else "error"
+        if raise_errors:
+            raise
         return f"CrewAI error: {str(e)}"
 
 
+def _search_similar(subject, cache, progress=None):
+    """
+    Procura no cache a newsletter de um assunto recente parecido com o pedido.
+    
+    Args:
+        subject (str): O assunto pedido pelo usuário
+        cache (ResultCache): Cache de resultados
+        progress (callable, optional): Recebe o evento ("done", "semantic", assunto
+            reaproveitado), para a interface oferecer a opção "não era isso"
+    
+    Returns:
+        str | None: A newsletter do assunto parecido, ou None se não houver
+    """
+    try:
+        match = get_semantic_cache().lookup(subject)
+    except sqlite3.Error as e:
+        print(f"Info: Semantic cache unavailable: {e}")
+        return None
+    newsletter = cache.get(make_key(match.subject)) if match is not None else None
+    if newsletter is None:
+        count("yournews_semantic_cache_total", {"result": "miss"})
+        return None
+    print(f"Info: Reusing the newsletter for '{match.subject}' (similarity {match.similarity:.2f}).")
+    count("yournews_semantic_cache_total", {"result": "hit"})
+    if progress is not None:
+        progress("done", "semantic", match.subject)
+    return newsletter
+
+
+def prewarm():
+    """
+    Importa o CrewAI e constrói a equipe modelo em segundo plano.
+
+    Chamada pela interface depois que a página é exibida, para que a primeira
+    busca não precise esperar pelo carregamento das bibliotecas.
+    """
+    def _load():
+        try:
+            from utils.wnews.crew import crew_template
+            crew_template()
+        except Exception as e:
+            # Se falhar aqui, o erro aparecerá (e será tratado) na primeira busca
+            print(f"Info: Crew pre-warm failed: {e}")
+    
+    threading.Thread(target=_load, name="crew-prewarm", daemon=True).start()
+
+
 def _mock_search_news(subject, missing_keys):
     """
     Gera resultados simulados de busca de notícias quando as chaves de API estão ausentes.
@@ -0,0 +1,327 @@
+"""
+YourNews - Cache Semântico de Assuntos
+
+O cache de resultados (utils/cache.py) só reconhece o mesmo assunto escrito da
+mesma forma (sem acentos e maiúsculas). Assim "IA", "inteligência artificial" e
+"AI" acionavam três vezes a equipe inteira.
+
+Este módulo guarda o vetor (embedding) de cada assunto pesquisado recentemente
+em uma matriz NumPy e compara o assunto novo com todos de uma vez (similaridade
+de cosseno). Se algum for parecido o bastante (NEWS_SEMANTIC_THRESHOLD), a
+newsletter dele é reaproveitada em vez de rodar a equipe de novo.
+
+Os vetores vêm da API de embeddings da OpenAI, que entende sinônimos e siglas.
+Sem ela (ou se a chamada falhar), usamos um vetor local de trechos de 3 letras,
+que reconhece apenas variações de escrita ("inteligencia artifical").
+
+Assuntos com números diferentes ("Copa do Mundo 2026" e "Copa do Mundo 2022",
+"iPhone 15" e "iPhone 16") nunca são considerados o mesmo, por mais parecidos
+que sejam os vetores.
+
+Se o usuário disser que o resultado não era o que queria, o par de assuntos é
+marcado como rejeitado e não é mais reaproveitado.
+"""
+
+# Importações de bibliotecas padrão do Python
+import hashlib    # Para o vetor local (hashing trick)
+import os         # Para ler variáveis de ambiente e criar diretórios
+import re         # Para encontrar os números (anos, versões) do assunto
+import sqlite3    # Assuntos e vetores compartilhados entre processos
+import threading  # Para proteger a matriz e as conexões SQLite
+import time       # Para a validade dos assuntos guardados
+from collections import OrderedDict  # Vetores já calculados, dos mais antigos aos mais recentes
+
+# Bibliotecas externas
+import httpx        # Para chamar a API de embeddings
+import numpy as np  # Para a matriz de vetores e a similaridade de cosseno
+
+# Normalização do assunto e validade dos resultados, as mesmas do cache de resultados
+from utils.cache import CACHE_TTL_SECONDS, normalize_subject
+
+# Medições de desempenho
+from utils.metrics import count, record_span
+
+# ===== CONFIGURAÇÕES =====
+# Se "1", assuntos parecidos reaproveitam a newsletter um do outro
+SEMANTIC_CACHE = os.getenv("NEWS_SEMANTIC_CACHE", "1") == "1"
+# Similaridade mínima (0 a 1) para considerar dois assuntos iguais
+SEMANTIC_THRESHOLD = float(os.getenv("NEWS_SEMANTIC_THRESHOLD", "0.85"))
+# Quantidade máxima de assuntos na matriz (os mais antigos saem primeiro)
+SEMANTIC_MAX_TOPICS = int(os.getenv("NEWS_SEMANTIC_MAX_TOPICS", "1000"))
+# "openai" (entende sinônimos e siglas) ou "local" (só variações de escrita, sem API)
+SEMANTIC_EMBEDDINGS = os.getenv("NEWS_SEMANTIC_EMBEDDINGS", "openai")
+# Modelo de embeddings da OpenAI
+SEMANTIC_MODEL = os.getenv("NEWS_SEMANTIC_MODEL", "text-embedding-3-small")
+# Arquivo com os assuntos e vetores
+SEMANTIC_DB_PATH = os.getenv("NEWS_SEMANTIC_DB_PATH", os.path.join(".cache", "yournews", "topics_semantic.sqlite3"))
+
+# Tamanho do vetor local
+_LOCAL_DIMENSIONS = 512
+# Vetores já calculados neste processo
+_EMBEDDING_MEMO_ENTRIES = 1024
+
+
+def _numbers(subject):
+    """Números do assunto normalizado (anos, edições, versões), sem zeros à esquerda"""
+    return sorted(str(int(number)) for number in re.findall(r"\d+", subject))
+
+
+def local_embedding(subject):
+    """
+    Vetor local de um assunto ("hashing trick" sobre trechos de 3 letras).
+
+    Args:
+        subject (str): Assunto da busca
+
+    Returns:
+        numpy.ndarray: Vetor normalizado (comprimento 1)
+    """
+    vector = np.zeros(_LOCAL_DIMENSIONS, dtype=np.float32)
+    for word in normalize_subject(subject).split():
+        padded = f" {word} "
+        for start in range(max(1, len(padded) - 2)):
+            digest = hashlib.blake2b(padded[start:start + 3].encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % _LOCAL_DIMENSIONS] += 1.0 if value & (1 << 63) else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def openai_embedding(subject, model=SEMANTIC_MODEL):
+    """
+    Vetor de um assunto calculado pela API de embeddings da OpenAI.
+
+    A chamada passa pelo limite de requisições da OpenAI (utils/ratelimit.py).
+
+    Args:
+        subject (str): Assunto da busca
+        model (str): Modelo de embeddings
+
+    Returns:
+        numpy.ndarray: Vetor normalizado (comprimento 1)
+    """
+    # Importado aqui para que o módulo não dependa do limite de requisições no modo local
+    from utils.ratelimit import get_limiter
+
+    api_key = os.environ.get("OPENAI_API_KEY", "")
+    base_url = (os.getenv("OPENAI_BASE_URL") or "https://api.openai.com/v1").rstrip("/")
+
+    def request():
+        started = time.perf_counter()
+        response = httpx.post(
+            f"{base_url}/embeddings",
+            json={"model": model, "input": normalize_subject(subject)},
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=15,
+        )
+        record_span("http", "embeddings", time.perf_counter() - started, status=response.status_code)
+        response.raise_for_status()
+        return response
+
+    response = get_limiter("openai", api_key).call(request)
+    vector = np.asarray(response.json()["data"][0]["embedding"], dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticMatch:
+    """
+    Assunto recente parecido com o assunto pedido.
+
+    Attributes:
+        subject (str): Assunto pesquisado antes, cuja newsletter pode ser reaproveitada
+        similarity (float): Similaridade de cosseno entre os dois assuntos (0 a 1)
+    """
+
+    def __init__(self, subject, similarity):
+        self.subject = subject
+        self.similarity = similarity
+
+
+class SemanticTopicCache:
+    """Assuntos recentes e seus vetores, em uma matriz NumPy (com cópia em SQLite)"""
+
+    def __init__(self, db_path=SEMANTIC_DB_PATH, threshold=SEMANTIC_THRESHOLD,
+                 max_topics=SEMANTIC_MAX_TOPICS, ttl_seconds=CACHE_TTL_SECONDS, embeddings=SEMANTIC_EMBEDDINGS):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.max_topics = max_topics
+        self.ttl_seconds = ttl_seconds
+        self.embeddings = embeddings
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._memo = OrderedDict()
+
+        # Matriz (um vetor por linha) e dados de cada linha, na mesma ordem
+        self._model = None
+        self._matrix = None
+        self._subjects = []
+        self._created = np.zeros(0)
+        # Última linha do SQLite já carregada (outros processos também gravam)
+        self._last_rowid = 0
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS topics ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " subject TEXT NOT NULL,"
+                " model TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " created_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS topics_subject ON topics (subject, model);"
+                "CREATE TABLE IF NOT EXISTS rejections ("
+                " subject TEXT NOT NULL,"
+                " rejected TEXT NOT NULL,"
+                " PRIMARY KEY (subject, rejected));"
+            )
+
+    def _connection(self):
+        """Retorna a conexão SQLite da thread atual, criando-a se necessário"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def embed(self, subject):
+        """
+        Calcula (ou reaproveita) o vetor de um assunto.
+
+        Returns:
+            tuple[str, numpy.ndarray]: Nome do modelo usado e o vetor
+        """
+        key = normalize_subject(subject)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        result = None
+        if self.embeddings == "openai" and os.environ.get("OPENAI_API_KEY"):
+            try:
+                result = (SEMANTIC_MODEL, openai_embedding(subject))
+            except (httpx.HTTPError, KeyError, IndexError, ValueError) as e:
+                print(f"Info: Could not embed subject with OpenAI, using local vectors: {e}")
+        if result is None:
+            result = ("local", local_embedding(subject))
+        with self._lock:
+            self._memo[key] = result
+            while len(self._memo) > _EMBEDDING_MEMO_ENTRIES:
+                self._memo.popitem(last=False)
+        return result
+
+    def _sync(self, model):
+        """Carrega na matriz as linhas novas (inclusive as gravadas por outros processos)"""
+        oldest = time.time() - self.ttl_seconds
+        if model != self._model:
+            # Vetores de modelos diferentes não são comparáveis: recomeçamos a matriz
+            self._model, self._matrix, self._subjects, self._created, self._last_rowid = model, None, [], np.zeros(0), 0
+        rows = self._connection().execute(
+            "SELECT id, subject, vector, created_at FROM topics WHERE id > ? AND model = ? AND created_at > ?"
+            " ORDER BY id",
+            (self._last_rowid, model, oldest),
+        ).fetchall()
+        if rows:
+            self._last_rowid = rows[-1][0]
+            vectors = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+            self._matrix = vectors if self._matrix is None else np.vstack([self._matrix, vectors])
+            self._subjects.extend(row[1] for row in rows)
+            self._created = np.concatenate([self._created, [row[3] for row in rows]])
+
+        # Descarte: assuntos vencidos e, acima do limite, os mais antigos
+        keep = self._created > oldest
+        if keep.sum() > self.max_topics:
+            keep &= self._created >= np.sort(self._created[keep])[-self.max_topics]
+        if self._matrix is not None and not keep.all():
+            self._matrix = self._matrix[keep]
+            self._subjects = [subject for subject, kept in zip(self._subjects, keep) if kept]
+            self._created = self._created[keep]
+
+    def lookup(self, subject):
+        """
+        Procura um assunto recente parecido com o pedido.
+
+        Args:
+            subject (str): Assunto da busca
+
+        Returns:
+            SemanticMatch | None: O assunto mais parecido acima do limite, ou None
+        """
+        key = normalize_subject(subject)
+        model, vector = self.embed(subject)
+        rejected = {row[0] for row in self._connection().execute(
+            "SELECT rejected FROM rejections WHERE subject = ?", (key,)
+        )}
+        with self._lock:
+            self._sync(model)
+            if self._matrix is None or not len(self._subjects):
+                return None
+            # Todos os vetores têm comprimento 1: o produto é a similaridade de cosseno
+            similarities = self._matrix @ vector
+            numbers = _numbers(key)
+            for index in np.argsort(similarities)[::-1]:
+                if similarities[index] < self.threshold:
+                    break
+                candidate = self._subjects[index]
+                # Outro ano ou outra versão é outro assunto
+                if candidate != key and candidate not in rejected and _numbers(candidate) == numbers:
+                    return SemanticMatch(candidate, float(similarities[index]))
+        return None
+
+    def remember(self, subject):
+        """Guarda o assunto de uma newsletter recém-gerada, para as próximas buscas"""
+        key = normalize_subject(subject)
+        model, vector = self.embed(subject)
+        now = time.time()
+        with self._connection() as conn:
+            # Cada assunto aparece uma vez: a versão nova substitui a antiga
+            conn.execute("DELETE FROM topics WHERE subject = ? AND model = ?", (key, model))
+            conn.execute(
+                "INSERT INTO topics (subject, model, vector, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, vector.astype(np.float32).tobytes(), now),
+            )
+            # Descarte no disco: assuntos vencidos e, acima do limite, os mais antigos
+            conn.execute("DELETE FROM topics WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM topics WHERE id NOT IN (SELECT id FROM topics ORDER BY created_at DESC LIMIT ?)",
+                (self.max_topics,),
+            )
+        with self._lock:
+            # A versão antiga sai da matriz; a nova entra no próximo _sync
+            if model == self._model and key in self._subjects:
+                keep = np.array([item != key for item in self._subjects])
+                self._matrix = self._matrix[keep]
+                self._subjects = [item for item in self._subjects if item != key]
+                self._created = self._created[keep]
+
+    def reject(self, subject, rejected):
+        """
+        Registra que a newsletter de um assunto não serve para outro ("não era isso").
+
+        Args:
+            subject (str): Assunto pedido pelo usuário
+            rejected (str): Assunto cuja newsletter foi mostrada
+        """
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO rejections (subject, rejected) VALUES (?, ?)",
+                (normalize_subject(subject), normalize_subject(rejected)),
+            )
+        count("yournews_semantic_cache_total", {"result": "rejected"})
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """Retorna o cache semântico compartilhado por todo o processo"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticTopicCache()
+        return _cache
@@ -0,0 +1,191 @@
+"""
+YourNews - Coalescência de Buscas Simultâneas (single-flight)
+
+Quando um assunto está em alta, várias sessões do Streamlit pedem a mesma
+newsletter ao mesmo tempo. Este módulo garante que apenas uma delas rode a
+equipe de agentes: as demais esperam pelo mesmo resultado (ou pelo mesmo erro).
+
+A coordenação acontece em dois níveis:
+1. Entre threads do mesmo processo: o primeiro chamador cria um Future e os
+   seguintes esperam por ele.
+2. Entre processos: o primeiro chamador de cada processo trava um arquivo de
+   lock por chave. Quem esperou pelo lock consulta o cache (e o registro de
+   erro) antes de rodar a equipe novamente.
+"""
+
+# Importações de bibliotecas padrão do Python
+import hashlib      # Para transformar a chave em um nome de arquivo seguro
+import json         # Para gravar o registro de erro compartilhado
+import os           # Para ler variáveis de ambiente e manipular arquivos
+import threading    # Para coordenar threads do mesmo processo
+import time         # Para saber desde quando um chamador está esperando
+from concurrent.futures import Future  # Resultado compartilhado entre threads
+from contextlib import contextmanager  # Para criar o gerenciador do lock de arquivo
+
+# O módulo fcntl só existe em sistemas Unix (Linux, Mac, Docker)
+# No Windows a coordenação fica restrita às threads do mesmo processo
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Diretório onde ficam os arquivos de lock e os registros de erro
+LOCK_DIR = os.getenv("NEWS_LOCK_DIR", os.path.join(".cache", "yournews", "locks"))
+
+
+class RemoteFlightError(RuntimeError):
+    """Erro ocorrido em outro processo que estava gerando o mesmo resultado"""
+
+
+class Abandoned(Exception):
+    """
+    O chamador que estava executando desistiu (ex.: cancelou a busca).
+
+    Não é um erro do resultado: ele não é repassado a quem esperava nem gravado
+    para os outros processos. Quem esperava tenta de novo e um deles executa.
+    """
+
+
+class SingleFlight:
+    """Garante uma única execução em andamento por chave, entre threads e processos"""
+
+    def __init__(self, lock_dir=LOCK_DIR):
+        self.lock_dir = lock_dir
+        os.makedirs(self.lock_dir, exist_ok=True)
+        # Chamadas em andamento neste processo: chave -> Future
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key, suffix):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.lock_dir, f"{digest}{suffix}")
+
+    @contextmanager
+    def _process_lock(self, key):
+        """
+        Trava o arquivo de lock da chave enquanto a execução acontece.
+
+        Yields:
+            float | None: Momento em que começou a espera, ou None se o lock estava livre
+        """
+        if fcntl is None:
+            yield None
+            return
+
+        with open(self._path(key, ".lock"), "a+") as handle:
+            waited_since = None
+            try:
+                # Primeiro tentamos sem bloquear, para saber se outro processo está rodando
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                waited_since = time.time()
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield waited_since
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _record_error(self, key, error):
+        """Grava o erro para que processos que estavam esperando também o recebam"""
+        with open(self._path(key, ".err"), "w", encoding="utf-8") as handle:
+            json.dump({"time": time.time(), "error": f"{type(error).__name__}: {error}"}, handle)
+
+    def _recent_error(self, key, since):
+        """Retorna a mensagem de erro gravada por outro processo depois de 'since'"""
+        try:
+            with open(self._path(key, ".err"), encoding="utf-8") as handle:
+                record = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        return record["error"] if record.get("time", 0) >= since else None
+
+    def _clear_error(self, key):
+        try:
+            os.remove(self._path(key, ".err"))
+        except OSError:
+            pass
+
+    def do(self, key, fn, recheck=None):
+        """
+        Executa fn uma única vez para cada chave em andamento.
+
+        Args:
+            key (str): Chave que identifica a execução (ex.: a chave do cache)
+            fn (callable): Função sem argumentos que produz o resultado
+            recheck (callable, optional): Função chamada com o momento em que a
+                espera pelo lock de outro processo começou; se retornar algo
+                diferente de None, esse valor é usado e fn não é executada
+
+        Returns:
+            O resultado de fn (o mesmo objeto para todos os chamadores simultâneos)
+
+        Raises:
+            Exception: O mesmo erro levantado por fn é repassado a todos que esperavam
+                (exceto Abandoned, que só chega a quem desistiu)
+        """
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = Future()
+                    self._calls[key] = future
+            if leader:
+                break
+            # Quem não é o primeiro apenas espera pelo resultado do primeiro
+            # Future.result() levanta a mesma exceção caso a execução tenha falhado
+            try:
+                return future.result()
+            except Abandoned:
+                # O primeiro desistiu: tentamos de novo, talvez como o primeiro
+                continue
+
+        try:
+            with self._process_lock(key) as waited_since:
+                result = None
+                if waited_since is not None:
+                    # Outro processo estava gerando o mesmo resultado
+                    error = self._recent_error(key, waited_since)
+                    if error:
+                        raise RemoteFlightError(error)
+                    if recheck is not None:
+                        result = recheck(waited_since)
+                if result is None:
+                    try:
+                        result = fn()
+                    except Abandoned:
+                        # Os outros processos não herdam a desistência: quem pegar
+                        # o lock depois roda a busca normalmente
+                        raise
+                    except Exception as e:
+                        self._record_error(key, e)
+                        raise
+                    self._clear_error(key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+# Instância única, criada na primeira utilização
+_singleflight = None
+_singleflight_lock = threading.Lock()
+
+
+def get_singleflight():
+    """
+    Retorna a instância compartilhada do coordenador de buscas simultâneas.
+
+    Returns:
+        SingleFlight: O coordenador usado por search_news
+    """
+    global _singleflight
+    with _singleflight_lock:
+        if _singleflight is None:
+            _singleflight = SingleFlight()
+        return _singleflight
@@ -0,0 +1,391 @@
+"""
+YourNews - Acervo Local de Artigos
+
+Cada busca começava do zero no Serper, mesmo quando os artigos lidos ontem para
+assuntos parecidos ainda eram relevantes. Este módulo guarda todos os artigos
+lidos (pela pré-busca, pela ferramenta do agente e pelo pesquisador) em um
+banco SQLite com:
+
+- Um índice de texto completo (FTS5), para encontrar artigos pelas palavras.
+- Um vetor ("embedding") de cada artigo, calculado localmente com NumPy a partir
+  das mesmas palavras usadas no agrupamento de duplicatas (dedup.py), usado
+  para reordenar os resultados por similaridade com o assunto.
+- A data em que o assunto foi buscado na web pela última vez, para que a web
+  seja consultada só para completar lacunas ou trazer o que é mais novo.
+
+Políticas de retenção (idade máxima e quantidade máxima de artigos) e a
+compactação do índice mantêm o banco com tamanho limitado.
+"""
+
+# Importações de bibliotecas padrão do Python
+import hashlib   # Para espalhar as palavras pelas posições do vetor
+import os        # Para ler variáveis de ambiente e criar diretórios
+import re        # Para ler as datas de publicação ("há 3 dias", "5 de jan. de 2026")
+import sqlite3   # Banco de dados em arquivo, com índice de texto completo (FTS5)
+import threading # Para proteger as conexões SQLite
+import time      # Para as datas de indexação e a retenção
+from datetime import datetime  # Para converter as datas de publicação
+
+# Bibliotecas externas
+import numpy as np  # Para os vetores e a similaridade de cosseno
+
+# Palavras normalizadas (sem acentos e stopwords), as mesmas do agrupamento de duplicatas
+from .dedup import tokenize
+
+# Normalização do assunto (sem acentos e maiúsculas), a mesma do cache de resultados
+from utils.cache import normalize_subject
+
+# ===== CONFIGURAÇÕES =====
+# Arquivo do acervo de artigos
+ARTICLE_DB_PATH = os.getenv("NEWS_ARTICLE_DB_PATH", os.path.join(".cache", "yournews", "articles.sqlite3"))
+# Por quantos dias um artigo fica no acervo
+ARTICLE_RETENTION_DAYS = float(os.getenv("NEWS_ARTICLE_RETENTION_DAYS", "14"))
+# Quantidade máxima de artigos no acervo (os mais antigos saem primeiro)
+ARTICLE_MAX_ROWS = int(os.getenv("NEWS_ARTICLE_MAX_ROWS", "20000"))
+# Se o assunto foi buscado na web há menos que isso (em segundos), o acervo basta
+ARTICLE_FRESH_SECONDS = int(os.getenv("NEWS_ARTICLE_FRESH_SECONDS", "10800"))
+# Quantidade mínima de artigos do acervo para dispensar a busca na web
+ARTICLE_MIN_RESULTS = int(os.getenv("NEWS_ARTICLE_MIN_RESULTS", "15"))
+# Período das notícias pedidas pela pesquisa (a última semana), em dias: artigos
+# publicados antes disso não voltam do acervo como notícia
+ARTICLE_WINDOW_DAYS = float(os.getenv("NEWS_ARTICLE_WINDOW_DAYS", "7"))
+
+# Tamanho dos vetores dos artigos
+_DIMENSIONS = 256
+# A compactação roda a cada tantas gravações
+_COMPACT_EVERY = 200
+
+
+def embed(text):
+    """
+    Calcula o vetor de um texto ("hashing trick" sobre palavras e pares de palavras).
+
+    Não depende de nenhum modelo ou API externa: cada palavra soma 1 (ou -1) em
+    uma posição do vetor escolhida pelo hash da palavra.
+
+    Args:
+        text (str): Texto do artigo ou assunto da busca
+
+    Returns:
+        numpy.ndarray: Vetor normalizado (comprimento 1) de _DIMENSIONS posições
+    """
+    vector = np.zeros(_DIMENSIONS, dtype=np.float32)
+    for word in tokenize(text):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        vector[value % _DIMENSIONS] += 1.0 if value & (1 << 63) else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# Datas relativas ("3 days ago", "há 3 dias") e meses abreviados, em inglês e português
+_RELATIVE_DATE = re.compile(r"(\d+)\s*(min|hour|hora|day|dia|week|semana|month|m[eê]s)", re.IGNORECASE)
+_UNIT_SECONDS = {"min": 60, "hour": 3600, "hora": 3600, "day": 86400, "dia": 86400,
+                 "week": 604800, "semana": 604800, "month": 2592000, "mes": 2592000, "mês": 2592000}
+_MONTHS = {name: number for number, names in enumerate((
+    ("jan",), ("feb", "fev"), ("mar",), ("apr", "abr"), ("may", "mai"), ("jun",),
+    ("jul",), ("aug", "ago"), ("sep", "set"), ("oct", "out"), ("nov",), ("dec", "dez"),
+), start=1) for name in names}
+_DAY_MONTH_YEAR = re.compile(r"(\d{1,2})\s+(?:de\s+)?([a-zç]{3})[a-zç]*\.?\s+(?:de\s+)?(\d{4})", re.IGNORECASE)
+_MONTH_DAY_YEAR = re.compile(r"([a-z]{3})[a-z]*\.?\s+(\d{1,2}),?\s+(\d{4})", re.IGNORECASE)
+
+
+def published_timestamp(text, now=None):
+    """
+    Converte a data de publicação informada pela fonte em um momento (time.time()).
+
+    Entende datas relativas ("3 days ago", "há 2 horas"), ISO ("2026-01-05") e
+    com o mês abreviado ("Jan 5, 2026", "5 de jan. de 2026").
+
+    Args:
+        text (str): Data como veio da busca ou do pesquisador
+        now (float, optional): Momento de referência das datas relativas (padrão: agora)
+
+    Returns:
+        float | None: Momento da publicação, ou None se a data não for reconhecida
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+    now = time.time() if now is None else now
+    try:
+        return datetime.fromisoformat(text[:10]).timestamp()
+    except ValueError:
+        pass
+    match = _RELATIVE_DATE.search(text)
+    if match:
+        unit = match.group(2).lower()
+        return now - int(match.group(1)) * _UNIT_SECONDS[unit]
+    for pattern, order in ((_DAY_MONTH_YEAR, (1, 2, 3)), (_MONTH_DAY_YEAR, (2, 1, 3))):
+        match = pattern.search(text)
+        if match:
+            day, month, year = (match.group(index) for index in order)
+            month = _MONTHS.get(month.lower()[:3])
+            if month is None:
+                continue
+            try:
+                return datetime(int(year), month, int(day)).timestamp()
+            except ValueError:
+                continue
+    return None
+
+
+def _match_query(topic):
+    """Monta a consulta FTS5: qualquer uma das palavras do assunto (entre aspas, sem operadores)"""
+    words = [word for word in tokenize(topic) if "_" not in word]
+    return " OR ".join(f'"{word}"' for word in dict.fromkeys(words))
+
+
+class ArticleStore:
+    """Acervo de artigos em SQLite, com busca por palavras (FTS5) e por similaridade"""
+
+    def __init__(self, db_path=ARTICLE_DB_PATH, retention_days=ARTICLE_RETENTION_DAYS, max_rows=ARTICLE_MAX_ROWS):
+        self.db_path = db_path
+        self.retention_seconds = retention_days * 86400
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                " id INTEGER PRIMARY KEY,"
+                " url_key TEXT UNIQUE NOT NULL,"
+                " url TEXT NOT NULL,"
+                " title TEXT NOT NULL,"
+                " source TEXT NOT NULL DEFAULT '',"
+                " published_at TEXT NOT NULL DEFAULT '',"
+                " snippet TEXT NOT NULL DEFAULT '',"
+                " content TEXT NOT NULL DEFAULT '',"
+                " embedding BLOB,"
+                " indexed_at REAL NOT NULL,"
+                " published_ts REAL);"
+                "CREATE INDEX IF NOT EXISTS articles_indexed ON articles (indexed_at);"
+                # Índice de texto completo que acompanha a tabela de artigos
+                "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+                " title, snippet, content, content='articles', content_rowid='id',"
+                " tokenize='unicode61 remove_diacritics 2');"
+                "CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN"
+                " INSERT INTO articles_fts (rowid, title, snippet, content)"
+                " VALUES (new.id, new.title, new.snippet, new.content); END;"
+                "CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN"
+                " INSERT INTO articles_fts (articles_fts, rowid, title, snippet, content)"
+                " VALUES ('delete', old.id, old.title, old.snippet, old.content); END;"
+                "CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN"
+                " INSERT INTO articles_fts (articles_fts, rowid, title, snippet, content)"
+                " VALUES ('delete', old.id, old.title, old.snippet, old.content);"
+                " INSERT INTO articles_fts (rowid, title, snippet, content)"
+                " VALUES (new.id, new.title, new.snippet, new.content); END;"
+                # Quando cada assunto foi buscado na web pela última vez
+                "CREATE TABLE IF NOT EXISTS web_queries ("
+                " topic TEXT PRIMARY KEY,"
+                " queried_at REAL NOT NULL);"
+            )
+            # Acervos criados por versões anteriores não têm a data de publicação convertida
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(articles)")}
+            if "published_ts" not in columns:
+                conn.execute("ALTER TABLE articles ADD COLUMN published_ts REAL")
+
+    def _connection(self):
+        """Retorna a conexão SQLite da thread atual, criando-a se necessário"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, articles):
+        """
+        Guarda (ou atualiza) artigos no acervo.
+
+        Um artigo que já existe mantém o texto completo que tinha, caso o novo
+        registro traga apenas o resumo, e a data em que foi indexado pela primeira
+        vez (é ela que conta para a retenção).
+
+        Args:
+            articles (list[dict]): Artigos com url, title e, opcionalmente,
+                source, date, snippet e content
+        """
+        # Importado aqui porque retrieval.py também importa este módulo;
+        # a URL normalizada reconhece o mesmo artigo com endereços diferentes
+        from .retrieval import canonicalize_url
+
+        now = time.time()
+        rows = []
+        for article in articles:
+            if not article.get("url"):
+                continue
+            text = f"{article.get('title', '')} {article.get('content') or article.get('snippet', '')}"
+            rows.append((
+                canonicalize_url(article["url"]), article["url"], article.get("title", ""),
+                article.get("source", ""), article.get("date", ""), article.get("snippet", ""),
+                article.get("content", ""), embed(text).tobytes(), now,
+                published_timestamp(article.get("date", ""), now),
+            ))
+        if not rows:
+            return
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO articles (url_key, url, title, source, published_at, snippet, content, embedding,"
+                " indexed_at, published_ts)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(url_key) DO UPDATE SET"
+                "  title = CASE WHEN excluded.title != '' THEN excluded.title ELSE title END,"
+                "  source = CASE WHEN excluded.source != '' THEN excluded.source ELSE source END,"
+                "  published_at = CASE WHEN excluded.published_at != '' THEN excluded.published_at ELSE published_at END,"
+                "  snippet = CASE WHEN excluded.snippet != '' THEN excluded.snippet ELSE snippet END,"
+                "  content = CASE WHEN excluded.content != '' THEN excluded.content ELSE content END,"
+                "  embedding = CASE WHEN excluded.content != '' OR content = '' THEN excluded.embedding ELSE embedding END,"
+                # Datas relativas ("há 3 dias") ficam mais imprecisas a cada nova leitura:
+                # vale a primeira data reconhecida
+                "  published_ts = COALESCE(published_ts, excluded.published_ts)",
+                rows,
+            )
+        with self._lock:
+            self._writes += len(rows)
+            due = self._writes >= _COMPACT_EVERY
+            if due:
+                self._writes = 0
+        if due:
+            self.compact()
+
+    def search(self, topic, limit=30, max_age_seconds=None):
+        """
+        Procura no acervo os artigos mais relacionados a um assunto.
+
+        Primeiro o índice de texto completo seleciona os artigos que contêm as
+        palavras do assunto; depois eles são reordenados combinando a nota do
+        índice (BM25) com a similaridade entre os vetores.
+
+        Args:
+            topic (str): Assunto da busca
+            limit (int): Quantidade máxima de artigos
+            max_age_seconds (float, optional): Idade máxima dos artigos (padrão: a
+                retenção), contada da primeira indexação e, quando a data de
+                publicação é conhecida, também da publicação
+
+        Returns:
+            list[dict]: Artigos no formato dos candidatos da pré-busca
+                (title, url, source, date, snippet, content)
+        """
+        query = _match_query(topic)
+        if not query:
+            return []
+        since = time.time() - (max_age_seconds or self.retention_seconds)
+        rows = self._connection().execute(
+            "SELECT a.url, a.title, a.source, a.published_at, a.snippet, a.content, a.embedding,"
+            " bm25(articles_fts) AS rank"
+            " FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid"
+            " WHERE articles_fts MATCH ? AND a.indexed_at >= ?"
+            " AND (a.published_ts IS NULL OR a.published_ts >= ?)"
+            " ORDER BY rank LIMIT ?",
+            (query, since, since, limit * 4),
+        ).fetchall()
+        if not rows:
+            return []
+
+        # BM25 do SQLite é negativo (quanto menor, melhor): convertemos para 0 a 1
+        ranks = -np.array([row[7] for row in rows], dtype=np.float32)
+        spread = ranks.max() - ranks.min()
+        text_scores = (ranks - ranks.min()) / spread if spread else np.ones_like(ranks)
+        vectors = np.stack([np.frombuffer(row[6], dtype=np.float32) for row in rows])
+        vector_scores = vectors @ embed(topic)
+        scores = 0.5 * text_scores + 0.5 * vector_scores
+
+        order = np.argsort(-scores)[:limit]
+        return [
+            {
+                "title": rows[index][1], "url": rows[index][0], "source": rows[index][2],
+                "date": rows[index][3], "snippet": rows[index][4], "content": rows[index][5],
+            }
+            for index in order
+        ]
+
+    def known_urls(self, urls):
+        """
+        Diz quais endereços já estão no acervo com o texto completo.
+
+        Args:
+            urls (list[str]): Endereços normalizados (canonicalize_url)
+
+        Returns:
+            dict: Endereço normalizado -> texto do artigo
+        """
+        known = {}
+        conn = self._connection()
+        urls = list(urls)
+        # O SQLite limita a quantidade de parâmetros por consulta
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            for url_key, content in conn.execute(
+                f"SELECT url_key, content FROM articles WHERE content != '' AND url_key IN ({marks})", chunk
+            ):
+                known[url_key] = content
+        return known
+
+    def last_web_query(self, topic):
+        """Momento (time.time()) da última busca na web sobre o assunto, ou None"""
+        row = self._connection().execute(
+            "SELECT queried_at FROM web_queries WHERE topic = ?", (normalize_subject(topic),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def mark_web_query(self, topic):
+        """Registra que o assunto acabou de ser buscado na web"""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO web_queries (topic, queried_at) VALUES (?, ?)"
+                " ON CONFLICT(topic) DO UPDATE SET queried_at = excluded.queried_at",
+                (normalize_subject(topic), time.time()),
+            )
+
+    def compact(self):
+        """
+        Aplica a retenção e compacta o índice.
+
+        Remove os artigos mais antigos que a retenção e, se ainda houver mais que
+        o máximo, os indexados há mais tempo. Depois junta os segmentos do índice
+        de texto completo (FTS5 "optimize").
+
+        Returns:
+            int: Quantidade de artigos removidos
+        """
+        now = time.time()
+        with self._connection() as conn:
+            removed = conn.execute(
+                "DELETE FROM articles WHERE indexed_at < ?", (now - self.retention_seconds,)
+            ).rowcount
+            removed += conn.execute(
+                "DELETE FROM articles WHERE id IN ("
+                " SELECT id FROM articles ORDER BY indexed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            ).rowcount
+            conn.execute("DELETE FROM web_queries WHERE queried_at < ?", (now - self.retention_seconds,))
+            conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+        return removed
+
+    def stats(self):
+        """Quantidade de artigos e tamanho do arquivo do acervo"""
+        count = self._connection().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        return {"articles": count, "bytes": size}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_article_store():
+    """Retorna o acervo compartilhado por todo o processo"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArticleStore()
+        return _store
@@ -0,0 +1,56 @@
+"""
+YourNews - Agentes com Orçamento de Tempo
+
+O BudgetedAgent funciona como um Agent comum, mas respeita o prazo da busca
+(veja utils/deadline.py): quando o orçamento da etapa acaba, em vez de um erro,
+devolve o resultado parcial preparado pela equipe para aquela etapa.
+"""
+
+# Importações do CrewAI
+from crewai import Agent
+
+# Prazo da busca e orçamento de cada etapa
+from utils.deadline import BudgetExceeded, current_deadline, is_budget_exceeded
+
+# Erros passageiros das APIs (inclusive tempo esgotado)
+from utils.ratelimit import is_retryable
+
+
+class BudgetedAgent(Agent):
+    """Agent que, sem tempo, entrega o resultado parcial da etapa"""
+
+    def execute_task(self, task, context=None, tools=None):
+        deadline = current_deadline()
+        if deadline is None:
+            return super().execute_task(task, context, tools)
+        if deadline.expired():
+            return self.partial_result(deadline, task, context)
+        try:
+            return super().execute_task(task, context, tools)
+        except Exception as e:
+            # Tempo esgotado de uma chamada ao LLM no fim da etapa também conta
+            if not (is_budget_exceeded(e) or (deadline.expired() and is_retryable(e))):
+                raise
+            return self.partial_result(deadline, task, context)
+
+    def partial_result(self, deadline, task, context=None):
+        """
+        Resultado da etapa quando o orçamento de tempo acaba.
+
+        Args:
+            deadline (Deadline): Prazo da busca
+            task (Task): Tarefa que estava sendo executada
+            context (str, optional): Resultado das tarefas anteriores
+
+        Returns:
+            str: Resultado parcial, criado pela função da equipe para a etapa
+
+        Raises:
+            BudgetExceeded: Se a equipe não definiu um resultado parcial para a etapa
+        """
+        stage = deadline.stage
+        deadline.mark_exceeded(stage)
+        fallback = deadline.fallbacks.get(stage)
+        if fallback is None:
+            raise BudgetExceeded(stage)
+        return fallback(task, context or "")
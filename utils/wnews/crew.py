@@ -7,11 +7,145 @@
 
 # Importações do framework CrewAI
 from crewai import Agent, Crew, Process, Task  # Classes principais do CrewAI
-from crewai.project import CrewBase, agent, crew, task  # Decoradores para facilitar a criação de projetos
-from crewai_tools import ScrapeWebsiteTool, SerperDevTool  # Ferramentas que os agentes podem usar
-from pydantic import BaseModel  # Para validação de dados
+from crewai.project import CrewBase, agent, before_kickoff, crew, task  # Decoradores para facilitar a criação de projetos
+from crewai.crews.crew_output import CrewOutput  # Resultado da equipe
+from crewai.tasks.task_output import TaskOutput  # Resultado de uma tarefa (usado no replay)
+from crewai.types.usage_metrics import UsageMetrics  # Contagem de tokens usados
 import yaml  # Para ler arquivos de configuração YAML
 import os  # Para manipulação de caminhos de arquivos
+import json  # Para guardar os resultados de cada etapa como artefatos
+import threading  # Para saber qual execução está acompanhando o andamento
+import time  # Para medir a duração dos passos dos agentes e das chamadas ao LLM
+import uuid  # Para identificar as execuções sem registro de desempenho
+
+# Medições de desempenho (duração de etapas, ferramentas e chamadas ao LLM)
+from utils.metrics import count, current_trace, record_span
+
+# Resultados de cada etapa, guardados por execução
+from utils.artifacts import get_artifact_store
+
+# Prazo da busca: cada etapa tem um orçamento de tempo (veja utils/deadline.py)
+from utils.deadline import attach_deadline, current_deadline
+
+# Pré-busca paralela das notícias, feita antes de o agente pesquisador começar
+from .retrieval import SERPER_BASE_URL, canonicalize_url, format_candidates, retrieve
+
+# Agrupamento de notícias quase duplicadas (ex.: textos de agência republicados)
+from .dedup import deduplicate_items, deduplicate_text
+
+# Acervo local com os artigos lidos, consultado antes da web
+from .article_store import get_article_store
+
+# Formato estruturado (Pydantic) dos resultados da pesquisa e da curadoria
+from .models import CurationResult, NewsAnalysis, NewsItem, ResearchResult
+
+# Atualização incremental: só as notícias novas desde a última execução do assunto
+from .incremental import INCREMENTAL, INCREMENTAL_MAX_ITEMS, NothingNew, get_topic_state_store, pair_analyses
+
+# Curador que analisa as notícias em lotes, com várias chamadas ao LLM ao mesmo tempo
+from .curation import ParallelCuratorAgent
+
+# Agente que entrega um resultado parcial quando o orçamento de tempo da etapa acaba
+from .budget import BudgetedAgent
+
+# Ferramentas dos agentes: leitura de artigos (com cache e extração do texto
+# principal) e busca no Serper com limite de requisições
+from .tools.custom_tool import ArticleScrapeTool, RateLimitedSerperTool
+
+# LLM dos agentes, com limite de requisições compartilhado entre os processos
+from .llm import build_llm
+
+# O barramento de eventos do CrewAI avisa o uso de ferramentas, as chamadas ao
+# LLM e cada pedaço de texto (token) gerado quando o LLM roda em modo streaming.
+# Versões antigas do CrewAI não têm esse recurso; nesse caso, a newsletter
+# aparece de uma vez ao final da etapa e essas medições ficam de fora.
+try:
+    from crewai.utilities.events import crewai_event_bus
+    from crewai.utilities.events.llm_events import (
+        LLMCallCompletedEvent,
+        LLMCallFailedEvent,
+        LLMCallStartedEvent,
+        LLMStreamChunkEvent,
+    )
+    from crewai.utilities.events.tool_usage_events import ToolUsageFinishedEvent
+except ImportError:  # pragma: no cover - depende da versão do CrewAI
+    crewai_event_bus = None
+    LLMStreamChunkEvent = None
+
+# Se "1", o editor escreve a newsletter em modo streaming e o texto aparece
+# na tela enquanto é gerado
+STREAM_TOKENS = os.getenv("NEWS_STREAM_TOKENS", "1") == "1" and LLMStreamChunkEvent is not None
+
+# Relevância mínima (1 a 10) e quantidade máxima das notícias entregues ao curador
+MIN_RELEVANCE = int(os.getenv("NEWS_MIN_RELEVANCE", "0"))
+MAX_ITEMS = int(os.getenv("NEWS_MAX_ITEMS", "30"))
+
+# Quantidade máxima de iterações (pensamento + ferramenta) de cada agente
+RESEARCH_MAX_ITER = int(os.getenv("NEWS_RESEARCH_MAX_ITER", "8"))
+CURATION_MAX_ITER = int(os.getenv("NEWS_CURATION_MAX_ITER", "5"))
+EDITING_MAX_ITER = int(os.getenv("NEWS_EDITING_MAX_ITER", "3"))
+
+# Etapas da equipe, na ordem em que são executadas
+STAGES = ("research", "curation", "editing")
+
+# Aviso no início da newsletter quando o editor não termina dentro do prazo
+PARTIAL_NOTICE = (
+    "> ⚠️ **Partial newsletter:** there was not enough time to finish editing, "
+    "so the analysed news items are shown as they are."
+)
+
+# Cada execução roda inteira na mesma thread (processo sequencial), então
+# guardamos aqui a função de andamento da execução atual daquela thread
+# (veja kickoff_crew no final deste arquivo)
+_current_run = threading.local()
+
+
+if STREAM_TOKENS:
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _on_stream_chunk(source, event):
+        """Repassa cada token gerado pelo LLM para a execução da thread atual"""
+        # Sem tempo na etapa, a geração é interrompida (o agente entrega o resultado parcial)
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check()
+        progress = getattr(_current_run, "progress", None)
+        if progress is not None:
+            progress("token", "editing", event.chunk)
+
+    # O "ouvinte" padrão do CrewAI imprime cada token no terminal (stdout): com
+    # várias buscas ao mesmo tempo, os textos se misturam na saída do servidor, e
+    # ele ainda guarda em memória tudo o que já imprimiu. Só o nosso fica registrado.
+    _stream_handlers = getattr(crewai_event_bus, "_handlers", {}).get(LLMStreamChunkEvent)
+    if _stream_handlers is not None:
+        _stream_handlers[:] = [
+            handler for handler in _stream_handlers
+            if not getattr(handler, "__module__", "").startswith("crewai.")
+        ]
+
+
+if crewai_event_bus is not None:
+    @crewai_event_bus.on(ToolUsageFinishedEvent)
+    def _on_tool_finished(source, event):
+        """Mede a duração de cada uso de ferramenta pelos agentes"""
+        duration = (event.finished_at - event.started_at).total_seconds()
+        record_span("tool", event.tool_name, duration, from_cache=event.from_cache)
+
+    @crewai_event_bus.on(LLMCallStartedEvent)
+    def _on_llm_started(source, event):
+        _current_run.llm_started = time.perf_counter()
+
+    @crewai_event_bus.on(LLMCallCompletedEvent)
+    def _on_llm_completed(source, event):
+        """Mede a duração de cada chamada ao LLM (uma por iteração do agente)"""
+        started = getattr(_current_run, "llm_started", None)
+        if started is not None:
+            record_span("llm", getattr(source, "model", "llm"), time.perf_counter() - started)
+            _current_run.llm_started = None
+
+    @crewai_event_bus.on(LLMCallFailedEvent)
+    def _on_llm_failed(source, event):
+        count("yournews_llm_errors_total")
+        _current_run.llm_started = None
 
 
 # O decorador @CrewBase indica que esta classe define uma equipe de agentes
@@ -47,13 +181,236 @@ class Wnews():
     agents_config = "config/agents.yaml"  # Configurações dos agentes (personalidade, objetivos, etc.)
     tasks_config = "config/tasks.yaml"    # Configurações das tarefas (descrições, instruções, etc.)
 
+    # ===== ACOMPANHAMENTO DO ANDAMENTO =====
+    # As funções abaixo avisam quem chamou a equipe sobre o que está acontecendo,
+    # permitindo mostrar os resultados de cada etapa assim que ficam prontos.
+    # A função que recebe o andamento é a da execução atual da thread, definida
+    # por kickoff_crew, e é chamada como progress(evento, etapa, conteúdo), onde
+    # evento é "start", "update", "token" ou "done" e etapa é um dos nomes em STAGES
+    
+    def _emit(self, event, stage, content=""):
+        """Envia um evento de andamento, se alguém estiver acompanhando"""
+        # O começo de uma etapa é também o começo do seu orçamento de tempo
+        deadline = current_deadline()
+        if event == "start" and deadline is not None:
+            deadline.start(stage)
+        progress = getattr(_current_run, "progress", None)
+        if progress is not None:
+            progress(event, stage, content)
+    
+    def _step_callback(self, stage):
+        """Cria a função chamada a cada passo (pensamento ou uso de ferramenta) de um agente"""
+        def on_step(step):
+            # Mede o tempo desde o passo anterior (ou desde o início da etapa)
+            now = time.perf_counter()
+            last = getattr(_current_run, "last_step", None)
+            if last is not None:
+                record_span("agent_step", stage, now - last)
+            _current_run.last_step = now
+            
+            # Sem tempo na etapa, o agente para aqui e entrega o resultado parcial
+            deadline = current_deadline()
+            if deadline is not None:
+                deadline.check()
+            
+            # Quando o passo foi o uso de uma ferramenta, repassamos o que ela
+            # retornou (ex.: os resultados de busca do pesquisador)
+            result = getattr(step, "result", None)
+            tool = getattr(step, "tool", None)
+            if tool and result:
+                count("yournews_tool_result_bytes_total", {"tool": tool}, len(str(result).encode("utf-8")))
+                self._emit("update", stage, f"**{tool}**\n\n{str(result)[:1500]}")
+        return on_step
+    
+    def _task_callback(self, stage):
+        """Cria a função chamada quando a tarefa de uma etapa termina"""
+        def on_done(output):
+            _current_run.last_step = time.perf_counter()
+            # Resultados estruturados são mostrados em Markdown, mais fácil de ler
+            structured = output.pydantic
+            self._emit("done", stage, structured.to_markdown() if hasattr(structured, "to_markdown") else output.raw)
+            # Guarda o resultado da etapa (e a versão estruturada) para o replay
+            run_id = getattr(_current_run, "run_id", None)
+            if run_id is not None:
+                get_artifact_store().put(run_id, stage, json.dumps({
+                    "raw": output.raw,
+                    "pydantic": structured.model_dump() if structured is not None else None,
+                }, ensure_ascii=False))
+            # No processo sequencial, o fim de uma etapa é o começo da próxima
+            position = STAGES.index(stage)
+            if position + 1 < len(STAGES):
+                self._emit("start", STAGES[position + 1])
+        return on_done
+    
+    def _deduplicate_research(self, output):
+        """Remove notícias repetidas do resultado da pesquisa antes de a curadoria começar
+        
+        É usada como "guardrail" da tarefa de pesquisa: o resultado retornado aqui
+        substitui o original e é o que o curador recebe como contexto. As notícias
+        são ordenadas por relevância e entregues ao curador em uma lista compacta,
+        com uma linha por notícia.
+        """
+        research = output.pydantic
+        if research is None:
+            # O modelo não respondeu no formato estruturado: tratamos o texto livre
+            text, removed = deduplicate_text(output.raw)
+            if removed:
+                print(f"Info: Merged {removed} near-duplicate news items before curation.")
+            return (True, text)
+        
+        items, removed = deduplicate_items(research.items)
+        if removed:
+            print(f"Info: Merged {removed} near-duplicate news items before curation.")
+        output.pydantic = ResearchResult(items=items).ranked(MIN_RELEVANCE, MAX_ITEMS)
+        # As notícias confirmadas pelo pesquisador também entram no acervo local
+        get_article_store().add([
+            {"url": item.url, "title": item.title, "source": item.source,
+             "date": item.published_at, "snippet": item.summary}
+            for item in output.pydantic.items
+        ])
+        
+        # Na atualização incremental, só o que é novo (ou mudou) vai para a curadoria
+        previous = getattr(_current_run, "previous", None)
+        if previous is not None:
+            fresh = [item for item in output.pydantic.items
+                     if not previous.is_unchanged(canonicalize_url(item.url), item)]
+            output.pydantic = ResearchResult(items=fresh)
+        _current_run.fresh_items = list(output.pydantic.items)
+        output.raw = output.pydantic.to_prompt()
+        output.json_dict = None
+        return (True, output)
+    
+    def _compact_analyses(self, output):
+        """Entrega ao editor as análises em blocos compactos, em vez do JSON completo
+        
+        É usada como "guardrail" da tarefa de curadoria. Na atualização
+        incremental, as análises novas são juntadas às mantidas da edição anterior.
+        """
+        if output.pydantic is None:
+            return (True, output)
+        
+        analyses = list(output.pydantic.analyses)
+        fresh_items = getattr(_current_run, "fresh_items", None)
+        if fresh_items is not None:
+            now = time.time()
+            entries = {
+                url_key: {"first_seen": now, "item": item, "analysis": analysis}
+                for url_key, (item, analysis) in pair_analyses(fresh_items, analyses).items()
+            }
+            # Notícias sem análise (lote fora do formato) não entram no estado e
+            # voltam como candidatas na próxima atualização, para serem analisadas
+            seen = getattr(_current_run, "seen", None) or {}
+            for item in fresh_items:
+                if canonicalize_url(item.url) not in entries:
+                    seen.pop(canonicalize_url(item.url), None)
+            previous = getattr(_current_run, "previous", None)
+            if previous is not None:
+                for url_key, entry in previous.retained(exclude=set(entries)):
+                    if len(entries) >= INCREMENTAL_MAX_ITEMS:
+                        break
+                    entries[url_key] = entry
+                    analyses.append(entry["analysis"])
+            _current_run.entries = entries
+            output.pydantic = CurationResult(analyses=analyses)
+        
+        # Guardadas para a newsletter parcial, se o editor não terminar a tempo
+        _current_run.analyses = output.pydantic
+        output.raw = output.pydantic.to_prompt()
+        output.json_dict = None
+        return (True, output)
+    
+    @before_kickoff  # Executado antes de a equipe começar a trabalhar
+    def _prepare_inputs(self, inputs):
+        self._emit("start", STAGES[0])
+        _current_run.last_step = time.perf_counter()
+        
+        # Estado da última execução do assunto (None na primeira vez, ou
+        # quando o usuário pediu para ignorar os resultados guardados)
+        refresh = getattr(_current_run, "refresh", False)
+        previous = get_topic_state_store().load(inputs["topic"]) if INCREMENTAL and not refresh else None
+        _current_run.previous = previous
+        _current_run.fresh_items = None
+        _current_run.entries = None
+        _current_run.seen = dict(previous.seen) if previous else {}
+        _current_run.candidates = []
+        _current_run.analyses = None
+        
+        # Resultados parciais de cada etapa, usados quando o orçamento de tempo acaba
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.fallbacks = {
+                "research": self._research_fallback,
+                "curation": self._curation_fallback,
+                "editing": self._partial_newsletter,
+            }
+        inputs.setdefault("known_news", previous.known_news() if previous else "(nenhuma)")
+        
+        # Busca as notícias candidatas em paralelo e entrega a lista pronta
+        # ao pesquisador, que usa as ferramentas apenas para completar lacunas
+        if "candidates" not in inputs:
+            candidates = retrieve(inputs["topic"])
+            if previous is not None:
+                # Só o que não estava na edição anterior; se não houver nada novo,
+                # a newsletter anterior continua valendo e nenhum agente é acionado
+                known = previous.known_urls()
+                candidates = [candidate for candidate in candidates
+                              if canonicalize_url(candidate["url"]) not in known]
+                if not candidates:
+                    raise NothingNew(previous.newsletter)
+            # Os candidatos oferecidos agora não voltam na próxima atualização,
+            # mesmo os que o pesquisador deixar de fora
+            now = time.time()
+            for candidate in candidates:
+                _current_run.seen.setdefault(canonicalize_url(candidate["url"]), now)
+            _current_run.candidates = candidates
+            candidates = format_candidates(candidates)
+            self._emit("update", STAGES[0], candidates)
+            inputs["candidates"] = candidates
+        
+        # As entradas completas ficam com os artefatos: o replay não refaz a pré-busca
+        run_id = getattr(_current_run, "run_id", None)
+        if run_id is not None:
+            get_artifact_store().begin(run_id, {"topic": inputs["topic"], "inputs": inputs})
+        return inputs
+    
+    # ===== RESULTADOS PARCIAIS =====
+    # Quando o orçamento de tempo de uma etapa acaba, o agente entrega um destes
+    # resultados em vez de continuar (veja budget.py)
+    
+    def _research_fallback(self, task, context):
+        """Sem tempo para pesquisar: as notícias da pré-busca viram o resultado da pesquisa"""
+        items = [
+            NewsItem(
+                title=candidate["title"],
+                url=candidate["url"],
+                source=candidate.get("source") or "",
+                published_at=candidate.get("date") or "",
+                summary=" ".join((candidate.get("snippet") or candidate.get("content") or "").split())[:600],
+            )
+            for candidate in getattr(_current_run, "candidates", None) or []
+        ]
+        return ResearchResult(items=items).model_dump_json()
+    
+    def _curation_fallback(self, task, context):
+        """Sem tempo para analisar: o editor recebe a pesquisa como veio"""
+        return CurationResult(analyses=[NewsAnalysis(title="Notícias da pesquisa", analysis=context)]).model_dump_json()
+    
+    def _partial_newsletter(self, task, context):
+        """Sem tempo para editar: a newsletter parcial, com as análises prontas"""
+        analyses = getattr(_current_run, "analyses", None)
+        body = analyses.to_markdown() if analyses is not None and analyses.analyses else context
+        return f"{PARTIAL_NOTICE}\n\n{body}"
+    
+
     # ===== FERRAMENTAS DOS AGENTES =====
     # As ferramentas são recursos que os agentes podem usar para realizar suas tarefas
     # Por exemplo, ferramentas de busca na web, raspagem de sites, etc.
     
     # Exemplos de ferramentas disponíveis:
-    # - SerperDevTool(): permite que o agente faça buscas na web usando a API Serper
-    # - ScrapeWebsiteTool(): permite que o agente extraia informações de páginas web
+    # - RateLimitedSerperTool(): permite que o agente faça buscas na web usando a API Serper
+    #   (a SerperDevTool do CrewAI, respeitando o limite de requisições do Serper)
+    # - ArticleScrapeTool(): permite que o agente leia o texto principal de uma notícia
+    #   (definida em tools/custom_tool.py, com cache e limite de tokens)
     
     # Para saber mais sobre como adicionar ferramentas aos seus agentes:
     # https://docs.crewai.com/concepts/agents#agent-tools
@@ -69,11 +426,16 @@ class Wnews():
         Este agente é responsável por buscar notícias relevantes na internet.
         Ele usa ferramentas de busca na web e raspagem de sites para encontrar informações.
         """
-        return Agent(
+        return BudgetedAgent(
             # Carrega a configuração do agente do arquivo YAML (personalidade, objetivos, etc.)
             config=self.agents_config['news_researcher'],
+            # Limite de iterações: o pesquisador não fica chamando ferramentas indefinidamente
+            max_iter=RESEARCH_MAX_ITER,
             # Fornece ferramentas para o agente usar
-            tools=[SerperDevTool(),ScrapeWebsiteTool()],
+            tools=[RateLimitedSerperTool(base_url=SERPER_BASE_URL), ArticleScrapeTool()],
+            llm=build_llm(),
+            # Função chamada a cada passo do agente, usada para mostrar os resultados das buscas
+            step_callback=self._step_callback("research"),
             # Quando verbose=True, mostra detalhes do pensamento do agente durante a execução
             verbose=False
         )
@@ -84,10 +446,14 @@ class Wnews():
         
         Este agente analisa as notícias encontradas pelo pesquisador,
         identifica tendências e seleciona as informações mais relevantes.
+        As notícias são analisadas em lotes, com várias chamadas ao LLM ao mesmo tempo.
         """
-        return Agent(
+        return ParallelCuratorAgent(
             config=self.agents_config['news_curator_analyst'],
+            llm=build_llm(),
+            max_iter=CURATION_MAX_ITER,
             # Este agente não recebe ferramentas específicas, pois trabalha com os dados já coletados
+            step_callback=self._step_callback("curation"),
             verbose=False
         )
 
@@ -98,8 +464,13 @@ class Wnews():
         Este agente formata as informações analisadas em um formato de newsletter,
         garantindo que o conteúdo seja claro, conciso e bem estruturado.
         """
-        return Agent(
+        return BudgetedAgent(
             config=self.agents_config['newsletter_editor'],
+            max_iter=EDITING_MAX_ITER,
+            # Em modo streaming, o texto da newsletter chega aos poucos e pode
+            # ser mostrado na tela enquanto é escrito
+            llm=build_llm(stream=STREAM_TOKENS),
+            step_callback=self._step_callback("editing"),
             verbose=False
         )
 
@@ -121,8 +492,12 @@ class Wnews():
         return Task(
             # Carrega a configuração da tarefa do arquivo YAML (descrição, instruções, etc.)
             config=self.tasks_config['news_research_task'],
-            # Define um arquivo onde o resultado da tarefa será salvo
-            output_file='news_research.txt'
+            # A resposta do pesquisador é convertida em uma lista de NewsItem
+            output_pydantic=ResearchResult,
+            # Junta as notícias quase duplicadas antes de entregá-las ao curador
+            guardrail=self._deduplicate_research,
+            # Função chamada quando a tarefa termina, usada para mostrar o resultado da etapa
+            callback=self._task_callback("research")
         )
 
     @task
@@ -134,7 +509,10 @@ class Wnews():
         """
         return Task(
             config=self.tasks_config['news_curator_analyst_task'],
-            output_file='news_analysis.txt',
+            # Uma análise (NewsAnalysis) por notícia, entregue ao editor em blocos compactos
+            output_pydantic=CurationResult,
+            guardrail=self._compact_analyses,
+            callback=self._task_callback("curation"),
             # O parâmetro context define as dependências desta tarefa
             # Aqui, esta tarefa depende da tarefa de pesquisa e recebe seus resultados
             context=[self.news_research_task()]
@@ -149,7 +527,7 @@ class Wnews():
         """
         return Task(
             config=self.tasks_config['review_and_edit_task'],
-            output_file='r2talk_newsletter.md',  # Arquivo final da newsletter em formato Markdown
+            callback=self._task_callback("editing"),
             # Esta tarefa depende da tarefa de curadoria e análise
             context=[self.news_curator_analyst_task()]
         )
@@ -180,3 +558,136 @@ class Wnews():
             # Alternativa: process=Process.hierarchical - para um processo hierárquico
             # Saiba mais em: https://docs.crewai.com/how-to/Hierarchical/
         )
+
+
+# ===== MODELO PRÉ-CONSTRUÍDO DA EQUIPE =====
+# Criar a equipe com Wnews() lê os arquivos YAML e constrói agentes e ferramentas.
+# Para não repetir esse trabalho a cada busca, construímos uma equipe "modelo"
+# uma única vez por processo e, a cada execução, usamos uma cópia dela.
+# O modelo nunca é executado diretamente, pois o kickoff altera os agentes e
+# tarefas (por exemplo, substituindo {topic} pelo assunto da busca).
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def crew_template():
+    """
+    Retorna a equipe modelo, construída na primeira chamada.
+
+    Returns:
+        Crew: Equipe configurada, que deve ser copiada antes de cada execução
+    """
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = Wnews().crew()
+        return _template
+
+
+def kickoff_crew(inputs, progress=None, deadline=None, refresh=False):
+    """
+    Executa uma cópia da equipe modelo com as entradas informadas.
+
+    Args:
+        inputs (dict): Entradas da equipe (ex.: {'topic': 'inteligência artificial'})
+        progress (callable, optional): Função que recebe o andamento de cada etapa,
+            chamada como progress(evento, etapa, conteúdo)
+        deadline (Deadline, optional): Prazo da busca; quando o orçamento de uma
+            etapa acaba, ela segue com um resultado parcial
+        refresh (bool): Se True, ignora a edição anterior do assunto (modo
+            incremental) e gera a newsletter do zero
+
+    Returns:
+        CrewOutput: Resultado da equipe
+    """
+    crew = crew_template().copy()
+    _current_run.progress = progress
+    _current_run.refresh = refresh
+    # Os artefatos da execução usam o mesmo identificador do registro de desempenho
+    trace = current_trace()
+    _current_run.run_id = trace.run_id if trace is not None else uuid.uuid4().hex
+    try:
+        try:
+            with attach_deadline(deadline):
+                result = crew.kickoff(inputs=inputs)
+        except NothingNew as e:
+            print(f"Info: No news about '{inputs['topic']}' since the last run; keeping the previous newsletter.")
+            if progress is not None:
+                progress("done", STAGES[0], "Nenhuma notícia nova desde a última edição.")
+            if trace is not None:
+                # Nenhum agente rodou, mas a busca não veio de outra busca igual
+                trace.outcome = "unchanged"
+            return CrewOutput(raw=e.newsletter, tasks_output=[], token_usage=UsageMetrics())
+        
+        # Guarda as notícias e análises desta execução para a próxima atualização
+        # (resultados parciais, feitos sem tempo, não entram)
+        entries = getattr(_current_run, "entries", None)
+        if INCREMENTAL and entries is not None and not (deadline is not None and deadline.exceeded):
+            get_topic_state_store().save(inputs["topic"], entries, result.raw, _current_run.seen)
+        return result
+    finally:
+        _current_run.progress = _current_run.run_id = None
+        _current_run.refresh = False
+        _current_run.previous = _current_run.fresh_items = _current_run.entries = _current_run.seen = None
+        _current_run.candidates = _current_run.analyses = None
+
+
+def replay(run_id, stage=STAGES[-1], progress=None):
+    """
+    Refaz uma execução a partir de uma etapa, reaproveitando os resultados
+    guardados das etapas anteriores (ex.: só reescrever a newsletter, sem
+    pesquisar e analisar de novo).
+
+    Args:
+        run_id (str): Identificador da execução original (o run_id do trace)
+        stage (str): Etapa a partir da qual refazer ("research", "curation" ou "editing")
+        progress (callable, optional): Função que recebe o andamento de cada etapa
+
+    Returns:
+        CrewOutput: Resultado da equipe; os artefatos ficam sob um novo run_id
+
+    Raises:
+        KeyError: Se a execução não estiver no armazenamento de artefatos
+        ValueError: Se faltar o resultado de alguma etapa anterior
+    """
+    store = get_artifact_store()
+    run = store.load(run_id)
+    if run is None or "inputs" not in run["meta"]:
+        raise KeyError(f"Run {run_id} not found in the artifact store.")
+    start = STAGES.index(stage)
+    missing = [name for name in STAGES[:start] if name not in run["artifacts"]]
+    if missing:
+        raise ValueError(f"Run {run_id} has no saved result for: {', '.join(missing)}.")
+    
+    crew = crew_template().copy()
+    # As etapas anteriores recebem os resultados guardados; as seguintes os
+    # recebem como contexto, como se tivessem acabado de ser executadas
+    for task, name in zip(crew.tasks[:start], STAGES):
+        saved = json.loads(run["artifacts"][name])
+        model = task.output_pydantic
+        task.output = TaskOutput(
+            description=task.description,
+            agent=task.agent.role,
+            raw=saved["raw"],
+            pydantic=model.model_validate(saved["pydantic"]) if model and saved["pydantic"] else None,
+        )
+    crew.tasks = crew.tasks[start:]
+    # A pré-busca e o estado do assunto já estão nas entradas guardadas
+    crew.before_kickoff_callbacks = []
+    
+    new_run_id = uuid.uuid4().hex
+    store.begin(new_run_id, {**run["meta"], "replay_of": run_id, "from_stage": stage})
+    for name in STAGES[:start]:
+        # Mesmo conteúdo, mesmo endereço: nada é gravado de novo no disco
+        store.put(new_run_id, name, run["artifacts"][name])
+    
+    _current_run.progress = progress
+    _current_run.run_id = new_run_id
+    try:
+        if progress is not None:
+            progress("start", stage)
+        return crew.kickoff(inputs=run["meta"]["inputs"])
+    finally:
+        _current_run.progress = _current_run.run_id = None
+        _current_run.candidates = _current_run.analyses = None
@@ -0,0 +1,227 @@
+"""
+YourNews - Curadoria em Paralelo (map-reduce)
+
+Antes, um único agente curador escrevia as análises de todas as notícias de uma
+vez: uma resposta enorme (10 mil tokens ou mais), gerada token a token, que às
+vezes passava do limite de saída do modelo.
+
+Aqui o curador divide as notícias da pesquisa em pequenos lotes e analisa cada
+lote em uma chamada separada ao LLM, várias ao mesmo tempo (etapa "map"). O
+editor recebe todas as análises e monta a newsletter (etapa "reduce"). Assim o
+tempo da curadoria passa a ser o do lote mais lento, e não a soma de todos, e
+um lote que falha é repetido sozinho, sem refazer os outros.
+
+As análises já escritas ficam guardadas pela impressão digital da notícia: se
+a mesma notícia aparecer de novo (outra busca ou uma atualização), ela não é
+analisada outra vez.
+"""
+
+# Importações de bibliotecas padrão do Python
+import hashlib             # Para a impressão digital de cada notícia
+import os                  # Para ler variáveis de ambiente
+import re                  # Para separar o número e o título de cada notícia
+import threading           # Para proteger as análises guardadas
+import time                # Para medir os lotes e esperar entre tentativas
+from collections import OrderedDict  # Análises guardadas, das mais antigas às mais recentes
+from concurrent.futures import ThreadPoolExecutor, as_completed  # Chamadas ao LLM em paralelo
+from concurrent.futures import TimeoutError as FuturesTimeoutError  # Prazo da curadoria esgotado
+from types import SimpleNamespace  # Para avisar o andamento no formato dos passos do agente
+
+# Importações do CrewAI
+from crewai.utilities.converter import generate_model_description
+from crewai.utilities.token_counter_callback import TokenCalcHandler
+from pydantic import ValidationError
+
+# Divisão do texto do pesquisador em notícias
+from .dedup import split_items
+
+# Formato das análises entregues ao editor
+from .models import CurationResult, NewsAnalysis
+
+# Medições de desempenho
+from utils.metrics import attach_trace, count, current_trace, record_span
+
+# Prazo da busca: a curadoria termina com o que tiver quando o orçamento acaba
+from utils.deadline import BudgetExceeded, attach_deadline, current_deadline, is_budget_exceeded
+from .budget import BudgetedAgent
+
+# ===== CONFIGURAÇÕES =====
+# Quantidade máxima de chamadas ao LLM ao mesmo tempo
+CURATION_CONCURRENCY = int(os.getenv("NEWS_CURATION_CONCURRENCY", "6"))
+# Quantidade de notícias analisadas em cada chamada
+CURATION_BATCH_SIZE = int(os.getenv("NEWS_CURATION_BATCH_SIZE", "3"))
+# Quantas vezes um lote que falhou é tentado de novo
+CURATION_RETRIES = int(os.getenv("NEWS_CURATION_RETRIES", "2"))
+# Quantidade máxima de análises guardadas em memória para reaproveitar
+CURATION_MEMO_ENTRIES = int(os.getenv("NEWS_CURATION_MEMO_ENTRIES", "2000"))
+
+# Número no início de cada notícia ("1. ", "2) "...), que muda de uma busca para outra
+_NUMBER = re.compile(r"^\s*\d+[.)]\s+")
+
+# Análises já escritas, pela impressão digital da notícia
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _fingerprint(item):
+    """Impressão digital de uma notícia da lista compacta (sem a numeração)"""
+    return hashlib.sha1(_NUMBER.sub("", item).strip().encode("utf-8")).hexdigest()
+
+
+def _remember(item, analysis):
+    with _memo_lock:
+        _memo[_fingerprint(item)] = analysis
+        _memo.move_to_end(_fingerprint(item))
+        while len(_memo) > CURATION_MEMO_ENTRIES:
+            _memo.popitem(last=False)
+
+
+def _recall(item):
+    with _memo_lock:
+        return _memo.get(_fingerprint(item))
+
+
+def _final_answer(text):
+    """Remove o "Final Answer:" que alguns modelos acrescentam por hábito do formato do CrewAI"""
+    marker = "Final Answer:"
+    text = text.split(marker, 1)[1] if marker in text else text
+    # Remove também os blocos de código (```json ... ```) que envolvem o JSON
+    return re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+
+
+def _passthrough(item):
+    """Análise mínima de uma notícia que não pôde ser analisada: o editor recebe a notícia como veio"""
+    line = _NUMBER.sub("", item)
+    return NewsAnalysis(title=line.split(" | ", 1)[0].strip(), analysis=line)
+
+
+def _parse_analyses(answer, batch):
+    """
+    Lê as análises de um lote a partir da resposta do LLM.
+
+    Args:
+        answer (str): Resposta do LLM (JSON no formato de CurationResult)
+        batch (list[str]): Notícias do lote
+
+    Returns:
+        list[NewsAnalysis]: Análises do lote (vazia se a resposta não estiver no formato)
+    """
+    for candidate in (answer, answer[answer.find("{"):answer.rfind("}") + 1]):
+        try:
+            return CurationResult.model_validate_json(candidate).analyses
+        except (ValidationError, ValueError):
+            continue
+    return []
+
+
+class ParallelCuratorAgent(BudgetedAgent):
+    """
+    Agente curador que analisa as notícias em lotes paralelos.
+
+    Funciona como um Agent comum (mesma configuração YAML, mesmo LLM), mas a
+    tarefa de curadoria é dividida em várias chamadas simultâneas ao LLM. Se o
+    texto da pesquisa não tiver notícias separáveis, o agente trabalha da forma
+    normal do CrewAI.
+
+    Se o orçamento de tempo da curadoria acabar, os lotes que ainda não
+    terminaram seguem para o editor como vieram da pesquisa.
+    """
+
+    def execute_task(self, task, context=None, tools=None):
+        # Na atualização incremental, a pesquisa pode não trazer nada novo para analisar
+        if not (context or "").strip():
+            return CurationResult(analyses=[]).model_dump_json()
+        intro, items = split_items(context)
+        if not items:
+            return super().execute_task(task, context, tools)
+
+        # Notícias já analisadas antes não voltam para o LLM
+        analyses = {index: _recall(item) for index, item in enumerate(items)}
+        pending = [index for index, analysis in analyses.items() if analysis is None]
+        if len(pending) < len(items):
+            count("yournews_curation_reused_total", amount=len(items) - len(pending))
+        batches = [pending[start:start + CURATION_BATCH_SIZE] for start in range(0, len(pending), CURATION_BATCH_SIZE)]
+
+        instructions = task.prompt() + "\n" + self.i18n.slice("formatted_task_instructions").format(
+            output_format=generate_model_description(CurationResult)
+        )
+        system = f"Você é {self.role}. {self.backstory}\n\nSeu objetivo: {self.goal}"
+        # As chamadas rodam em outras threads, mas pertencem à mesma busca
+        trace = current_trace()
+        deadline = current_deadline()
+
+        def analyse(batch):
+            news = [items[index] for index in batch]
+            prompt = (
+                f"{instructions}\n\n"
+                + (f"Contexto da pesquisa:\n{intro}\n\n" if intro else "")
+                + "Analise SOMENTE as notícias abaixo (as demais são analisadas em separado):\n\n"
+                + "\n\n".join(news)
+            )
+            messages = [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+            with attach_trace(trace), attach_deadline(deadline):
+                for attempt in range(CURATION_RETRIES + 1):
+                    started = time.perf_counter()
+                    try:
+                        # O TokenCalcHandler soma os tokens usados ao total do agente (crew.usage_metrics)
+                        answer = self.llm.call(messages, callbacks=[TokenCalcHandler(self._token_process)])
+                        record_span("curation", "batch", time.perf_counter() - started,
+                                    items=len(batch), attempt=attempt + 1)
+                        answer = _final_answer(str(answer))
+                        result = _parse_analyses(answer, news)
+                        if len(result) == len(news):
+                            for item, analysis in zip(news, result):
+                                _remember(item, analysis)
+                            return result
+                        # Fora do formato: o texto vira uma única análise do lote
+                        count("yournews_curation_unstructured_total")
+                        return result or [NewsAnalysis(title=_passthrough(news[0]).title, analysis=answer)]
+                    except Exception as e:
+                        if is_budget_exceeded(e):
+                            # Sem tempo: o editor recebe as notícias como vieram da pesquisa
+                            return [_passthrough(item) for item in news]
+                        count("yournews_curation_retries_total")
+                        if attempt == CURATION_RETRIES:
+                            # Sem análise: o editor recebe as notícias como vieram da pesquisa
+                            count("yournews_curation_failures_total")
+                            print(f"Info: Curation batch failed after {attempt + 1} attempts: {e}")
+                            return [_passthrough(item) for item in news]
+                        time.sleep(2 ** attempt)
+
+        results = {}
+        pool = ThreadPoolExecutor(max_workers=CURATION_CONCURRENCY, thread_name_prefix="curation")
+        try:
+            futures = {pool.submit(analyse, batch): number for number, batch in enumerate(batches)}
+            try:
+                timeout = deadline.remaining() if deadline is not None else None
+                for done, future in enumerate(as_completed(futures, timeout=timeout), start=1):
+                    number = futures[future]
+                    results[number] = future.result()
+                    # O andamento é avisado nesta thread, que é a da busca
+                    if self.step_callback:
+                        self.step_callback(SimpleNamespace(
+                            tool=f"Analysis {done}/{len(batches)}",
+                            result=CurationResult(analyses=results[number]).to_markdown(),
+                        ))
+            except (FuturesTimeoutError, BudgetExceeded):
+                # Os lotes que não terminaram a tempo seguem como vieram da pesquisa
+                deadline.mark_exceeded(deadline.stage)
+                for number, batch in enumerate(batches):
+                    results.setdefault(number, [_passthrough(items[index]) for index in batch])
+        finally:
+            # Se a busca foi cancelada, os lotes que ainda não começaram são descartados
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        # As análises ficam na mesma ordem das notícias da pesquisa
+        for number, batch in enumerate(batches):
+            if len(results[number]) == len(batch):
+                analyses.update(zip(batch, ([analysis] for analysis in results[number])))
+            else:
+                # Resposta fora do formato: o texto do lote fica no lugar da primeira notícia
+                analyses.update({index: [] for index in batch})
+                analyses[batch[0]] = results[number]
+        ordered = []
+        for index in range(len(items)):
+            value = analyses[index]
+            ordered.extend(value if isinstance(value, list) else [value])
+        return CurationResult(analyses=ordered).model_dump_json()
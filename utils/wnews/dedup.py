@@ -0,0 +1,223 @@
+"""
+YourNews - Agrupamento de Notícias Quase Duplicadas
+
+Notícias de agência (Agência Brasil, Reuters, AFP...) são republicadas por vários
+jornais com poucas mudanças. Sem tratamento, o curador escreve uma análise de
+300-400 palavras para cada cópia.
+
+Este módulo compara as notícias por similaridade de cosseno entre vetores TF-IDF
+(calculados com NumPy), agrupa as quase duplicadas e mantém um representante por
+grupo, juntando os links de todas as fontes do grupo.
+"""
+
+# Importações de bibliotecas padrão do Python
+import os            # Para ler variáveis de ambiente
+import re            # Para dividir o texto em notícias e encontrar links
+import unicodedata   # Para remover acentos antes de comparar palavras
+
+# Bibliotecas externas
+import numpy as np  # Para os cálculos vetoriais de similaridade
+
+# ===== CONFIGURAÇÕES =====
+# Similaridade mínima (0 a 1) para considerar duas notícias como a mesma história
+DEDUP_THRESHOLD = float(os.getenv("NEWS_DEDUP_THRESHOLD", "0.6"))
+
+# Palavras muito comuns que não ajudam a diferenciar notícias
+_STOPWORDS = set("""
+a o as os um uma uns umas de do da dos das em no na nos nas por para com sem sobre entre
+que se ao aos e ou mas como mais menos muito ja nao sim foi sao ser esta estao tem ter
+seu sua seus suas ele ela eles elas isso isto este esta the of and to in for on with is
+are was were by an at from that this it as be has have will
+""".split())
+
+# Início de uma notícia no texto do pesquisador: item numerado, título ou item de lista em negrito
+_ITEM_START = re.compile(r"^\s*(?:\d+[.)]\s+|#{2,4}\s+|[-*]\s+\*\*)")
+# Links em Markdown ou endereços soltos
+_URL = re.compile(r"https?://[^\s)\]>\"']+")
+
+
+def tokenize(text):
+    """Divide um texto em palavras normalizadas (sem acentos, minúsculas, sem stopwords)"""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = _URL.sub(" ", text)
+    words = [word for word in re.findall(r"[a-z0-9]+", text) if len(word) > 2 and word not in _STOPWORDS]
+    # Pares de palavras vizinhas ajudam a reconhecer frases copiadas
+    return words + [f"{first}_{second}" for first, second in zip(words, words[1:])]
+
+
+def similarity_matrix(texts):
+    """
+    Calcula a similaridade de cosseno entre todos os pares de textos (TF-IDF).
+
+    Args:
+        texts (list[str]): Textos a comparar
+
+    Returns:
+        numpy.ndarray: Matriz n x n com valores entre 0 e 1
+    """
+    documents = [tokenize(text) for text in texts]
+    vocabulary = {}
+    for words in documents:
+        for word in words:
+            vocabulary.setdefault(word, len(vocabulary))
+    if not vocabulary:
+        return np.eye(len(texts))
+
+    # Contagem de cada palavra em cada texto (frequência do termo)
+    counts = np.zeros((len(texts), len(vocabulary)), dtype=np.float32)
+    for row, words in enumerate(documents):
+        for word in words:
+            counts[row, vocabulary[word]] += 1
+
+    # Palavras presentes em poucos textos pesam mais (frequência inversa nos documentos)
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+    vectors = np.log1p(counts) * idf
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors /= norms
+    return vectors @ vectors.T
+
+
+def cluster(texts, threshold=DEDUP_THRESHOLD):
+    """
+    Agrupa textos quase duplicados.
+
+    Dois textos ficam no mesmo grupo se a similaridade entre eles for maior que
+    o limite, ou se estiverem ligados por uma cadeia de textos similares.
+
+    Args:
+        texts (list[str]): Textos a agrupar
+        threshold (float): Similaridade mínima para considerar duplicata
+
+    Returns:
+        list[list[int]]: Grupos de índices, na ordem em que aparecem nos textos
+    """
+    parent = list(range(len(texts)))
+
+    def root(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    if len(texts) > 1:
+        similar = np.argwhere(np.triu(similarity_matrix(texts), k=1) >= threshold)
+        for first, second in similar:
+            parent[root(second)] = root(first)
+
+    groups = {}
+    for index in range(len(texts)):
+        groups.setdefault(root(index), []).append(index)
+    return sorted(groups.values(), key=lambda group: group[0])
+
+
+def split_items(text):
+    """
+    Divide o texto do pesquisador em notícias individuais.
+
+    Args:
+        text (str): Texto em Markdown produzido pela tarefa de pesquisa
+
+    Returns:
+        tuple[str, list[str]]: Introdução (texto antes da primeira notícia) e a lista de notícias
+    """
+    intro, items = [], []
+    for line in text.splitlines():
+        if _ITEM_START.match(line):
+            items.append([line])
+        elif items:
+            items[-1].append(line)
+        else:
+            intro.append(line)
+    return "\n".join(intro).strip(), ["\n".join(item).strip() for item in items]
+
+
+def deduplicate_text(text, threshold=DEDUP_THRESHOLD):
+    """
+    Remove notícias quase duplicadas do texto do pesquisador.
+
+    De cada grupo fica a versão mais completa (a mais longa), acrescida dos links
+    das outras versões.
+
+    Args:
+        text (str): Texto em Markdown produzido pela tarefa de pesquisa
+        threshold (float): Similaridade mínima para considerar duplicata
+
+    Returns:
+        tuple[str, int]: Texto sem duplicatas e a quantidade de notícias removidas
+    """
+    intro, items = split_items(text)
+    if len(items) < 2:
+        return text, 0
+
+    kept = []
+    for group in cluster(items, threshold):
+        representative = max(group, key=lambda index: len(items[index]))
+        item = items[representative]
+        links = _URL.findall(item)
+        extra = []
+        for index in group:
+            for url in _URL.findall(items[index]):
+                if url not in links and url not in extra:
+                    extra.append(url)
+        if extra:
+            item += "\n   Também publicado em: " + ", ".join(extra)
+        kept.append(item)
+
+    body = "\n\n".join(kept)
+    return (f"{intro}\n\n{body}" if intro else body), len(items) - len(kept)
+
+
+def deduplicate_candidates(candidates, threshold=DEDUP_THRESHOLD):
+    """
+    Agrupa candidatos da pré-busca que contam a mesma história.
+
+    Args:
+        candidates (list[dict]): Candidatos com title, snippet, content e url
+        threshold (float): Similaridade mínima para considerar duplicata
+
+    Returns:
+        list[dict]: Um candidato por grupo, com os links dos demais em "also_at"
+    """
+    texts = [
+        f"{candidate['title']} {candidate.get('content') or candidate.get('snippet', '')}"
+        for candidate in candidates
+    ]
+    kept = []
+    for group in cluster(texts, threshold):
+        representative = max(group, key=lambda index: len(texts[index]))
+        candidate = dict(candidates[representative])
+        candidate["also_at"] = [candidates[index]["url"] for index in group if index != representative]
+        kept.append(candidate)
+    return kept
+
+
+def deduplicate_items(items, threshold=DEDUP_THRESHOLD):
+    """
+    Agrupa as notícias estruturadas da pesquisa (NewsItem) que contam a mesma história.
+
+    Args:
+        items (list[NewsItem]): Notícias retornadas pela tarefa de pesquisa
+        threshold (float): Similaridade mínima para considerar duplicata
+
+    Returns:
+        tuple[list[NewsItem], int]: Uma notícia por grupo (a de resumo mais completo,
+            com a maior relevância do grupo e os links das demais) e a quantidade removida
+    """
+    texts = [f"{item.title} {item.summary}" for item in items]
+    kept = []
+    for group in cluster(texts, threshold):
+        representative = items[max(group, key=lambda index: len(texts[index]))]
+        also_at = list(representative.also_at)
+        for index in group:
+            for url in [items[index].url, *items[index].also_at]:
+                if url != representative.url and url not in also_at:
+                    also_at.append(url)
+        kept.append(representative.model_copy(update={
+            "also_at": also_at,
+            "relevance": max(items[index].relevance for index in group),
+        }))
+    return kept, len(items) - len(kept)
@@ -0,0 +1,248 @@
+"""
+YourNews - Atualização Incremental da Newsletter
+
+Os usuários pedem os mesmos assuntos todos os dias, e cada execução refazia a
+semana inteira: pesquisa, curadoria e edição de todas as notícias.
+
+Este módulo guarda, para cada assunto, as notícias e as análises da última
+execução e o momento em que ela terminou (a "marca d'água"). Na execução
+seguinte:
+
+1. A pré-busca separa os candidatos que ainda não estavam na edição anterior.
+   Se não houver nenhum, a newsletter anterior é devolvida sem chamar o LLM.
+2. O pesquisador recebe a lista do que já foi publicado, para trazer só o novo.
+3. Só as notícias novas ou alteradas vão para a curadoria.
+4. O editor recebe as análises novas junto com as mantidas da edição anterior.
+
+Notícias mais antigas que NEWS_INCREMENTAL_WINDOW_DAYS saem da edição.
+"""
+
+# Importações de bibliotecas padrão do Python
+import json       # Para guardar os endereços já vistos
+import os         # Para ler variáveis de ambiente e criar diretórios
+import sqlite3    # Banco de dados em arquivo com o estado de cada assunto
+import threading  # Para proteger as conexões SQLite
+import time       # Para a marca d'água e a janela de retenção
+
+# Normalização do assunto, a mesma do cache de resultados
+from utils.cache import normalize_subject
+
+# Formato das notícias e análises guardadas
+from .models import NewsAnalysis, NewsItem
+
+# Normalização dos links, para associar cada análise à sua notícia
+from .retrieval import canonicalize_url
+
+# ===== CONFIGURAÇÕES =====
+# Se "1", assuntos já pesquisados são atualizados de forma incremental
+INCREMENTAL = os.getenv("NEWS_INCREMENTAL", "1") == "1"
+# Por quantos dias uma notícia continua na newsletter do assunto
+INCREMENTAL_WINDOW_DAYS = float(os.getenv("NEWS_INCREMENTAL_WINDOW_DAYS", "7"))
+# Quantidade máxima de notícias na newsletter (novas primeiro, depois as mantidas)
+INCREMENTAL_MAX_ITEMS = int(os.getenv("NEWS_INCREMENTAL_MAX_ITEMS", os.getenv("NEWS_MAX_ITEMS", "30")))
+# Arquivo com o estado de cada assunto
+TOPIC_STATE_DB_PATH = os.getenv("NEWS_TOPIC_STATE_DB_PATH", os.path.join(".cache", "yournews", "topics.sqlite3"))
+
+
+class NothingNew(Exception):
+    """Nenhuma notícia nova desde a última execução; a newsletter anterior continua valendo"""
+
+    def __init__(self, newsletter):
+        super().__init__("no news since the last run")
+        self.newsletter = newsletter
+
+
+def pair_analyses(items, analyses):
+    """
+    Associa cada notícia nova à sua análise.
+
+    O curador devolve uma análise por notícia, na mesma ordem, mas um lote
+    fora do formato devolve menos análises (veja curation.py). Nesse caso a
+    associação é feita pelo link ou pelo título, e as notícias sem análise
+    ficam de fora: guardadas sem análise, elas sumiriam das próximas edições.
+
+    Args:
+        items (list[NewsItem]): Notícias entregues ao curador
+        analyses (list[NewsAnalysis]): Análises devolvidas pelo curador
+
+    Returns:
+        dict: Endereço normalizado -> (notícia, análise), só das notícias com análise
+    """
+    if len(items) == len(analyses):
+        return {canonicalize_url(item.url): (item, analysis) for item, analysis in zip(items, analyses)}
+    by_url, by_title = {}, {}
+    for analysis in analyses:
+        if analysis.url:
+            by_url.setdefault(canonicalize_url(analysis.url), analysis)
+        by_title.setdefault(normalize_subject(analysis.title), analysis)
+    paired = {}
+    used = set()
+    for item in items:
+        url_key = canonicalize_url(item.url)
+        analysis = by_url.get(url_key) or by_title.get(normalize_subject(item.title))
+        if analysis is not None and id(analysis) not in used:
+            used.add(id(analysis))
+            paired[url_key] = (item, analysis)
+    return paired
+
+
+class TopicState:
+    """
+    Estado da última execução de um assunto.
+
+    Attributes:
+        watermark (float): Momento (time.time()) em que a última execução terminou
+        newsletter (str): Newsletter da última execução
+        entries (dict): Endereço normalizado -> {"fingerprint", "first_seen", "item", "analysis"}
+        seen (dict): Endereço normalizado -> momento em que o candidato apareceu
+            pela primeira vez (inclusive os que o pesquisador deixou de fora)
+    """
+
+    def __init__(self, watermark, newsletter, entries, seen=None):
+        self.watermark = watermark
+        self.newsletter = newsletter
+        self.entries = entries
+        self.seen = seen or {}
+
+    def known_urls(self):
+        """Endereços que já passaram por alguma execução anterior do assunto"""
+        return set(self.entries) | set(self.seen)
+
+    def is_unchanged(self, url_key, item):
+        """Diz se a notícia já estava na edição anterior, com o mesmo conteúdo"""
+        entry = self.entries.get(url_key)
+        return entry is not None and entry["fingerprint"] == item.fingerprint()
+
+    def retained(self, exclude=()):
+        """
+        Notícias da edição anterior que continuam valendo.
+
+        Args:
+            exclude (set): Endereços que foram substituídos por versões novas
+
+        Returns:
+            list[dict]: Entradas dentro da janela, das mais recentes para as mais antigas
+        """
+        since = time.time() - INCREMENTAL_WINDOW_DAYS * 86400
+        kept = [
+            (url_key, entry) for url_key, entry in self.entries.items()
+            if url_key not in exclude and entry["first_seen"] >= since and entry["analysis"] is not None
+        ]
+        kept.sort(key=lambda pair: pair[1]["first_seen"], reverse=True)
+        return kept
+
+    def known_news(self):
+        """Lista curta do que já foi publicado, para o pesquisador não repetir"""
+        return "\n".join(
+            f"- {entry['item'].title} ({entry['item'].url})" for _, entry in self.retained()
+        ) or "(nenhuma)"
+
+
+class TopicStateStore:
+    """Estado de cada assunto (notícias, análises e marca d'água) em SQLite"""
+
+    def __init__(self, db_path=TOPIC_STATE_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS topics ("
+                " topic TEXT PRIMARY KEY,"
+                " watermark REAL NOT NULL,"
+                " newsletter TEXT NOT NULL,"
+                " seen TEXT NOT NULL DEFAULT '{}');"
+                "CREATE TABLE IF NOT EXISTS topic_items ("
+                " topic TEXT NOT NULL,"
+                " url_key TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " first_seen REAL NOT NULL,"
+                " item TEXT NOT NULL,"
+                " analysis TEXT,"
+                " PRIMARY KEY (topic, url_key));"
+            )
+
+    def _connection(self):
+        """Retorna a conexão SQLite da thread atual, criando-a se necessário"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, topic):
+        """
+        Lê o estado da última execução de um assunto.
+
+        Args:
+            topic (str): Assunto da busca
+
+        Returns:
+            TopicState: Estado guardado, ou None se o assunto nunca foi pesquisado
+                ou se a última execução é mais antiga que a janela
+        """
+        key = normalize_subject(topic)
+        conn = self._connection()
+        row = conn.execute("SELECT watermark, newsletter, seen FROM topics WHERE topic = ?", (key,)).fetchone()
+        if row is None or row[0] < time.time() - INCREMENTAL_WINDOW_DAYS * 86400:
+            return None
+        entries = {}
+        for url_key, fingerprint, first_seen, item, analysis in conn.execute(
+            "SELECT url_key, fingerprint, first_seen, item, analysis FROM topic_items WHERE topic = ?", (key,)
+        ):
+            entries[url_key] = {
+                "fingerprint": fingerprint,
+                "first_seen": first_seen,
+                "item": NewsItem.model_validate_json(item),
+                "analysis": NewsAnalysis.model_validate_json(analysis) if analysis else None,
+            }
+        return TopicState(row[0], row[1], entries, json.loads(row[2]))
+
+    def save(self, topic, entries, newsletter, seen=None):
+        """
+        Substitui o estado de um assunto pelo da execução que acabou de terminar.
+
+        Args:
+            topic (str): Assunto da busca
+            entries (dict): Endereço normalizado -> {"first_seen", "item", "analysis"}
+            newsletter (str): Newsletter gerada
+            seen (dict, optional): Endereço normalizado -> momento em que o candidato
+                apareceu pela primeira vez; os mais antigos que a janela são descartados
+        """
+        key = normalize_subject(topic)
+        since = time.time() - INCREMENTAL_WINDOW_DAYS * 86400
+        seen = {url_key: first_seen for url_key, first_seen in (seen or {}).items() if first_seen >= since}
+        with self._connection() as conn:
+            conn.execute("DELETE FROM topic_items WHERE topic = ?", (key,))
+            conn.executemany(
+                "INSERT INTO topic_items (topic, url_key, fingerprint, first_seen, item, analysis)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (key, url_key, entry["item"].fingerprint(), entry["first_seen"], entry["item"].model_dump_json(),
+                     entry["analysis"].model_dump_json() if entry["analysis"] else None)
+                    for url_key, entry in entries.items()
+                ],
+            )
+            conn.execute(
+                "INSERT INTO topics (topic, watermark, newsletter, seen) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(topic) DO UPDATE SET watermark = excluded.watermark,"
+                " newsletter = excluded.newsletter, seen = excluded.seen",
+                (key, time.time(), newsletter, json.dumps(seen)),
+            )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_topic_state_store():
+    """Retorna o armazenamento de estado compartilhado por todo o processo"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TopicStateStore()
+        return _store
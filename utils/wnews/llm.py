@@ -0,0 +1,83 @@
+"""
+YourNews - LLM com Limite de Requisições
+
+Todas as chamadas dos agentes ao LLM (inclusive as da curadoria em paralelo e
+as conversões para o formato estruturado) passam pelo controle de requisições
+da OpenAI (veja utils/ratelimit.py): respeitam o limite compartilhado entre os
+processos e são repetidas quando a API responde 429 ou 5xx.
+
+Quando a busca tem prazo (utils/deadline.py), nenhuma chamada passa do fim do
+orçamento da etapa: o tempo máximo de espera da chamada é o tempo que resta, e
+nenhuma chamada nova começa depois que ele acaba.
+"""
+
+# Importações de bibliotecas padrão do Python
+import os         # Para ler variáveis de ambiente
+import threading  # Para o tempo máximo de cada chamada, separado por thread
+
+# Importações do CrewAI
+from crewai import LLM
+
+# Controle de requisições por provedor e chave de API
+from utils.ratelimit import get_limiter
+
+# Prazo da busca e orçamento de cada etapa
+from utils.deadline import current_deadline
+
+
+# Tempo máximo da chamada em andamento em cada thread. O mesmo LLM é usado ao
+# mesmo tempo por várias threads (ex.: os lotes paralelos da curadoria, de
+# buscas diferentes), então o tempo não pode ficar guardado no próprio LLM
+_call_timeout = threading.local()
+
+
+class RateLimitedLLM(LLM):
+    """LLM do CrewAI cujas chamadas passam pelo limite de requisições da OpenAI"""
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        limiter = get_limiter("openai", self.api_key)
+        deadline = current_deadline()
+
+        def attempt():
+            if deadline is None:
+                return LLM.call(self, messages, tools, callbacks, available_functions)
+            # Sem tempo na etapa, nem começa (BudgetExceeded não é repetido)
+            deadline.check()
+            _call_timeout.seconds = max(1.0, deadline.remaining())
+            try:
+                return LLM.call(self, messages, tools, callbacks, available_functions)
+            finally:
+                _call_timeout.seconds = None
+
+        return limiter.call(attempt)
+
+    def _prepare_completion_params(self, messages, tools=None):
+        # Os parâmetros são montados a cada chamada: o tempo que resta na etapa
+        # desta thread vai só nesta chamada ao litellm
+        params = super()._prepare_completion_params(messages, tools)
+        timeout = getattr(_call_timeout, "seconds", None)
+        if timeout is not None:
+            params["timeout"] = timeout
+        return params
+
+
+def build_llm(stream=False):
+    """
+    Cria o LLM usado pelos agentes.
+
+    Args:
+        stream (bool): Se True, o texto chega aos poucos (um evento por token)
+
+    Returns:
+        RateLimitedLLM: LLM configurado pelas variáveis de ambiente
+    """
+    model = os.getenv("MODEL") or os.getenv("OPENAI_MODEL_NAME") or "gpt-4o-mini"
+    return RateLimitedLLM(
+        model=model,
+        stream=stream,
+        # OPENAI_BASE_URL permite usar outro servidor compatível com a API da OpenAI
+        base_url=os.getenv("OPENAI_BASE_URL"),
+        # As novas tentativas ficam com o controle de requisições, que respeita o
+        # Retry-After e o limite compartilhado; o cliente da OpenAI não repete sozinho
+        max_retries=0,
+    )
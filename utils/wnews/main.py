@@ -15,17 +15,19 @@ warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
 def run():
     """
-    Run the crew.
+    Run the crew for the topic given on the command line (or a default one).
+    To generate many topics at once, use the batch runner: python -m utils.batch
     """
     inputs = {
-        'topic': 'Impact of AI in Business, and recent news about AI technologies',
+        'topic': sys.argv[1] if len(sys.argv) > 1 else 'Impact of AI in Business, and recent news about AI technologies',
         'current_date': str(datetime.now())
     }
     
     try:
-        Wnews().crew().kickoff(inputs=inputs)
+        result = Wnews().crew().kickoff(inputs=inputs)
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
+    print(result.raw)
 
 
 def train():
@@ -0,0 +1,108 @@
+"""
+YourNews - Modelos de Dados Entre as Etapas
+
+Antes, cada etapa entregava à seguinte um texto livre em Markdown, que o
+próximo agente precisava reler inteiro. Com estes modelos (Pydantic), a
+pesquisa e a curadoria devolvem registros estruturados, que permitem:
+
+- Ordenar e filtrar as notícias por relevância sem chamar o LLM.
+- Entregar ao próximo agente uma lista compacta (uma linha por notícia), que
+  ocupa bem menos tokens do que o Markdown.
+- Reconhecer notícias já analisadas (impressão digital de cada notícia), para
+  não analisá-las de novo.
+"""
+
+# Importações de bibliotecas padrão do Python
+import hashlib  # Para a impressão digital de cada notícia
+from typing import List
+
+# Bibliotecas externas
+from pydantic import BaseModel, Field  # Para definir e validar os modelos
+
+
+class NewsItem(BaseModel):
+    """Uma notícia encontrada pelo pesquisador."""
+    title: str = Field(..., description="Título claro e conciso da notícia")
+    url: str = Field(..., description="Link direto para a fonte original")
+    source: str = Field("", description="Nome do jornal ou site que publicou a notícia")
+    published_at: str = Field("", description="Data de publicação, como informada pela fonte")
+    summary: str = Field(..., description="Resumo dos fatos principais, do contexto e do impacto")
+    relevance: int = Field(5, description="Relevância e impacto da notícia, de 1 (baixa) a 10 (alta)")
+    also_at: List[str] = Field(default_factory=list, description="Links de outras publicações da mesma notícia")
+
+    def fingerprint(self):
+        """Identificador da notícia: muda apenas se o link ou o resumo mudarem"""
+        content = f"{self.url.strip()}\n{' '.join(self.summary.split())}"
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def to_line(self, number):
+        """Uma linha compacta para o prompt do próximo agente"""
+        line = (
+            f"{number}. {self.title} | {self.source or '-'} | {self.published_at or '-'} | "
+            f"relevância {self.relevance} | {self.url} | {' '.join(self.summary.split())}"
+        )
+        if self.also_at:
+            line += "\n   Também publicado em: " + ", ".join(self.also_at)
+        return line
+
+
+class ResearchResult(BaseModel):
+    """Resultado da tarefa de pesquisa."""
+    items: List[NewsItem] = Field(..., description="Notícias encontradas, uma por fato")
+
+    def ranked(self, min_relevance=0, limit=None):
+        """
+        Ordena as notícias da mais para a menos relevante e aplica filtros.
+
+        Args:
+            min_relevance (int): Relevância mínima para manter a notícia
+            limit (int, optional): Quantidade máxima de notícias
+
+        Returns:
+            ResearchResult: Novo resultado, ordenado e filtrado
+        """
+        items = sorted(
+            (item for item in self.items if item.relevance >= min_relevance),
+            key=lambda item: item.relevance, reverse=True,
+        )
+        return ResearchResult(items=items[:limit] if limit else items)
+
+    def to_prompt(self):
+        """Lista compacta (uma linha por notícia) entregue ao curador"""
+        return "\n".join(item.to_line(number) for number, item in enumerate(self.items, start=1))
+
+    def to_markdown(self):
+        """Versão legível, mostrada na tela enquanto a busca roda"""
+        return "\n\n".join(
+            f"{number}. **{item.title}** ({item.source}, {item.published_at}) - relevância {item.relevance}\n"
+            f"   {item.summary} [{item.url}]({item.url})"
+            for number, item in enumerate(self.items, start=1)
+        )
+
+
+class NewsAnalysis(BaseModel):
+    """A análise de uma notícia escrita pelo curador."""
+    title: str = Field(..., description="Título da notícia analisada")
+    url: str = Field("", description="Link da fonte original")
+    analysis: str = Field(..., description="Análise detalhada da importância e do impacto da notícia")
+    sources: List[str] = Field(default_factory=list, description="Links de todas as fontes citadas")
+
+    def to_block(self):
+        """Um bloco compacto para o prompt do editor"""
+        # Links sem repetição, mantendo a ordem (o link principal primeiro)
+        links = [link for link in dict.fromkeys([self.url, *self.sources]) if link]
+        block = f"## {self.title}\n{' '.join(self.analysis.split())}"
+        return block + (f"\nFontes: {', '.join(links)}" if links else "")
+
+
+class CurationResult(BaseModel):
+    """Resultado da tarefa de curadoria."""
+    analyses: List[NewsAnalysis] = Field(..., description="Uma análise para cada notícia recebida, na mesma ordem")
+
+    def to_prompt(self):
+        """Análises em blocos compactos, entregues ao editor"""
+        return "\n\n".join(analysis.to_block() for analysis in self.analyses)
+
+    def to_markdown(self):
+        """Versão legível, mostrada na tela enquanto a busca roda"""
+        return "\n\n".join(analysis.to_block() for analysis in self.analyses)
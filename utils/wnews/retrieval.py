@@ -0,0 +1,300 @@
+"""
+YourNews - Pré-busca Paralela de Notícias
+
+Antes de o agente pesquisador começar, este módulo faz uma "rajada" de buscas
+em paralelo: expande o assunto em várias consultas (português, inglês e os
+jornais citados em tasks.yaml), busca todas ao mesmo tempo na API do Serper,
+remove links repetidos e baixa o texto das páginas restantes, também em paralelo
+(usando o mesmo cache de páginas da ArticleScrapeTool).
+
+O agente recebe essa lista de candidatos pronta, em vez de fazer dezenas de
+buscas uma depois da outra dentro do seu ciclo de pensar-agir-observar.
+
+Antes de ir à web, o acervo local de artigos (article_store.py) é consultado.
+Se o assunto foi buscado há pouco e o acervo tem artigos suficientes, a web nem
+é chamada; caso contrário, a web só completa o que falta, pedindo apenas as
+notícias mais recentes que o acervo, e artigos já guardados não são baixados de novo.
+"""
+
+# Importações de bibliotecas padrão do Python
+import asyncio   # Para executar várias requisições HTTP ao mesmo tempo
+import os        # Para ler variáveis de ambiente
+import sqlite3   # Para tratar falhas do acervo local de artigos
+import time      # Para medir a duração das requisições
+from concurrent.futures import ThreadPoolExecutor  # Para rodar a busca fora de um loop já ativo
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit  # Para normalizar URLs
+
+# Bibliotecas externas
+import httpx  # Cliente HTTP com suporte a requisições assíncronas
+
+# A extração de conteúdo e o cache de páginas são os mesmos da ferramenta de leitura de artigos
+from .tools.custom_tool import conditional_headers, get_page_cache, handle_response, truncate_to_tokens
+
+# Agrupamento de notícias quase duplicadas
+from .dedup import deduplicate_candidates
+
+# Acervo local de artigos, consultado antes da web
+from .article_store import ARTICLE_FRESH_SECONDS, ARTICLE_MIN_RESULTS, ARTICLE_WINDOW_DAYS, get_article_store
+
+# Medições de desempenho
+from utils.metrics import attach_trace, count, current_trace, record_span
+
+# Controle de requisições por provedor e chave de API
+from utils.ratelimit import get_limiter
+
+# ===== CONFIGURAÇÕES =====
+# Endereço da API do Serper (pode apontar para um servidor local em testes)
+SERPER_BASE_URL = os.getenv("SERPER_BASE_URL", "https://google.serper.dev")
+# Quantidade de resultados pedidos em cada consulta
+RESULTS_PER_QUERY = int(os.getenv("NEWS_RETRIEVAL_RESULTS_PER_QUERY", "10"))
+# Quantidade máxima de páginas baixadas ao mesmo tempo
+SCRAPE_CONCURRENCY = int(os.getenv("NEWS_SCRAPE_CONCURRENCY", "8"))
+# Quantidade máxima de páginas baixadas por busca
+SCRAPE_MAX_ARTICLES = int(os.getenv("NEWS_SCRAPE_MAX_ARTICLES", "30"))
+# Quantidade máxima de tokens do texto de cada página na lista de candidatos
+CANDIDATE_MAX_TOKENS = int(os.getenv("NEWS_CANDIDATE_MAX_TOKENS", "300"))
+# Tempo máximo de espera de cada requisição HTTP, em segundos
+HTTP_TIMEOUT = float(os.getenv("NEWS_HTTP_TIMEOUT", "15"))
+
+# Jornais priorizados na tarefa de pesquisa (veja config/tasks.yaml)
+NEWS_SOURCES = {
+    "Folha de S.Paulo": "folha.uol.com.br",
+    "O Globo": "oglobo.globo.com",
+    "Estadão": "estadao.com.br",
+    "Agência Brasil": "agenciabrasil.ebc.com.br",
+}
+
+# Parâmetros de URL usados apenas para rastreamento, que não mudam a página
+_TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref", "cmpid", "origin"}
+
+
+def expand_queries(topic):
+    """
+    Expande o assunto em várias consultas de busca.
+
+    Args:
+        topic (str): Assunto da busca
+
+    Returns:
+        list[str]: Consultas em português, em inglês e restritas aos jornais priorizados
+    """
+    queries = [topic, f"{topic} notícias", f"{topic} news"]
+    queries += [f"{topic} site:{domain}" for domain in NEWS_SOURCES.values()]
+    return queries
+
+
+def canonicalize_url(url):
+    """
+    Normaliza uma URL para que endereços equivalentes fiquem iguais.
+
+    Remove "www.", parâmetros de rastreamento (utm_*, fbclid...), o fragmento (#...)
+    e a barra final, e ordena os parâmetros restantes.
+
+    Args:
+        url (str): URL original
+
+    Returns:
+        str: URL normalizada
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(((parts.scheme or "https").lower(), host, path, urlencode(query), ""))
+
+
+async def _search(client, query, recency="qdr:w"):
+    """Faz uma consulta na API de notícias do Serper"""
+    api_key = os.environ.get("SERPER_API_KEY", "")
+
+    async def request():
+        started = time.perf_counter()
+        response = await client.post(
+            f"{SERPER_BASE_URL}/news",
+            # tbs=qdr:w limita os resultados à última semana, como pede a tarefa de pesquisa
+            # (qdr:d, ao último dia, quando o acervo local já tem o resto da semana)
+            json={"q": query, "gl": "br", "hl": "pt-br", "tbs": recency, "num": RESULTS_PER_QUERY},
+            headers={"X-API-KEY": api_key},
+        )
+        record_span("http", "serper", time.perf_counter() - started, bytes=len(response.content),
+                    status=response.status_code)
+        response.raise_for_status()
+        return response
+
+    # Respeita o limite de requisições do Serper e repete as recusas (429, 5xx)
+    response = await get_limiter("serper", api_key).acall(request)
+    return response.json().get("news", [])
+
+
+async def _scrape(client, semaphore, cache, candidate, stored=None):
+    """Baixa a página de um candidato (ou usa o acervo ou o cache) e guarda o texto extraído inteiro"""
+    url = candidate["url"]
+    if stored:
+        # O artigo já está no acervo local: nenhuma requisição é necessária
+        count("yournews_article_store_total", {"result": "content"})
+        candidate["content"] = stored
+        return candidate
+    entry = cache.lookup(url)
+    if entry and entry["fresh"]:
+        count("yournews_page_cache_total", {"result": "fresh"})
+        candidate["content"] = entry["text"]
+        return candidate
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            response = await client.get(url, headers=conditional_headers(entry), follow_redirects=True)
+            result = "not_modified" if response.status_code == 304 else "miss"
+            count("yournews_page_cache_total", {"result": result})
+            record_span("http", "scrape", time.perf_counter() - started, bytes=len(response.content), cache=result)
+            text = handle_response(cache, url, entry, response)
+            candidate["content"] = text
+        except (httpx.HTTPError, ValueError):
+            # Páginas que falham ficam apenas com o resumo da busca
+            count("yournews_scrape_errors_total")
+            candidate["content"] = ""
+    return candidate
+
+
+async def retrieve_async(topic):
+    """
+    Busca, deduplica e baixa as notícias candidatas sobre um assunto.
+
+    Args:
+        topic (str): Assunto da busca
+
+    Returns:
+        list[dict]: Candidatos com title, url, source, date, snippet, content e
+            also_at (links de outras publicações da mesma história)
+    """
+    # 0. Primeiro o acervo local: se o assunto foi buscado na web há pouco e
+    #    há artigos suficientes, a web nem é consultada. Só voltam artigos do
+    #    período da pesquisa (a última semana), como nas buscas na web
+    store = get_article_store()
+    local = store.search(topic, limit=SCRAPE_MAX_ARTICLES, max_age_seconds=ARTICLE_WINDOW_DAYS * 86400)
+    last_query = store.last_web_query(topic)
+    age = time.time() - last_query if last_query else None
+    if age is not None and age < ARTICLE_FRESH_SECONDS and len(local) >= ARTICLE_MIN_RESULTS:
+        count("yournews_article_store_total", {"result": "hit"})
+        for candidate in local:
+            candidate["content"] = truncate_to_tokens(candidate["content"], CANDIDATE_MAX_TOKENS)
+        return deduplicate_candidates(local)
+    count("yournews_article_store_total", {"result": "miss"})
+    # Se o acervo já tem a semana, pedimos à web só o último dia
+    recency = "qdr:d" if age is not None and age < 86400 else "qdr:w"
+
+    limits = httpx.Limits(max_connections=SCRAPE_CONCURRENCY * 2, max_keepalive_connections=SCRAPE_CONCURRENCY)
+    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=limits) as client:
+        # 1. Todas as consultas ao mesmo tempo
+        responses = await asyncio.gather(
+            *(_search(client, query, recency) for query in expand_queries(topic)), return_exceptions=True
+        )
+
+        # 2. Remove links repetidos, mantendo a primeira ocorrência
+        candidates = {}
+        for results in responses:
+            if isinstance(results, Exception):
+                continue
+            for result in results:
+                if not result.get("link"):
+                    continue
+                url = canonicalize_url(result["link"])
+                if url not in candidates:
+                    candidates[url] = {
+                        "title": result.get("title", ""),
+                        "url": result["link"],
+                        "source": result.get("source", ""),
+                        "date": result.get("date", ""),
+                        "snippet": result.get("snippet", ""),
+                    }
+
+        # 3. Baixa as páginas restantes em paralelo, com limite de concorrência;
+        #    as que já estão no acervo não são baixadas
+        semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+        cache = get_page_cache()
+        selected = list(candidates.items())[:SCRAPE_MAX_ARTICLES]
+        stored = store.known_urls(url for url, _ in selected)
+        scraped = await asyncio.gather(*(
+            _scrape(client, semaphore, cache, candidate, stored.get(url)) for url, candidate in selected
+        ))
+
+    # 4. Guarda no acervo o texto inteiro do que veio da web; o pesquisador recebe
+    #    o texto cortado. Depois completa com os artigos do acervo
+    store.add([candidate for url, candidate in zip((url for url, _ in selected), scraped) if url not in stored])
+    for candidate in scraped:
+        candidate["content"] = truncate_to_tokens(candidate["content"], CANDIDATE_MAX_TOKENS)
+    if any(not isinstance(results, Exception) for results in responses):
+        store.mark_web_query(topic)
+    seen = set(candidates)
+    for candidate in local:
+        if len(scraped) >= SCRAPE_MAX_ARTICLES:
+            break
+        if canonicalize_url(candidate["url"]) not in seen:
+            candidate["content"] = truncate_to_tokens(candidate["content"], CANDIDATE_MAX_TOKENS)
+            scraped.append(candidate)
+
+    # 5. Junta as cópias da mesma história publicadas por jornais diferentes
+    return deduplicate_candidates(scraped)
+
+
+def retrieve(topic):
+    """
+    Versão síncrona de retrieve_async.
+
+    Se a thread atual já tem um loop assíncrono rodando (asyncio.run não pode
+    ser chamado dentro dele), a busca roda em uma thread auxiliar.
+
+    Args:
+        topic (str): Assunto da busca
+
+    Returns:
+        list[dict]: Candidatos encontrados (lista vazia se a busca falhar)
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        running = False
+    else:
+        running = True
+    try:
+        if not running:
+            return asyncio.run(retrieve_async(topic))
+        trace = current_trace()
+
+        def _run():
+            # As medições continuam indo para o registro desta busca
+            with attach_trace(trace):
+                return asyncio.run(retrieve_async(topic))
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="news-retrieve") as executor:
+            return executor.submit(_run).result()
+    except (httpx.HTTPError, OSError, sqlite3.Error, RuntimeError) as e:
+        print(f"Info: Pre-retrieval failed, the agent will search on its own: {e}")
+        return []
+
+
+def format_candidates(candidates):
+    """
+    Formata os candidatos como uma lista compacta em Markdown para o prompt do agente.
+
+    Args:
+        candidates (list[dict]): Candidatos retornados por retrieve
+
+    Returns:
+        str: Lista em Markdown (ou um aviso, se não houver candidatos)
+    """
+    if not candidates:
+        return "(nenhuma notícia pré-carregada; faça a busca com as ferramentas)"
+    lines = []
+    for number, candidate in enumerate(candidates, start=1):
+        header = f"{number}. **{candidate['title']}** ({candidate['source']}, {candidate['date']}) - {candidate['url']}"
+        # O texto vai em uma única linha para ocupar menos tokens no prompt
+        body = " ".join((candidate.get("content") or candidate.get("snippet", "")).split())
+        lines.append(f"{header}\n   {body}".rstrip())
+        if candidate.get("also_at"):
+            lines.append("   Também publicado em: " + ", ".join(candidate["also_at"]))
+    return "\n".join(lines)
@@ -1,19 +1,399 @@
-from crewai.tools import BaseTool
+"""
+YourNews - Ferramentas dos Agentes
+
+Substitui a ScrapeWebsiteTool padrão por uma ferramenta que:
+- Reaproveita conexões HTTP abertas (keep-alive) entre chamadas.
+- Usa requisições condicionais (ETag / Last-Modified) para não baixar de novo
+  páginas que não mudaram.
+- Guarda o texto extraído em um cache em disco, endereçado pelo hash do conteúdo.
+- Remove menus, rodapés e propagandas, mantendo só o corpo do artigo.
+- Corta o texto em um orçamento de tokens, para não encher o prompt do agente.
+
+As funções deste módulo também são usadas pela pré-busca paralela (retrieval.py).
+
+Também define a RateLimitedSerperTool: a SerperDevTool padrão com as chamadas
+passando pelo limite de requisições do Serper (veja utils/ratelimit.py).
+"""
+
+# Importações de bibliotecas padrão do Python
+import hashlib      # Para calcular o hash do conteúdo das páginas
+import os           # Para ler variáveis de ambiente e manipular arquivos
+import sqlite3      # Índice do cache de páginas
+import threading    # Para proteger o cliente HTTP e as conexões SQLite
+import time         # Para controlar a validade das páginas em cache
 from typing import Type
-from pydantic import BaseModel, Field
 
+# Bibliotecas externas
+import httpx                           # Cliente HTTP com pool de conexões
+from bs4 import BeautifulSoup          # Para analisar o HTML das páginas
+from crewai.tools import BaseTool      # Classe base das ferramentas do CrewAI
+from crewai_tools import SerperDevTool # Ferramenta de busca na web do CrewAI
+from pydantic import BaseModel, Field  # Para definir os parâmetros da ferramenta
+
+# Medições de desempenho
+from utils.metrics import count, record_span
+
+# Controle de requisições por provedor e chave de API
+from utils.ratelimit import get_limiter
+
+# Acervo local de artigos, consultado pelas próximas buscas antes da web
+from ..article_store import get_article_store
+
+# ===== CONFIGURAÇÕES =====
+# Diretório do cache de páginas
+PAGE_CACHE_DIR = os.getenv("NEWS_PAGE_CACHE_DIR", os.path.join(".cache", "yournews", "pages"))
+# Tamanho máximo do cache de páginas, em megabytes
+PAGE_CACHE_MAX_MB = int(os.getenv("NEWS_PAGE_CACHE_MAX_MB", "128"))
+# Por quanto tempo uma página é usada sem nem perguntar ao site se mudou, em segundos
+PAGE_CACHE_FRESH_SECONDS = int(os.getenv("NEWS_PAGE_CACHE_FRESH_SECONDS", "3600"))
+# Quantidade máxima de tokens do texto de cada artigo
+SCRAPE_MAX_TOKENS = int(os.getenv("NEWS_SCRAPE_MAX_TOKENS", "800"))
+# Tempo máximo de espera de cada requisição HTTP, em segundos
+HTTP_TIMEOUT = float(os.getenv("NEWS_HTTP_TIMEOUT", "15"))
+
+# Cabeçalho enviado aos sites, já que alguns recusam clientes sem identificação
+USER_AGENT = "Mozilla/5.0 (compatible; YourNewsBot/1.0)"
+
+# Elementos que nunca fazem parte do corpo de um artigo
+_BOILERPLATE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg"]
+
+# O tiktoken conta tokens exatamente como os modelos da OpenAI; sem ele,
+# usamos a aproximação de 4 caracteres por token
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # pragma: no cover - tiktoken é opcional
+    _encoding = None
+
+
+# ===== EXTRAÇÃO DE CONTEÚDO =====
+
+def extract_article(html):
+    """
+    Extrai o corpo principal de um artigo, no estilo do "modo leitura" dos navegadores.
+
+    Cada bloco da página recebe uma pontuação pelo texto dos seus parágrafos,
+    descontando o texto que está dentro de links (menus e listas de manchetes
+    têm muitos links e pouco texto corrido). O bloco com maior pontuação é o artigo.
+
+    Args:
+        html (str): Conteúdo HTML da página
+
+    Returns:
+        str: Título e parágrafos do artigo, separados por linhas
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup(_BOILERPLATE_TAGS):
+        element.decompose()
+
+    title = ""
+    og_title = soup.find("meta", property="og:title")
+    if og_title and og_title.get("content"):
+        title = og_title["content"].strip()
+    elif soup.title and soup.title.string:
+        title = soup.title.string.strip()
+
+    best, best_score = None, 0.0
+    for block in soup.find_all(["article", "main", "section", "div"]):
+        paragraphs = block.find_all("p", recursive=False) or block.find_all("p")
+        text_length = sum(len(p.get_text(strip=True)) for p in paragraphs)
+        if not text_length:
+            continue
+        link_length = sum(len(a.get_text(strip=True)) for p in paragraphs for a in p.find_all("a"))
+        # Blocos <article> e <main> ganham um bônus, pois costumam ser o artigo
+        bonus = 1.25 if block.name in ("article", "main") else 1.0
+        score = (text_length - link_length) * bonus
+        if score > best_score:
+            best, best_score = block, score
+
+    paragraphs = (best or soup).find_all("p")
+    body = [p.get_text(" ", strip=True) for p in paragraphs]
+    body = [text for text in body if len(text) > 40]
+    return "\n".join([title] + body if title else body)
+
+
+def truncate_to_tokens(text, max_tokens=SCRAPE_MAX_TOKENS):
+    """
+    Corta um texto para caber em um orçamento de tokens.
+
+    Args:
+        text (str): Texto a ser cortado
+        max_tokens (int): Quantidade máxima de tokens
+
+    Returns:
+        str: O texto original ou a parte inicial dele que cabe no orçamento
+    """
+    if _encoding is None:
+        return text[:max_tokens * 4]
+    tokens = _encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return _encoding.decode(tokens[:max_tokens])
+
+
+# ===== CACHE DE PÁGINAS =====
+
+class PageCache:
+    """Cache em disco do texto extraído das páginas, endereçado pelo hash do conteúdo"""
+
+    def __init__(self, directory=PAGE_CACHE_DIR, max_bytes=PAGE_CACHE_MAX_MB * 1024 * 1024,
+                 fresh_seconds=PAGE_CACHE_FRESH_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self._local = threading.local()
+        os.makedirs(self.directory, exist_ok=True)
+        with self._connection() as conn:
+            # pages: cada URL aponta para o hash do seu conteúdo
+            # blobs: o conteúdo em si, compartilhado por URLs com o mesmo texto
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " url TEXT PRIMARY KEY,"
+                " content_hash TEXT NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " fetched_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " content_hash TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _blob_path(self, content_hash):
+        return os.path.join(self.directory, f"{content_hash}.txt")
+
+    def lookup(self, url):
+        """
+        Procura uma página no cache.
 
-class MyCustomToolInput(BaseModel):
-    """Input schema for MyCustomTool."""
-    argument: str = Field(..., description="Description of the argument.")
+        Args:
+            url (str): Endereço da página
 
-class MyCustomTool(BaseTool):
-    name: str = "Name of my tool"
+        Returns:
+            dict | None: text, etag, last_modified e fresh (se ainda está dentro da
+                validade), ou None se a página não está no cache
+        """
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT content_hash, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._blob_path(row[0]), encoding="utf-8") as handle:
+                    text = handle.read()
+            except OSError:
+                # O conteúdo foi descartado pela política de tamanho
+                return None
+            conn.execute("UPDATE blobs SET accessed_at = ? WHERE content_hash = ?", (time.time(), row[0]))
+        return {
+            "text": text,
+            "etag": row[1],
+            "last_modified": row[2],
+            "fresh": time.time() - row[3] < self.fresh_seconds,
+        }
+
+    def touch(self, url):
+        """Marca uma página como recém-verificada (o site respondeu 304 Not Modified)"""
+        with self._connection() as conn:
+            conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def store(self, url, text, etag=None, last_modified=None):
+        """
+        Guarda o texto extraído de uma página.
+
+        Args:
+            url (str): Endereço da página
+            text (str): Texto extraído
+            etag (str, optional): Cabeçalho ETag da resposta
+            last_modified (str, optional): Cabeçalho Last-Modified da resposta
+        """
+        data = text.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(content_hash)
+        if not os.path.exists(path):
+            # Grava em um arquivo temporário e renomeia, para que outro processo
+            # nunca leia um arquivo pela metade
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, "wb") as handle:
+                handle.write(data)
+            os.replace(temporary, path)
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url, content_hash, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, content_hash, etag, last_modified, now),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs (content_hash, size, accessed_at) VALUES (?, ?, ?)",
+                (content_hash, len(data), now),
+            )
+        self._evict()
+
+    def _evict(self):
+        """Remove os conteúdos menos usados quando o cache passa do tamanho máximo"""
+        with self._connection() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - self.max_bytes
+            victims = []
+            for content_hash, size in conn.execute("SELECT content_hash, size FROM blobs ORDER BY accessed_at"):
+                victims.append(content_hash)
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM blobs WHERE content_hash = ?", [(h,) for h in victims])
+            conn.executemany("DELETE FROM pages WHERE content_hash = ?", [(h,) for h in victims])
+        for content_hash in victims:
+            try:
+                os.remove(self._blob_path(content_hash))
+            except OSError:
+                pass
+
+
+def conditional_headers(entry):
+    """
+    Monta os cabeçalhos de uma requisição condicional a partir de uma entrada do cache.
+
+    Args:
+        entry (dict | None): Entrada retornada por PageCache.lookup
+
+    Returns:
+        dict: Cabeçalhos HTTP (If-None-Match / If-Modified-Since, quando disponíveis)
+    """
+    headers = {"User-Agent": USER_AGENT}
+    if entry:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def handle_response(cache, url, entry, response):
+    """
+    Trata a resposta de uma requisição (síncrona ou assíncrona) e atualiza o cache.
+
+    Args:
+        cache (PageCache): Cache de páginas
+        url (str): Endereço da página
+        entry (dict | None): Entrada do cache usada para montar a requisição
+        response (httpx.Response): Resposta recebida
+
+    Returns:
+        str: Texto extraído do artigo (sem corte de tokens)
+    """
+    if response.status_code == 304 and entry:
+        cache.touch(url)
+        return entry["text"]
+    response.raise_for_status()
+    text = extract_article(response.text)
+    cache.store(url, text, response.headers.get("etag"), response.headers.get("last-modified"))
+    return text
+
+
+# Cliente HTTP e cache compartilhados, criados na primeira utilização
+# O httpx.Client mantém as conexões abertas e pode ser usado por várias threads
+_client = None
+_page_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client():
+    """Retorna o cliente HTTP compartilhado, com pool de conexões keep-alive"""
+    global _client
+    with _shared_lock:
+        if _client is None:
+            _client = httpx.Client(
+                timeout=HTTP_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            )
+        return _client
+
+
+def get_page_cache():
+    """Retorna o cache de páginas compartilhado"""
+    global _page_cache
+    with _shared_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+        return _page_cache
+
+
+def fetch_article(url, max_tokens=SCRAPE_MAX_TOKENS):
+    """
+    Lê o texto principal de um artigo, usando o cache sempre que possível.
+
+    Args:
+        url (str): Endereço do artigo
+        max_tokens (int, optional): Quantidade máxima de tokens do texto retornado
+            (None = o texto inteiro)
+
+    Returns:
+        str: Texto do artigo cortado no orçamento de tokens
+    """
+    cache = get_page_cache()
+    entry = cache.lookup(url)
+    if entry and entry["fresh"]:
+        count("yournews_page_cache_total", {"result": "fresh"})
+        text = entry["text"]
+        return text if max_tokens is None else truncate_to_tokens(text, max_tokens)
+    started = time.perf_counter()
+    response = get_http_client().get(url, headers=conditional_headers(entry))
+    result = "not_modified" if response.status_code == 304 else "miss"
+    count("yournews_page_cache_total", {"result": result})
+    record_span("http", "scrape", time.perf_counter() - started, bytes=len(response.content), cache=result)
+    text = handle_response(cache, url, entry, response)
+    return text if max_tokens is None else truncate_to_tokens(text, max_tokens)
+
+
+# ===== FERRAMENTA DO AGENTE =====
+
+class ArticleScrapeToolInput(BaseModel):
+    """Parâmetros da ArticleScrapeTool."""
+    website_url: str = Field(..., description="Full URL of the news article to read.")
+
+
+class ArticleScrapeTool(BaseTool):
+    name: str = "Read news article"
     description: str = (
-        "Clear description for what this tool is useful for, your agent will need this information to use it."
+        "Reads a news article from its URL and returns its title and main text, "
+        "without menus, ads or comments. Use it to confirm details of a news item."
     )
-    args_schema: Type[BaseModel] = MyCustomToolInput
+    args_schema: Type[BaseModel] = ArticleScrapeToolInput
+    max_tokens: int = SCRAPE_MAX_TOKENS
+
+    def _run(self, website_url: str) -> str:
+        try:
+            text = fetch_article(website_url, max_tokens=None)
+        except httpx.HTTPError as e:
+            return f"Could not read {website_url}: {e}"
+        if not text:
+            return f"No article text found at {website_url}."
+        # O artigo lido entra inteiro no acervo local, para as próximas buscas;
+        # só o agente recebe o texto cortado no orçamento de tokens
+        try:
+            get_article_store().add([{"url": website_url, "title": text.split("\n", 1)[0], "content": text}])
+        except sqlite3.Error as e:
+            print(f"Info: Could not index article: {e}")
+        return truncate_to_tokens(text, self.max_tokens)
+
+
+class RateLimitedSerperTool(SerperDevTool):
+    """SerperDevTool cujas chamadas respeitam o limite de requisições do Serper"""
 
-    def _run(self, argument: str) -> str:
-        # Implementation goes here
-        return "this is an example of a tool output, ignore it and move along."
+    def _make_api_request(self, search_query, search_type):
+        limiter = get_limiter("serper", os.environ.get("SERPER_API_KEY", ""))
+        return limiter.call(super()._make_api_request, search_query, search_type)